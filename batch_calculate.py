@@ -0,0 +1,282 @@
+"""
+Bulk net income calculation for payroll CSV files
+
+Streams the input in chunks, calculates each chunk in a worker process
+and writes the results in input order.
+
+Usage:
+    python batch_calculate.py payroll.csv results.csv
+    python batch_calculate.py payroll.csv results.csv --workers 8 --chunk-size 50000
+
+Input columns (header row required):
+    annual_gross, tax_class                              required
+    kinderfreibetrag, church_tax, state, employment_type,
+    age_group, health_insurance_company                  optional
+"""
+import argparse
+import csv
+import io
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import suppress
+from itertools import islice
+from typing import Iterator, List, Optional, Sequence
+from loguru import logger
+
+REQUIRED_COLUMNS = ('annual_gross', 'tax_class')
+
+# Optional columns and their defaults (same as calculate_net_income)
+OPTIONAL_COLUMNS = {
+    'kinderfreibetrag': '0',
+    'church_tax': 'false',
+    'state': 'BE_WEST',
+    'employment_type': 'standard',
+    'age_group': 'under_23',
+    'health_insurance_company': 'tk',
+}
+
+RESULT_COLUMNS = (
+    'gross_annual',
+    'income_tax',
+    'solidarity_surcharge',
+    'church_tax_amount',
+    'health_insurance',
+    'pension_insurance',
+    'unemployment_insurance',
+    'care_insurance',
+    'total_deductions',
+    'net_annual',
+    'gross_monthly',
+    'net_monthly',
+)
+
+TRUE_VALUES = {'1', 'true', 'yes', 'ja', 'y', 'j'}
+
+# Calculator of the worker process (created by _init_worker)
+_calculator = None
+
+
+def _init_worker(year: int):
+    """Create one calculator per worker process"""
+    global _calculator
+    from bot.services.tax_calculator import GermanTaxCalculator
+    _calculator = GermanTaxCalculator(year=year)
+
+
+def calculate_chunk(header: Sequence[str], rows: List[List[str]], delimiter: str, first_row: int = 1) -> str:
+    """
+    Calculate one chunk of input rows
+
+    Args:
+        header: Input column names
+        rows: Input rows (raw CSV values)
+        delimiter: Output delimiter
+        first_row: Number of the first row of the chunk (header excluded), for error messages
+
+    Returns:
+        CSV text of the input rows with the result columns appended
+
+    Raises:
+        ValueError: If a numeric column holds something that is not a number
+    """
+    import numpy as np
+
+    index = {name: i for i, name in enumerate(header)}
+
+    def column(name: str) -> List[str]:
+        if name in index:
+            i = index[name]
+            return [row[i] for row in rows]
+        return [OPTIONAL_COLUMNS[name]] * len(rows)
+
+    def numbers(name: str, dtype) -> "np.ndarray":
+        values = column(name)
+        try:
+            return np.array(values, dtype=dtype)
+        except ValueError:
+            # Find the offending row only on the slow path
+            for offset, value in enumerate(values):
+                try:
+                    np.array([value], dtype=dtype)
+                except ValueError:
+                    raise ValueError(f"row {first_row + offset}: {name} is not a number: {value!r}") from None
+            raise
+
+    church_tax = np.array([value.strip().lower() in TRUE_VALUES for value in column('church_tax')])
+
+    results = _calculator.calculate_net_income_batch(
+        annual_gross=numbers('annual_gross', np.float64),
+        tax_class=numbers('tax_class', np.int64),
+        kinderfreibetrag=numbers('kinderfreibetrag', np.float64),
+        church_tax=church_tax,
+        state=np.array(column('state')),
+        employment_type=np.array(column('employment_type')),
+        age_group=np.array(column('age_group')),
+        health_insurance_company=np.array(column('health_insurance_company')),
+    )
+    result_columns = [
+        results['church_tax' if name == 'church_tax_amount' else name].tolist()
+        for name in RESULT_COLUMNS
+    ]
+
+    output = io.StringIO()
+    writer = csv.writer(output, delimiter=delimiter, lineterminator='\n')
+    for row, values in zip(rows, zip(*result_columns)):
+        writer.writerow(row + [f"{value:.2f}" for value in values])
+    return output.getvalue()
+
+
+def check_rows(reader: Iterator[List[str]], columns: int) -> Iterator[List[str]]:
+    """
+    Yield the data rows, skipping blank lines
+
+    Raises:
+        ValueError: If a row does not have one value per header column
+    """
+    number = 0
+    for row in reader:
+        if not row:
+            continue
+        number += 1
+        if len(row) != columns:
+            raise ValueError(f"row {number}: expected {columns} columns, got {len(row)}")
+        yield row
+
+
+def read_chunks(reader: Iterator[List[str]], chunk_size: int) -> Iterator[List[List[str]]]:
+    """Yield lists of at most chunk_size rows"""
+    while True:
+        chunk = list(islice(reader, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run(
+    input_path: str,
+    output_path: str,
+    workers: Optional[int] = None,
+    chunk_size: int = 50000,
+    year: int = 2024,
+    delimiter: str = ',',
+    report_seconds: float = 5.0
+) -> int:
+    """
+    Calculate net income for every row of a CSV file
+
+    At most two chunks per worker are in flight, so memory use does not
+    depend on the input size. Results are written to a temporary file next
+    to output_path that only replaces it once every row has been calculated.
+
+    Returns:
+        Number of processed rows
+
+    Raises:
+        ValueError: If the header or a row of the input is invalid
+    """
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = workers * 2
+    partial_path = f"{output_path}.partial"
+
+    try:
+        processed = _run(input_path, partial_path, workers, max_in_flight, chunk_size, year, delimiter, report_seconds)
+        os.replace(partial_path, output_path)
+    except BaseException:
+        with suppress(OSError):
+            os.remove(partial_path)
+        raise
+
+    logger.info(f"Results written to {output_path}")
+    return processed
+
+
+def _run(
+    input_path: str,
+    output_path: str,
+    workers: int,
+    max_in_flight: int,
+    chunk_size: int,
+    year: int,
+    delimiter: str,
+    report_seconds: float
+) -> int:
+    with open(input_path, newline='', encoding='utf-8') as infile, \
+            open(output_path, 'w', newline='', encoding='utf-8') as outfile:
+        reader = csv.reader(infile, delimiter=delimiter)
+        header = next(reader, None)
+        if header is None:
+            raise ValueError(f"{input_path} is empty")
+
+        header = [name.strip() for name in header]
+        missing = [name for name in REQUIRED_COLUMNS if name not in header]
+        if missing:
+            raise ValueError(f"{input_path} is missing required columns: {', '.join(missing)}")
+
+        csv.writer(outfile, delimiter=delimiter, lineterminator='\n').writerow(
+            header + list(RESULT_COLUMNS)
+        )
+
+        started = time.monotonic()
+        last_report = started
+        processed = 0
+        pending = deque()
+
+        logger.info(f"Processing {input_path} with {workers} workers (chunks of {chunk_size} rows)")
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(year,)) as pool:
+            chunks = read_chunks(check_rows(reader, len(header)), chunk_size)
+            submitted = 0
+
+            while True:
+                # Keep the pool busy without reading the whole file
+                while len(pending) < max_in_flight:
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        break
+                    pending.append((len(chunk), pool.submit(calculate_chunk, header, chunk, delimiter, submitted + 1)))
+                    submitted += len(chunk)
+
+                if not pending:
+                    break
+
+                # Write results in input order
+                row_count, future = pending.popleft()
+                outfile.write(future.result())
+                processed += row_count
+
+                now = time.monotonic()
+                if now - last_report >= report_seconds:
+                    last_report = now
+                    logger.info(f"{processed:,} rows ({processed / (now - started):,.0f} rows/s)")
+
+        elapsed = time.monotonic() - started
+        rate = processed / elapsed if elapsed > 0 else 0
+        logger.info(f"Done: {processed:,} rows in {elapsed:.1f}s ({rate:,.0f} rows/s)")
+
+    return processed
+
+
+def main(argv=None) -> int:
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Calculate net income for a payroll CSV file')
+    parser.add_argument('input', help='Input CSV file')
+    parser.add_argument('output', help='Output CSV file')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--chunk-size', type=int, default=50000, help='Rows per chunk')
+    parser.add_argument('--year', type=int, default=2024, help='Tax year')
+    parser.add_argument('--delimiter', default=',', help='CSV delimiter')
+    args = parser.parse_args(argv)
+
+    try:
+        run(args.input, args.output, args.workers, args.chunk_size, args.year, args.delimiter)
+    except (OSError, ValueError) as e:
+        logger.error(f"Batch calculation failed: {e}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,252 @@
+"""
+Tax engine micro-benchmarks
+
+Measures the throughput of the calculation hot paths and compares it with
+the baseline stored in benchmarks/baseline.json. Exits with status 1 when a
+benchmark is slower than the baseline by more than the threshold.
+
+Usage:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --threshold 10 --only net_income
+    python benchmarks/run_benchmarks.py --update-baseline
+"""
+import argparse
+import json
+import platform
+import sys
+import timeit
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+BASELINE_PATH = Path(__file__).parent / 'baseline.json'
+
+# Allowed throughput loss in percent before a benchmark counts as regressed
+DEFAULT_THRESHOLD = 20.0
+
+# Typical profile of a bot user
+PROFILE = {
+    'tax_class': 1,
+    'church_tax': True,
+    'state': 'BY',
+    'employment_type': 'standard',
+    'age_group': 'over_23_no_children',
+    'health_insurance_company': 'tk',
+}
+
+# name -> setup function returning (callable, operations per call)
+BENCHMARKS: Dict[str, Callable[[], Tuple[Callable[[], object], int]]] = {}
+
+
+def benchmark(name: str):
+    """Register a benchmark setup function"""
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+@benchmark('income_tax')
+def bench_income_tax():
+    from bot.services.tax_calculator import GermanTaxCalculator
+    calculator = GermanTaxCalculator()
+    return lambda: calculator.calculate_income_tax(45000, 1), 1
+
+
+@benchmark('social_security')
+def bench_social_security():
+    from bot.services.tax_calculator import GermanTaxCalculator
+    calculator = GermanTaxCalculator()
+    return lambda: calculator.calculate_social_security(
+        45000, 'BY', 'standard', 'over_23_no_children', 'tk'
+    ), 1
+
+
+@benchmark('net_income')
+def bench_net_income():
+    from bot.services.tax_calculator import GermanTaxCalculator
+    calculator = GermanTaxCalculator()
+    return lambda: calculator.calculate_net_income(45000, **PROFILE), 1
+
+
+@benchmark('net_income_cached')
+def bench_net_income_cached():
+    from bot.services.calculation_cache import CalculationCache
+    from bot.services.tax_calculator import GermanTaxCalculator
+    calculator = GermanTaxCalculator(cache=CalculationCache())
+    return lambda: calculator.calculate_net_income(45000, **PROFILE), 1
+
+
+@benchmark('net_income_batch')
+def bench_net_income_batch():
+    import numpy as np
+    from bot.services.tax_calculator import GermanTaxCalculator
+    calculator = GermanTaxCalculator()
+    rows = 10000
+    gross = np.linspace(5000, 250000, rows)
+    return lambda: calculator.calculate_net_income_batch(gross, **PROFILE), rows
+
+
+@benchmark('sweep')
+def bench_sweep():
+    from collections import deque
+    from bot.services.tax_calculator import GermanTaxCalculator
+    calculator = GermanTaxCalculator()
+    points = 10000
+    return lambda: deque(calculator.sweep_net_income(0, points * 25, 25, **PROFILE), maxlen=0), points
+
+
+@benchmark('format_result')
+def bench_format_result():
+    from bot.handlers.calculation import format_calculation_result
+    from bot.services.tax_calculator import GermanTaxCalculator
+    result = GermanTaxCalculator().calculate_net_income(45000, **PROFILE)
+    return lambda: format_calculation_result(result, 'de'), 1
+
+
+@benchmark('calculate_and_format')
+def bench_calculate_and_format():
+    from bot.handlers.calculation import format_calculation_result
+    from bot.services.tax_calculator import GermanTaxCalculator
+    calculator = GermanTaxCalculator()
+    return lambda: format_calculation_result(calculator.calculate_net_income(45000, **PROFILE), 'de'), 1
+
+
+@benchmark('translate_all_locales')
+def bench_translate_all_locales():
+    from bot.handlers.calculation import format_calculation_result
+    from bot.services.tax_calculator import GermanTaxCalculator
+    from config import SUPPORTED_LANGUAGES
+    result = GermanTaxCalculator().calculate_net_income(45000, **PROFILE)
+
+    def translate():
+        for lang in SUPPORTED_LANGUAGES:
+            format_calculation_result(result, lang)
+
+    return translate, len(SUPPORTED_LANGUAGES)
+
+
+def measure(func: Callable[[], object], operations: int, repeat: int = 5, min_time: float = 0.2) -> Dict[str, float]:
+    """
+    Time a benchmark
+
+    Args:
+        func: Function to call
+        operations: Operations done by one call (e.g. rows of a batch)
+        repeat: Number of timing runs, the fastest one counts
+        min_time: Minimum duration of one timing run in seconds
+
+    Returns:
+        Operations per second and mean time per operation in microseconds
+    """
+    timer = timeit.Timer(func)
+
+    # Calls per run so that one run takes at least min_time
+    number = 1
+    while timer.timeit(number) < min_time:
+        number *= 2
+
+    best = min(timer.repeat(repeat=repeat, number=number))
+    ops_per_sec = operations * number / best
+    return {
+        'ops_per_sec': round(ops_per_sec, 1),
+        'us_per_op': round(1e6 / ops_per_sec, 3),
+    }
+
+
+def run_benchmarks(names: Optional[List[str]] = None, repeat: int = 5) -> Dict[str, Dict[str, float]]:
+    """Run the selected (default: all) benchmarks"""
+    results = {}
+    for name in names or BENCHMARKS:
+        func, operations = BENCHMARKS[name]()
+        results[name] = measure(func, operations, repeat=repeat)
+        print(f"{name:<24} {results[name]['ops_per_sec']:>14,.1f} ops/s {results[name]['us_per_op']:>12,.3f} us/op")
+    return results
+
+
+def compare_results(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    threshold: float = DEFAULT_THRESHOLD
+) -> List[str]:
+    """
+    Compare results with a baseline
+
+    Args:
+        results: Current results by benchmark name
+        baseline: Baseline results by benchmark name
+        threshold: Allowed throughput loss in percent
+
+    Returns:
+        Names of the benchmarks that regressed by more than the threshold
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            print(f"{name:<24} {'new':>14}")
+            continue
+
+        expected = baseline[name]['ops_per_sec']
+        change = (result['ops_per_sec'] - expected) / expected * 100
+        regressed = change < -threshold
+        if regressed:
+            regressions.append(name)
+        print(f"{name:<24} {change:>+13.1f}% {'REGRESSION' if regressed else 'ok'}")
+    return regressions
+
+
+def load_baseline(path: Path = BASELINE_PATH) -> Dict[str, Dict[str, float]]:
+    """Load baseline results (empty if there is no baseline yet)"""
+    if not path.exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)['results']
+
+
+def save_baseline(results: Dict[str, Dict[str, float]], path: Path = BASELINE_PATH):
+    """Store results as the new baseline, keeping benchmarks that were not run"""
+    merged = load_baseline(path)
+    merged.update(results)
+    data = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': dict(sorted(merged.items())),
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+        f.write('\n')
+
+
+def main(argv=None) -> int:
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Run the tax engine benchmarks')
+    parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS), help='Benchmarks to run')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f'Allowed throughput loss in percent (default: {DEFAULT_THRESHOLD:g})')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing runs per benchmark')
+    parser.add_argument('--baseline', type=Path, default=BASELINE_PATH, help='Baseline JSON file')
+    parser.add_argument('--update-baseline', action='store_true', help='Store the results as new baseline')
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.only, repeat=args.repeat)
+
+    if args.update_baseline:
+        save_baseline(results, args.baseline)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    print()
+    regressions = compare_results(results, load_baseline(args.baseline), args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) slower than baseline by more than {args.threshold:g}%: "
+              f"{', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,283 @@
+"""
+Webhook load test
+
+Runs the bot in webhook mode in this process, against a local stand-in for
+the Telegram Bot API and a temporary SQLite database, and replays Telegram
+update JSON to the webhook. Every simulated user sends its updates one
+after another (like a real user waiting for the answer); users run in
+parallel. Reports updates/second and the latency from the webhook POST
+until the bot has finished processing the update.
+
+Usage:
+    python benchmarks/webhook_loadtest.py
+    python benchmarks/webhook_loadtest.py --users 100 --rounds 3 --concurrent-updates 64
+    python benchmarks/webhook_loadtest.py --save-updates updates.jsonl
+    python benchmarks/webhook_loadtest.py --updates recorded_updates.jsonl
+
+Recorded updates (one JSON object per line, as received from Telegram) are
+replayed per sender in file order; update IDs are renumbered.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from aiohttp import ClientSession, web
+
+BOT_TOKEN = '123456:LOADTEST'
+SECRET_TOKEN = 'loadtest-secret'
+BOT_USER = {'id': 123456, 'is_bot': True, 'first_name': 'Tax Bot', 'username': 'tax_bot'}
+
+# Calculation flow of a new user (onboarding first), then of a returning user
+ONBOARDING = [('message', '/start'), ('callback', 'setlang_de'), ('callback', 'terms_accept')]
+CALCULATION = [
+    ('callback', 'calculate'), ('callback', 'period_annual'), ('callback', 'state_BY'),
+    ('callback', 'emp_standard'), ('message', '45000'), ('callback', 'tc_1'),
+    ('callback', 'has_children_no'), ('callback', 'age_over_23_no_children'),
+    ('callback', 'health_type_public'), ('callback', 'hc_tk'), ('callback', 'church_no'),
+    ('callback', 'history'), ('callback', 'main_menu'),
+]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _message(update_id: int, user_id: int, text: str) -> Dict[str, Any]:
+    message = {
+        'message_id': update_id,
+        'date': int(time.time()),
+        'chat': {'id': user_id, 'type': 'private'},
+        'from': {'id': user_id, 'is_bot': False, 'first_name': 'Load', 'language_code': 'de'},
+        'text': text,
+    }
+    if text.startswith('/'):
+        message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(text)}]
+    return {'update_id': update_id, 'message': message}
+
+
+def _callback(update_id: int, user_id: int, data: str) -> Dict[str, Any]:
+    return {
+        'update_id': update_id,
+        'callback_query': {
+            'id': str(update_id),
+            'from': {'id': user_id, 'is_bot': False, 'first_name': 'Load', 'language_code': 'de'},
+            'chat_instance': str(user_id),
+            'data': data,
+            'message': {
+                'message_id': 1,
+                'date': int(time.time()),
+                'chat': {'id': user_id, 'type': 'private'},
+                'from': BOT_USER,
+                'text': 'menu',
+            },
+        },
+    }
+
+
+def generate_updates(users: int, rounds: int) -> List[Dict[str, Any]]:
+    """Updates of the calculation flow for several users"""
+    updates = []
+    for user_id in range(100000, 100000 + users):
+        steps = ONBOARDING + CALCULATION * rounds
+        for kind, value in steps:
+            build = _message if kind == 'message' else _callback
+            updates.append(build(0, user_id, value))
+    return updates
+
+
+def group_by_user(updates: List[Dict[str, Any]]) -> Dict[int, List[Dict[str, Any]]]:
+    """Renumber update IDs and group the updates by sender"""
+    by_user: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+    for update_id, update in enumerate(updates, 1):
+        update['update_id'] = update_id
+        payload = update.get('message') or update.get('callback_query') or {}
+        by_user[payload.get('from', {}).get('id', 0)].append(update)
+    return by_user
+
+
+class FakeBotAPI:
+    """Minimal stand-in for the Telegram Bot API"""
+
+    def __init__(self):
+        self.calls: Dict[str, int] = defaultdict(int)
+        self._message_id = 0
+        self.app = web.Application()
+        self.app.router.add_post('/bot{token}/{method}', self.handle)
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info['method']
+        self.calls[method] += 1
+        data = await request.post()
+
+        if method == 'getMe':
+            result: Any = BOT_USER
+        elif method in ('sendMessage', 'editMessageText', 'editMessageReplyMarkup'):
+            self._message_id += 1
+            result = {
+                'message_id': self._message_id,
+                'date': int(time.time()),
+                'chat': {'id': int(data.get('chat_id', 0)), 'type': 'private'},
+                'from': BOT_USER,
+                'text': data.get('text', ''),
+            }
+        else:
+            result = True
+        return web.json_response({'ok': True, 'result': result})
+
+
+async def run(args) -> Dict[str, Any]:
+    # Configure the bot before its modules are imported
+    tmp_dir = tempfile.mkdtemp(prefix='tax_bot_loadtest_')
+    os.environ.update({
+        'TELEGRAM_BOT_TOKEN': BOT_TOKEN,
+        'ADMIN_TELEGRAM_ID': '1',
+        'DATABASE_URL': f"sqlite+aiosqlite:///{tmp_dir}/loadtest.db",
+        'BOT_MODE': 'webhook',
+        'CONCURRENT_UPDATES': str(args.concurrent_updates),
+        'TAX_SOURCES_CHECK_ENABLED': 'false',
+        'HISTORY_RETENTION_ENABLED': 'false',
+        # Simulated users answer faster than the per-chat limit allows
+        'RATE_LIMIT_ENABLED': 'true' if args.rate_limit else 'false',
+    })
+
+    from loguru import logger
+    from telegram.ext import TypeHandler
+    from telegram import Update
+    from main import build_application
+    from bot.models.database import init_db
+    from bot.webhook import WebhookServer
+
+    logger.remove()
+    logger.add(sys.stderr, level='WARNING')
+
+    if args.updates:
+        with open(args.updates, encoding='utf-8') as f:
+            updates = [json.loads(line) for line in f if line.strip()]
+    else:
+        updates = generate_updates(args.users, args.rounds)
+    if args.save_updates:
+        with open(args.save_updates, 'w', encoding='utf-8') as f:
+            for update in updates:
+                f.write(json.dumps(update) + '\n')
+    by_user = group_by_user(updates)
+
+    fake_api = FakeBotAPI()
+    api_runner = web.AppRunner(fake_api.app, access_log=None)
+    await api_runner.setup()
+    api_port = _free_port()
+    await web.TCPSite(api_runner, '127.0.0.1', api_port).start()
+
+    await init_db()
+    application = build_application(token=BOT_TOKEN, base_url=f"http://127.0.0.1:{api_port}/bot")
+
+    # Runs after all other handler groups: the update is completely processed
+    done: Dict[int, asyncio.Future] = {}
+
+    async def mark_done(update: Update, context):
+        future = done.pop(update.update_id, None)
+        if future is not None and not future.done():
+            future.set_result(time.perf_counter())
+
+    application.add_handler(TypeHandler(Update, mark_done), group=1000)
+
+    await application.initialize()
+    await application.post_init(application)
+    await application.start()
+
+    webhook_port = _free_port()
+    server = WebhookServer(application, listen='127.0.0.1', port=webhook_port, secret_token=SECRET_TOKEN)
+    await server.start()
+    webhook_url = f"http://127.0.0.1:{webhook_port}{server.path}"
+
+    latencies: List[float] = []
+    timeouts = 0
+
+    async def replay_user(session: ClientSession, user_updates: List[Dict[str, Any]]):
+        nonlocal timeouts
+        loop = asyncio.get_running_loop()
+        for update in user_updates:
+            future = loop.create_future()
+            done[update['update_id']] = future
+            started = time.perf_counter()
+            async with session.post(
+                webhook_url, json=update, headers={'X-Telegram-Bot-Api-Secret-Token': SECRET_TOKEN}
+            ) as response:
+                response.raise_for_status()
+            try:
+                finished = await asyncio.wait_for(future, args.timeout)
+                latencies.append(finished - started)
+            except asyncio.TimeoutError:
+                timeouts += 1
+                done.pop(update['update_id'], None)
+
+    started = time.perf_counter()
+    async with ClientSession() as session:
+        await asyncio.gather(*(replay_user(session, user_updates) for user_updates in by_user.values()))
+    elapsed = time.perf_counter() - started
+
+    webhook_stats = server.get_stats()
+    await server.stop()
+    await application.stop()
+    await application.shutdown()
+    await application.post_shutdown(application)
+    await api_runner.cleanup()
+
+    latencies.sort()
+    return {
+        'users': len(by_user),
+        'updates': len(updates),
+        'processed': len(latencies),
+        'timeouts': timeouts,
+        'elapsed': elapsed,
+        'updates_per_second': len(latencies) / elapsed,
+        'mean_ms': statistics.fmean(latencies) * 1000 if latencies else 0.0,
+        'p50_ms': statistics.median(latencies) * 1000 if latencies else 0.0,
+        'p99_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000 if latencies else 0.0,
+        'api_calls': dict(fake_api.calls),
+        'webhook': webhook_stats,
+    }
+
+
+def main(argv=None) -> int:
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Replay Telegram updates against the bot in webhook mode')
+    parser.add_argument('--users', type=int, default=50, help='Simulated users (generated updates)')
+    parser.add_argument('--rounds', type=int, default=2, help='Calculations per user (generated updates)')
+    parser.add_argument('--concurrent-updates', type=int, default=32, help='CONCURRENT_UPDATES of the bot')
+    parser.add_argument('--updates', default=None, help='JSONL file with recorded updates to replay')
+    parser.add_argument('--save-updates', default=None, help='Write the replayed updates to a JSONL file')
+    parser.add_argument('--rate-limit', action='store_true', help='Enable the outbound rate limiter')
+    parser.add_argument('--timeout', type=float, default=30, help='Seconds to wait for one update')
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run(args))
+
+    print(
+        f"{results['processed']}/{results['updates']} updates of {results['users']} users "
+        f"in {results['elapsed']:.2f}s ({results['timeouts']} timeouts)"
+    )
+    print(f"{'updates/s':>10} {'mean ms':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    print(
+        f"{results['updates_per_second']:>10,.0f} {results['mean_ms']:>9.2f} "
+        f"{results['p50_ms']:>9.2f} {results['p99_ms']:>9.2f}"
+    )
+    print(f"Bot API calls: {results['api_calls']}")
+    return 1 if results['timeouts'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,14 +1,17 @@
 """Admin handlers for tax update notifications and approvals"""
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
-from bot.utils import t
+from bot.utils import t, i18n
+from bot.services import tax_calculator
+from bot.services.user_cache import user_cache
+from bot.services.broadcast import broadcast_service
+from bot.rate_limiter import broadcast_kwargs
 from bot.models.database import AsyncSessionLocal
 from bot.models.tax_update import TaxUpdate
-from bot.models.user import User
 from sqlalchemy import select
 from loguru import logger
 from datetime import datetime
-from config import ADMIN_TELEGRAM_ID
+from config import settings, ADMIN_TELEGRAM_ID
 import json
 
 
@@ -18,12 +21,8 @@ async def is_admin(user_id: int) -> bool:
         return True
 
     # Check database
-    async with AsyncSessionLocal() as session:
-        result = await session.execute(
-            select(User).where(User.telegram_id == user_id)
-        )
-        db_user = result.scalar_one_or_none()
-        return db_user and db_user.is_admin
+    profile = await user_cache.get(user_id)
+    return profile is not None and profile.is_admin
 
 
 async def send_update_notification(context: ContextTypes.DEFAULT_TYPE, update_info: dict):
@@ -61,14 +60,8 @@ async def send_update_notification(context: ContextTypes.DEFAULT_TYPE, update_in
         effective_date = effective_date.strftime('%d.%m.%Y')
 
     # Get admin language (default to German)
-    admin_lang = 'de'
-    async with AsyncSessionLocal() as session:
-        result = await session.execute(
-            select(User).where(User.telegram_id == ADMIN_TELEGRAM_ID)
-        )
-        admin_user = result.scalar_one_or_none()
-        if admin_user:
-            admin_lang = admin_user.language
+    admin_profile = await user_cache.get(ADMIN_TELEGRAM_ID)
+    admin_lang = admin_profile.language if admin_profile else 'de'
 
     # Create notification message
     notification_text = t(
@@ -102,7 +95,9 @@ async def send_update_notification(context: ContextTypes.DEFAULT_TYPE, update_in
             chat_id=ADMIN_TELEGRAM_ID,
             text=notification_text,
             reply_markup=reply_markup,
-            parse_mode='HTML'
+            parse_mode='HTML',
+            # Scheduled job: users waiting for a reply go first
+            **broadcast_kwargs(context.bot)
         )
         logger.info(f"Tax update notification sent to admin: {update_info['title']}")
     except Exception as e:
@@ -141,18 +136,27 @@ async def approve_update(update: Update, context: ContextTypes.DEFAULT_TYPE):
             logger.info(f"Tax update {update_id} approved and applied by admin {user.id}")
 
             # Get user language
-            user_result = await session.execute(
-                select(User).where(User.telegram_id == user.id)
-            )
-            db_user = user_result.scalar_one_or_none()
-            user_lang = db_user.language if db_user else 'de'
+            profile = await user_cache.get(user.id)
+            user_lang = profile.language if profile else 'de'
 
             # Show confirmation
             confirmation_text = t('update_approved', lang=user_lang)
             await query.edit_message_text(confirmation_text)
 
             # TODO: Apply the update to tax calculation parameters
-            # This would involve updating the config or database with new values
+            # The new values are still entered in the tariff config by hand;
+            # nothing below changes them. The reload only picks up config
+            # edits made so far and the broadcast only announces the update.
+
+            # Recompile the tariff from config and drop results cached under the old one
+            tax_calculator.reload_tariff()
+            if tax_calculator.cache is not None:
+                logger.info(f"Calculation cache invalidated: {tax_calculator.cache.get_stats()}")
+
+            # Tell all users in the background
+            if settings.BROADCAST_ENABLED:
+                broadcast_id = await broadcast_service.announce_tax_update(context.bot, tax_update)
+                logger.info(f"Broadcast {broadcast_id} of tax update {update_id} started")
 
 
 async def reject_update(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -185,12 +189,35 @@ async def reject_update(update: Update, context: ContextTypes.DEFAULT_TYPE):
             logger.info(f"Tax update {update_id} rejected by admin {user.id}")
 
             # Get user language
-            user_result = await session.execute(
-                select(User).where(User.telegram_id == user.id)
-            )
-            db_user = user_result.scalar_one_or_none()
-            user_lang = db_user.language if db_user else 'de'
+            profile = await user_cache.get(user.id)
+            user_lang = profile.language if profile else 'de'
 
             # Show confirmation
             confirmation_text = t('update_rejected', lang=user_lang)
             await query.edit_message_text(confirmation_text)
+
+
+async def reload_locales(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle /reload_locales: reload all translation files without restart"""
+    user = update.effective_user
+
+    # Check if user is admin
+    if not await is_admin(user.id):
+        await update.message.reply_text(t('admin_only', lang='de'))
+        return
+
+    result = await i18n.reload_async(force=True)
+    logger.info(f"Translations reloaded by admin {user.id}")
+
+    # Get user language
+    profile = await user_cache.get(user.id)
+    user_lang = profile.language if profile else 'de'
+
+    # Answered with the new translations
+    await update.message.reply_text(t(
+        'locales_reloaded',
+        lang=user_lang,
+        changed=', '.join(result['changed']) or '-',
+        failed=', '.join(result['failed']) or '-',
+        duration=f"{result.get('total_ms', 0):.1f}"
+    ))
@@ -1,20 +1,16 @@
 """Tax calculation handlers"""
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram import Update
 from telegram.ext import ContextTypes, ConversationHandler
 from bot.utils import t
+from bot.utils.keyboards import keyboard
 from bot.services import tax_calculator
-from bot.models.database import AsyncSessionLocal
-from bot.models.user import User
-from bot.models.calculation import TaxCalculation
-from sqlalchemy import select
+from bot.services.calculation_writer import calculation_writer
+from bot.services.calculation_storage import details_for_storage
+from bot.services.user_cache import user_cache
 from loguru import logger
 from datetime import datetime
 from config.settings import (
-    GERMAN_STATES,
-    TAX_CLASSES,
     EMPLOYMENT_TYPES,
-    HEALTH_INSURANCE_COMPANIES,
-    KINDERFREIBETRAG_OPTIONS,
     PRIVATE_HEALTH_INSURANCE
 )
 
@@ -34,14 +30,7 @@ async def start_calculation(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Ask for calculation period (monthly or annual)
     period_text = t('select_period', lang=user_lang)
 
-    keyboard = [
-        [
-            InlineKeyboardButton(t('monthly', lang=user_lang), callback_data='period_monthly'),
-            InlineKeyboardButton(t('annual', lang=user_lang), callback_data='period_annual'),
-        ],
-        [InlineKeyboardButton(t('cancel', lang=user_lang), callback_data='main_menu')]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    reply_markup = keyboard('period', user_lang)
 
     await query.edit_message_text(
         period_text,
@@ -66,21 +55,7 @@ async def receive_period(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Ask for German state (Bundesland) - now includes BE_WEST and BE_EAST
     state_text = t('select_state', lang=user_lang)
 
-    # Create state selection keyboard (2 columns)
-    keyboard = []
-    state_codes = list(GERMAN_STATES.keys())
-
-    for i in range(0, len(state_codes), 2):
-        row = []
-        for j in range(2):
-            if i + j < len(state_codes):
-                state_code = state_codes[i + j]
-                state_name = t(f'state_{state_code}', lang=user_lang)
-                row.append(InlineKeyboardButton(state_name, callback_data=f'state_{state_code}'))
-        keyboard.append(row)
-
-    keyboard.append([InlineKeyboardButton(t('cancel', lang=user_lang), callback_data='main_menu')])
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    reply_markup = keyboard('state', user_lang)
 
     await query.edit_message_text(
         state_text,
@@ -104,40 +79,13 @@ async def receive_state(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     # Save state to user database for future use
     user = update.effective_user
-    async with AsyncSessionLocal() as session:
-        result = await session.execute(
-            select(User).where(User.telegram_id == user.id)
-        )
-        db_user = result.scalar_one_or_none()
-
-        if db_user:
-            db_user.state = state_code
-            await session.commit()
-            logger.info(f"User {user.id} selected state: {state_code}")
+    if await user_cache.set_fields(user.id, state=state_code):
+        logger.info(f"User {user.id} selected state: {state_code}")
 
     # Ask for employment type (Beschäftigungsart)
     employment_text = t('select_employment_type', lang=user_lang)
 
-    keyboard = [
-        [InlineKeyboardButton(
-            t('employment_standard', lang=user_lang),
-            callback_data='emp_standard'
-        )],
-        [InlineKeyboardButton(
-            t('employment_trainee', lang=user_lang),
-            callback_data='emp_trainee'
-        )],
-        [InlineKeyboardButton(
-            t('employment_civil_servant', lang=user_lang),
-            callback_data='emp_civil_servant'
-        )],
-        [InlineKeyboardButton(
-            t('employment_self_employed', lang=user_lang),
-            callback_data='emp_self_employed'
-        )],
-        [InlineKeyboardButton(t('cancel', lang=user_lang), callback_data='main_menu')]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    reply_markup = keyboard('employment_type', user_lang)
 
     await query.edit_message_text(
         employment_text,
@@ -166,9 +114,7 @@ async def receive_employment_type(update: Update, context: ContextTypes.DEFAULT_
     else:
         income_text = t('enter_gross_income', lang=user_lang)
 
-    # Cancel button
-    keyboard = [[InlineKeyboardButton(t('cancel', lang=user_lang), callback_data='main_menu')]]
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    reply_markup = keyboard('cancel', user_lang)
 
     await query.edit_message_text(
         income_text,
@@ -204,15 +150,7 @@ async def receive_income(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # Ask for tax class with detailed descriptions
         tax_class_text = t('select_tax_class', lang=user_lang)
 
-        keyboard = []
-        for tc_num in range(1, 7):
-            tc_data = TAX_CLASSES[tc_num]
-            # Use name from TAX_CLASSES dict
-            button_text = t(f'tax_class_{tc_num}_detailed', lang=user_lang)
-            keyboard.append([InlineKeyboardButton(button_text, callback_data=f'tc_{tc_num}')])
-
-        keyboard.append([InlineKeyboardButton(t('cancel', lang=user_lang), callback_data='main_menu')])
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = keyboard('tax_class', user_lang)
 
         await update.message.reply_text(
             tax_class_text,
@@ -242,14 +180,7 @@ async def receive_tax_class(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Ask if user has children
     children_has_text = t('ask_has_children', lang=user_lang)
 
-    keyboard = [
-        [
-            InlineKeyboardButton(t('yes', lang=user_lang), callback_data='has_children_yes'),
-            InlineKeyboardButton(t('no', lang=user_lang), callback_data='has_children_no'),
-        ],
-        [InlineKeyboardButton(t('cancel', lang=user_lang), callback_data='main_menu')]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    reply_markup = keyboard('has_children', user_lang)
 
     await query.edit_message_text(
         children_has_text,
@@ -277,20 +208,7 @@ async def receive_children_has(update: Update, context: ContextTypes.DEFAULT_TYP
     # Ask for number of children under 25
     children_count_text = t('ask_children_count', lang=user_lang)
 
-    keyboard = [
-        [
-            InlineKeyboardButton('0', callback_data='children_count_0'),
-            InlineKeyboardButton('1', callback_data='children_count_1'),
-            InlineKeyboardButton('2', callback_data='children_count_2'),
-        ],
-        [
-            InlineKeyboardButton('3', callback_data='children_count_3'),
-            InlineKeyboardButton('4', callback_data='children_count_4'),
-            InlineKeyboardButton('5+', callback_data='children_count_5'),
-        ],
-        [InlineKeyboardButton(t('cancel', lang=user_lang), callback_data='main_menu')]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    reply_markup = keyboard('children_count', user_lang)
 
     await query.edit_message_text(
         children_count_text,
@@ -315,22 +233,7 @@ async def receive_children_count(update: Update, context: ContextTypes.DEFAULT_T
     # Ask for Kinderfreibetrag
     kinderfreibetrag_text = t('ask_kinderfreibetrag', lang=user_lang)
 
-    # Create keyboard with options 0.0 to 6.0 in 0.5 steps (4 columns)
-    keyboard = []
-    options = KINDERFREIBETRAG_OPTIONS
-    for i in range(0, len(options), 4):
-        row = []
-        for j in range(4):
-            if i + j < len(options):
-                value = options[i + j]
-                row.append(InlineKeyboardButton(
-                    str(value),
-                    callback_data=f'kfb_{str(value).replace(".", "_")}'
-                ))
-        keyboard.append(row)
-
-    keyboard.append([InlineKeyboardButton(t('cancel', lang=user_lang), callback_data='main_menu')])
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    reply_markup = keyboard('kinderfreibetrag', user_lang)
 
     await query.edit_message_text(
         kinderfreibetrag_text,
@@ -360,22 +263,7 @@ async def ask_age_group(query, context: ContextTypes.DEFAULT_TYPE):
 
     age_text = t('select_age_group', lang=user_lang)
 
-    keyboard = [
-        [InlineKeyboardButton(
-            t('age_under_23', lang=user_lang),
-            callback_data='age_under_23'
-        )],
-        [InlineKeyboardButton(
-            t('age_over_23_children', lang=user_lang),
-            callback_data='age_over_23_children'
-        )],
-        [InlineKeyboardButton(
-            t('age_over_23_no_children', lang=user_lang),
-            callback_data='age_over_23_no_children'
-        )],
-        [InlineKeyboardButton(t('cancel', lang=user_lang), callback_data='main_menu')]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    reply_markup = keyboard('age_group', user_lang)
 
     await query.edit_message_text(
         age_text,
@@ -400,18 +288,7 @@ async def receive_age_group(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Ask for health insurance type
     health_type_text = t('select_health_insurance_type', lang=user_lang)
 
-    keyboard = [
-        [InlineKeyboardButton(
-            t('health_insurance_public', lang=user_lang),
-            callback_data='health_type_public'
-        )],
-        [InlineKeyboardButton(
-            t('health_insurance_private', lang=user_lang),
-            callback_data='health_type_private'
-        )],
-        [InlineKeyboardButton(t('cancel', lang=user_lang), callback_data='main_menu')]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    reply_markup = keyboard('health_insurance_type', user_lang)
 
     await query.edit_message_text(
         health_type_text,
@@ -437,23 +314,7 @@ async def receive_health_insurance_type(update: Update, context: ContextTypes.DE
         # Show health insurance companies (Gesetzlich)
         health_company_text = t('select_health_insurance_company', lang=user_lang)
 
-        # Create keyboard with all 23 companies (2 columns)
-        keyboard = []
-        companies = list(HEALTH_INSURANCE_COMPANIES.items())
-
-        for i in range(0, len(companies), 2):
-            row = []
-            for j in range(2):
-                if i + j < len(companies):
-                    company_code, company_data = companies[i + j]
-                    company_name = t(f'health_company_{company_code}', lang=user_lang)
-                    employee_share = company_data['employee_share']
-                    button_text = f"{company_name} ({employee_share}%)"
-                    row.append(InlineKeyboardButton(button_text, callback_data=f'hc_{company_code}'))
-            keyboard.append(row)
-
-        keyboard.append([InlineKeyboardButton(t('cancel', lang=user_lang), callback_data='main_menu')])
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = keyboard('health_insurance_company', user_lang)
 
         await query.edit_message_text(
             health_company_text,
@@ -487,14 +348,7 @@ async def ask_church_tax(query, context: ContextTypes.DEFAULT_TYPE):
 
     church_text = t('ask_church_tax', lang=user_lang)
 
-    keyboard = [
-        [
-            InlineKeyboardButton(t('yes', lang=user_lang), callback_data='church_yes'),
-            InlineKeyboardButton(t('no', lang=user_lang), callback_data='church_no'),
-        ],
-        [InlineKeyboardButton(t('cancel', lang=user_lang), callback_data='main_menu')]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    reply_markup = keyboard('church_tax', user_lang)
 
     await query.edit_message_text(
         church_text,
@@ -505,6 +359,36 @@ async def ask_church_tax(query, context: ContextTypes.DEFAULT_TYPE):
     return CHURCH_TAX
 
 
+def format_calculation_result(result, lang: str) -> str:
+    """
+    Render a calculation result as the result message
+
+    Args:
+        result: NetIncomeResult from tax_calculator.calculate_net_income
+        lang: Language code
+
+    Returns:
+        Translated result message
+    """
+    return t(
+        'calculation_result',
+        lang=lang,
+        year=result.year,
+        gross=f"{result.gross_annual:,.2f}",
+        income_tax=f"{result.income_tax:,.2f}",
+        soli=f"{result.solidarity_surcharge:,.2f}",
+        church=f"{result.church_tax:,.2f}",
+        health=f"{result.health_insurance:,.2f}",
+        pension=f"{result.pension_insurance:,.2f}",
+        unemployment=f"{result.unemployment_insurance:,.2f}",
+        care=f"{result.care_insurance:,.2f}",
+        total_deductions=f"{result.total_deductions:,.2f}",
+        net=f"{result.net_annual:,.2f}",
+        monthly_gross=f"{result.gross_monthly:,.2f}",
+        monthly_net=f"{result.net_monthly:,.2f}"
+    )
+
+
 async def receive_church_tax(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Receive church tax selection and perform calculation"""
     query = update.callback_query
@@ -543,64 +427,30 @@ async def receive_church_tax(update: Update, context: ContextTypes.DEFAULT_TYPE)
         health_insurance_company=health_insurance_company
     )
 
-    # Save calculation to database
-    user = update.effective_user
-    async with AsyncSessionLocal() as session:
-        # Get user
-        db_result = await session.execute(
-            select(User).where(User.telegram_id == user.id)
-        )
-        db_user = db_result.scalar_one_or_none()
-
-        if db_user:
-            # Create calculation record
-            calculation = TaxCalculation(
-                user_id=db_user.id,
-                gross_income=result['gross_annual'],
-                tax_class=tax_class,
-                children=children_count,
-                church_tax=church_tax,
-                state=state,
-                income_tax=result['income_tax'],
-                solidarity_surcharge=result['solidarity_surcharge'],
-                church_tax_amount=result['church_tax'],
-                health_insurance=result['health_insurance'],
-                pension_insurance=result['pension_insurance'],
-                unemployment_insurance=result['unemployment_insurance'],
-                care_insurance=result['care_insurance'],
-                total_deductions=result['total_deductions'],
-                net_income=result['net_annual'],
-                calculation_details=result,
-                tax_year=datetime.now().year
-            )
-            session.add(calculation)
-            await session.commit()
+    # Save calculation to database (written in the background)
+    await calculation_writer.submit(update.effective_user.id, {
+        'gross_income': result.gross_annual,
+        'tax_class': tax_class,
+        'children': children_count,
+        'church_tax': church_tax,
+        'state': state,
+        'income_tax': result.income_tax,
+        'solidarity_surcharge': result.solidarity_surcharge,
+        'church_tax_amount': result.church_tax,
+        'health_insurance': result.health_insurance,
+        'pension_insurance': result.pension_insurance,
+        'unemployment_insurance': result.unemployment_insurance,
+        'care_insurance': result.care_insurance,
+        'total_deductions': result.total_deductions,
+        'net_income': result.net_annual,
+        'calculation_details': details_for_storage(result, gross_income, tax_calculator.tariff.version),
+        'tax_year': datetime.now().year,
+    })
 
     # Format result message
-    result_text = t(
-        'calculation_result',
-        lang=user_lang,
-        year=result['year'],
-        gross=f"{result['gross_annual']:,.2f}",
-        income_tax=f"{result['income_tax']:,.2f}",
-        soli=f"{result['solidarity_surcharge']:,.2f}",
-        church=f"{result['church_tax']:,.2f}",
-        health=f"{result['health_insurance']:,.2f}",
-        pension=f"{result['pension_insurance']:,.2f}",
-        unemployment=f"{result['unemployment_insurance']:,.2f}",
-        care=f"{result['care_insurance']:,.2f}",
-        total_deductions=f"{result['total_deductions']:,.2f}",
-        net=f"{result['net_annual']:,.2f}",
-        monthly_gross=f"{result['gross_monthly']:,.2f}",
-        monthly_net=f"{result['net_monthly']:,.2f}"
-    )
+    result_text = format_calculation_result(result, user_lang)
 
-    # Buttons
-    keyboard = [
-        [InlineKeyboardButton(t('calculate_tax', lang=user_lang), callback_data='calculate')],
-        [InlineKeyboardButton(t('main_menu', lang=user_lang), callback_data='main_menu')]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    reply_markup = keyboard('calculation_result', user_lang)
 
     await query.edit_message_text(
         result_text,
@@ -1,12 +1,91 @@
 """Calculation history handler"""
+from datetime import datetime
+from typing import List, Optional, Tuple
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 from bot.utils import t
+from bot.utils.keyboards import keyboard
 from bot.models.database import AsyncSessionLocal
-from bot.models.user import User
 from bot.models.calculation import TaxCalculation
-from sqlalchemy import select
+from bot.services.user_cache import user_cache
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from loguru import logger
+from config import HISTORY_PAGE_SIZE
+
+# history, history_older_<created_at>_<id>, history_newer_<created_at>_<id>
+HISTORY_PATTERN = r'^history(_(older|newer)_\d{20}_\d+)?$'
+
+# Cursor timestamp format (fixed width, keeps callback data below 64 bytes)
+CURSOR_FORMAT = '%Y%m%d%H%M%S%f'
+
+Cursor = Tuple[datetime, int]
+
+
+def encode_cursor(direction: str, calc: TaxCalculation) -> str:
+    """Callback data for the page before/after a calculation"""
+    return f"history_{direction}_{calc.created_at.strftime(CURSOR_FORMAT)}_{calc.id}"
+
+
+def decode_cursor(data: str) -> Tuple[Optional[str], Optional[Cursor]]:
+    """Direction and cursor of history callback data (None, None for the newest page)"""
+    parts = data.split('_')
+    if len(parts) != 4:
+        return None, None
+    return parts[1], (datetime.strptime(parts[2], CURSOR_FORMAT), int(parts[3]))
+
+
+async def load_history_page(
+    session: AsyncSession,
+    user_id: int,
+    direction: Optional[str] = None,
+    cursor: Optional[Cursor] = None,
+    page_size: int = HISTORY_PAGE_SIZE
+) -> Tuple[List[TaxCalculation], bool, bool]:
+    """
+    Load one history page with keyset pagination
+
+    Pages are addressed by the (created_at, id) of the row next to them, so
+    every page is a range scan on ix_tax_calculations_user_created no matter
+    how many calculations the user has.
+
+    Args:
+        session: Database session
+        user_id: User ID (not the Telegram ID)
+        direction: 'older' or 'newer' than the cursor, None for the newest page
+        cursor: (created_at, id) of the last/first row of the current page
+        page_size: Calculations per page
+
+    Returns:
+        Calculations (newest first), whether older and whether newer ones exist
+    """
+    query = select(TaxCalculation).where(TaxCalculation.user_id == user_id)
+
+    if direction == 'newer':
+        created_at, calc_id = cursor
+        query = query.where(or_(
+            TaxCalculation.created_at > created_at,
+            and_(TaxCalculation.created_at == created_at, TaxCalculation.id > calc_id)
+        )).order_by(TaxCalculation.created_at.asc(), TaxCalculation.id.asc())
+    else:
+        if direction == 'older':
+            created_at, calc_id = cursor
+            query = query.where(or_(
+                TaxCalculation.created_at < created_at,
+                and_(TaxCalculation.created_at == created_at, TaxCalculation.id < calc_id)
+            ))
+        query = query.order_by(TaxCalculation.created_at.desc(), TaxCalculation.id.desc())
+
+    # One extra row tells whether there is another page in this direction
+    result = await session.execute(query.limit(page_size + 1))
+    calculations = list(result.scalars().all())
+    has_more = len(calculations) > page_size
+    calculations = calculations[:page_size]
+
+    if direction == 'newer':
+        calculations.reverse()
+        return calculations, True, has_more
+    return calculations, has_more, direction == 'older'
 
 
 async def show_history(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -17,57 +96,69 @@ async def show_history(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user = update.effective_user
     user_lang = context.user_data.get('language', 'de')
 
+    # Get user
+    profile = await user_cache.get(user.id)
+    if profile is None:
+        await query.edit_message_text(t('error_occurred', lang=user_lang))
+        return
+
+    direction, cursor = decode_cursor(query.data)
+
     # Get user's calculations from database
     async with AsyncSessionLocal() as session:
-        # Get user
-        user_result = await session.execute(
-            select(User).where(User.telegram_id == user.id)
-        )
-        db_user = user_result.scalar_one_or_none()
-
-        if not db_user:
-            await query.edit_message_text(t('error_occurred', lang=user_lang))
-            return
-
-        # Get calculations
-        calc_result = await session.execute(
-            select(TaxCalculation)
-            .where(TaxCalculation.user_id == db_user.id)
-            .order_by(TaxCalculation.created_at.desc())
-            .limit(10)
+        calculations, has_older, has_newer = await load_history_page(
+            session, profile.id, direction, cursor
         )
-        calculations = calc_result.scalars().all()
-
-        if not calculations:
-            # No calculations yet
-            no_calc_text = t('no_calculations', lang=user_lang)
-            keyboard = [[InlineKeyboardButton(t('back', lang=user_lang), callback_data='main_menu')]]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-
-            await query.edit_message_text(
-                no_calc_text,
-                reply_markup=reply_markup
-            )
-            return
-
-        # Format calculation history
-        history_text = f"📋 <b>{t('my_calculations', lang=user_lang)}</b>\n\n"
-
-        for i, calc in enumerate(calculations, 1):
-            date = calc.created_at.strftime('%d.%m.%Y %H:%M')
-            history_text += (
-                f"{i}. <b>{date}</b>\n"
-                f"   💰 {calc.gross_income:,.0f}€ → {calc.net_income:,.0f}€\n"
-                f"   📑 {t(f'tax_class_{calc.tax_class}', lang=user_lang)}\n"
-                f"   💸 {calc.total_deductions:,.0f}€ ({t('total_deductions', lang=user_lang)})\n\n"
-            )
-
-        # Back button
-        keyboard = [[InlineKeyboardButton(t('back', lang=user_lang), callback_data='main_menu')]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+
+    if not calculations and direction is None:
+        # No calculations yet
+        no_calc_text = t('no_calculations', lang=user_lang)
+        reply_markup = keyboard('back_to_menu', user_lang)
 
         await query.edit_message_text(
-            history_text,
-            reply_markup=reply_markup,
-            parse_mode='HTML'
+            no_calc_text,
+            reply_markup=reply_markup
         )
+        return
+
+    if not calculations:
+        # Rows of the requested page were deleted meanwhile: start over
+        logger.debug(f"Empty history page for user {user.id}, showing newest page")
+        async with AsyncSessionLocal() as session:
+            calculations, has_older, has_newer = await load_history_page(session, profile.id)
+
+    # Format calculation history
+    history_text = f"📋 <b>{t('my_calculations', lang=user_lang)}</b>\n\n"
+
+    for i, calc in enumerate(calculations, 1):
+        date = calc.created_at.strftime('%d.%m.%Y %H:%M')
+        history_text += (
+            f"{i}. <b>{date}</b>\n"
+            f"   💰 {calc.gross_income:,.0f}€ → {calc.net_income:,.0f}€\n"
+            f"   📑 {t(f'tax_class_{calc.tax_class}', lang=user_lang)}\n"
+            f"   💸 {calc.total_deductions:,.0f}€ ({t('total_deductions', lang=user_lang)})\n\n"
+        )
+
+    # Page navigation and back button
+    rows = []
+    navigation = []
+    if has_older:
+        navigation.append(InlineKeyboardButton(
+            t('history_older', lang=user_lang),
+            callback_data=encode_cursor('older', calculations[-1])
+        ))
+    if has_newer:
+        navigation.append(InlineKeyboardButton(
+            t('history_newer', lang=user_lang),
+            callback_data=encode_cursor('newer', calculations[0])
+        ))
+    if navigation:
+        rows.append(navigation)
+    rows.append([InlineKeyboardButton(t('back', lang=user_lang), callback_data='main_menu')])
+    reply_markup = InlineKeyboardMarkup(rows)
+
+    await query.edit_message_text(
+        history_text,
+        reply_markup=reply_markup,
+        parse_mode='HTML'
+    )
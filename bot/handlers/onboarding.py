@@ -1,11 +1,14 @@
 """Onboarding handlers for language selection and terms acceptance"""
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram import Update
 from telegram.ext import ContextTypes
 from bot.utils import t, i18n
+from bot.utils.keyboards import keyboard
 from bot.models.database import AsyncSessionLocal
 from bot.models.user import User
+from bot.services.user_cache import user_cache
 from sqlalchemy import select
 from loguru import logger
+from config import DEFAULT_LANGUAGE
 
 
 async def choose_language(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -16,30 +19,7 @@ async def choose_language(update: Update, context: ContextTypes.DEFAULT_TYPE):
     welcome_text = "🇩🇪 Willkommen! | Welcome! | أهلاً!\n\n🌍 Bitte wählen Sie Ihre Sprache:\nPlease select your language:\nالرجاء اختيار لغتك:"
 
     # Language selection keyboard (2 columns)
-    keyboard = []
-    languages = [
-        ('de', '🇩🇪 Deutsch'),
-        ('ar', '🇸🇦 العربية'),
-        ('tr', '🇹🇷 Türkçe'),
-        ('pl', '🇵🇱 Polski'),
-        ('ru', '🇷🇺 Русский'),
-        ('it', '🇮🇹 Italiano'),
-        ('ro', '🇷🇴 Română'),
-        ('en', '🇬🇧 English'),
-        ('el', '🇬🇷 Ελληνικά'),
-        ('hr', '🇭🇷 Hrvatski'),
-    ]
-
-    # Create 2 columns
-    for i in range(0, len(languages), 2):
-        row = []
-        for j in range(2):
-            if i + j < len(languages):
-                lang_code, lang_name = languages[i + j]
-                row.append(InlineKeyboardButton(lang_name, callback_data=f'setlang_{lang_code}'))
-        keyboard.append(row)
-
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    reply_markup = keyboard('choose_language', DEFAULT_LANGUAGE)
 
     await update.message.reply_text(
         welcome_text,
@@ -83,6 +63,7 @@ async def set_initial_language(update: Update, context: ContextTypes.DEFAULT_TYP
             db_user.language = lang_code
 
         await session.commit()
+        user_cache.update(db_user)
         logger.info(f"User {user.id} selected language: {lang_code}")
 
     # Show terms and conditions
@@ -97,13 +78,7 @@ async def show_terms(update: Update, context: ContextTypes.DEFAULT_TYPE, lang_co
     terms_text = t('terms_and_conditions', lang=lang_code)
 
     # Accept/Decline buttons
-    keyboard = [
-        [
-            InlineKeyboardButton(t('accept_terms', lang=lang_code), callback_data='terms_accept'),
-            InlineKeyboardButton(t('decline_terms', lang=lang_code), callback_data='terms_decline')
-        ]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    reply_markup = keyboard('terms', lang_code)
 
     await query.edit_message_text(
         terms_text,
@@ -122,17 +97,9 @@ async def accept_terms(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     # Mark terms as accepted in database
     from datetime import datetime
-    async with AsyncSessionLocal() as session:
-        result = await session.execute(
-            select(User).where(User.telegram_id == user.id)
-        )
-        db_user = result.scalar_one_or_none()
-
-        if db_user:
-            db_user.terms_accepted = True
-            db_user.terms_accepted_at = datetime.utcnow()
-            await session.commit()
-            logger.info(f"User {user.id} accepted terms at {datetime.utcnow()}")
+    accepted_at = datetime.utcnow()
+    if await user_cache.set_fields(user.id, terms_accepted=True, terms_accepted_at=accepted_at):
+        logger.info(f"User {user.id} accepted terms at {accepted_at}")
 
     # Show acceptance message
     acceptance_text = t('terms_accepted', lang=user_lang)
@@ -157,10 +124,7 @@ async def decline_terms(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Show decline message with option to reconsider
     decline_text = t('terms_declined_message', lang=user_lang)
 
-    keyboard = [
-        [InlineKeyboardButton(t('reconsider_terms', lang=user_lang), callback_data='terms_reconsider')]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    reply_markup = keyboard('terms_declined', user_lang)
 
     await query.edit_message_text(
         decline_text,
@@ -1,10 +1,9 @@
 """Start and main menu handlers"""
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram import Update
 from telegram.ext import ContextTypes
 from bot.utils import t
-from bot.models.database import AsyncSessionLocal
-from bot.models.user import User
-from sqlalchemy import select
+from bot.utils.keyboards import keyboard
+from bot.services.user_cache import user_cache
 from loguru import logger
 
 
@@ -14,19 +13,14 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.effective_chat.id
 
     # Check if user exists
-    async with AsyncSessionLocal() as session:
-        result = await session.execute(
-            select(User).where(User.telegram_id == user.id)
-        )
-        db_user = result.scalar_one_or_none()
-
-        if not db_user:
-            # New user - start onboarding (language selection + terms)
-            from .onboarding import choose_language
-            await choose_language(update, context)
-            return
+    profile = await user_cache.get(user.id)
+    if profile is None:
+        # New user - start onboarding (language selection + terms)
+        from .onboarding import choose_language
+        await choose_language(update, context)
+        return
 
-        user_lang = db_user.language
+    user_lang = profile.language
 
     # Existing user - show welcome and main menu
     context.user_data['language'] = user_lang
@@ -35,15 +29,7 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     welcome_text = t('welcome', lang=user_lang)
 
     # Main menu keyboard
-    keyboard = [
-        [InlineKeyboardButton(t('calculate_tax', lang=user_lang), callback_data='calculate')],
-        [InlineKeyboardButton(t('my_calculations', lang=user_lang), callback_data='history')],
-        [
-            InlineKeyboardButton(t('settings', lang=user_lang), callback_data='settings'),
-            InlineKeyboardButton(t('help', lang=user_lang), callback_data='help')
-        ]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    reply_markup = keyboard('main_menu', user_lang)
 
     await update.message.reply_text(
         welcome_text,
@@ -60,15 +46,7 @@ async def show_main_menu(query_or_update, context: ContextTypes.DEFAULT_TYPE):
     menu_text = t('main_menu', lang=user_lang)
 
     # Main menu keyboard
-    keyboard = [
-        [InlineKeyboardButton(t('calculate_tax', lang=user_lang), callback_data='calculate')],
-        [InlineKeyboardButton(t('my_calculations', lang=user_lang), callback_data='history')],
-        [
-            InlineKeyboardButton(t('settings', lang=user_lang), callback_data='settings'),
-            InlineKeyboardButton(t('help', lang=user_lang), callback_data='help')
-        ]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    reply_markup = keyboard('main_menu', user_lang)
 
     # Check if it's a CallbackQuery or Update
     if hasattr(query_or_update, 'edit_message_text'):
@@ -105,8 +83,7 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     help_text = t('help_text', lang=user_lang)
 
     # Back button
-    keyboard = [[InlineKeyboardButton(t('back', lang=user_lang), callback_data='main_menu')]]
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    reply_markup = keyboard('back_to_menu', user_lang)
 
     if query:
         await query.edit_message_text(
@@ -2,5 +2,8 @@
 from .user import User
 from .calculation import TaxCalculation
 from .tax_update import TaxUpdate
+from .persistence import ConversationState, UserData
+from .lease import WorkerLease
+from .broadcast import Broadcast
 
-__all__ = ['User', 'TaxCalculation', 'TaxUpdate']
+__all__ = ['User', 'TaxCalculation', 'TaxUpdate', 'ConversationState', 'UserData', 'WorkerLease', 'Broadcast']
@@ -0,0 +1,31 @@
+"""Broadcast model for messages sent to all users"""
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, JSON
+from .user import Base
+
+
+class Broadcast(Base):
+    """One message sent to all users, with the progress of sending it"""
+    __tablename__ = 'broadcasts'
+
+    id = Column(Integer, primary_key=True)
+    tax_update_id = Column(Integer, nullable=True, index=True)  # Approved TaxUpdate announced
+
+    # Message: translation key and its format arguments
+    message_key = Column(String(100), nullable=False)
+    params = Column(JSON, nullable=False)
+
+    # Progress (checkpointed after every batch of users)
+    status = Column(String(20), default='running', nullable=False)  # running, completed
+    last_user_id = Column(Integer, default=0, nullable=False)  # users.id of the last batch sent
+    total = Column(Integer, default=0, nullable=False)  # Recipients when the broadcast started
+    sent = Column(Integer, default=0, nullable=False)
+    blocked = Column(Integer, default=0, nullable=False)  # Users who blocked the bot
+    failed = Column(Integer, default=0, nullable=False)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    finished_at = Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<Broadcast(id={self.id}, status={self.status}, sent={self.sent}/{self.total})>"
@@ -1,6 +1,6 @@
 """Tax calculation model for storing calculation history"""
 from datetime import datetime
-from sqlalchemy import Column, Integer, Float, String, DateTime, ForeignKey, JSON, Boolean
+from sqlalchemy import Column, Integer, Float, String, DateTime, ForeignKey, JSON, Boolean, Index
 from sqlalchemy.orm import relationship
 from .user import Base
 
@@ -8,6 +8,10 @@ from .user import Base
 class TaxCalculation(Base):
     """Tax calculation history model"""
     __tablename__ = 'tax_calculations'
+    __table_args__ = (
+        # History pages: WHERE user_id = ? ORDER BY created_at DESC, id DESC
+        Index('ix_tax_calculations_user_created', 'user_id', 'created_at', 'id'),
+    )
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
@@ -35,5 +39,12 @@ class TaxCalculation(Base):
     tax_year = Column(Integer, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    @property
+    def details(self):
+        """Full result dict; compact calculation_details are restored by load_details"""
+        # Imported here: calculation_storage imports this model
+        from bot.services.calculation_storage import load_details
+        return load_details(self)
+
     def __repr__(self):
         return f"<TaxCalculation(user_id={self.user_id}, gross={self.gross_income}, net={self.net_income})>"
@@ -1,17 +1,98 @@
 """Database connection and session management"""
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.pool import NullPool
-from config import DATABASE_URL, BASE_DIR
-from .user import Base
+from typing import Optional, Tuple
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from loguru import logger
+from sqlalchemy import event, inspect
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
+from config import settings, DATABASE_URL, BASE_DIR
 import asyncio
 
 
+POOL_MODES = ('queue', 'null')
+
+# Schema created by create_all before migrations were introduced
+INITIAL_REVISION = '0001'
+
+
+def _sqlite_pragmas():
+    """PRAGMA statements run on every new SQLite connection"""
+    return (
+        f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}",
+        f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}",
+        # Negative cache_size is in KiB instead of pages
+        f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KB}",
+        f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}",
+    )
+
+
+def _postgres_connect_args():
+    """asyncpg connection arguments"""
+    return {
+        # Prepared statements cached per connection (0 behind PgBouncer in transaction mode)
+        'prepared_statement_cache_size': settings.DATABASE_STATEMENT_CACHE_SIZE,
+        'server_settings': {
+            'application_name': settings.DATABASE_APPLICATION_NAME,
+            # The bot only runs short indexed queries; JIT compilation costs more than it saves
+            'jit': 'off',
+        },
+    }
+
+
+def create_db_engine(url: str = DATABASE_URL, pool_mode: str = None) -> AsyncEngine:
+    """
+    Create the async engine
+
+    Args:
+        url: Database URL
+        pool_mode: 'queue' keeps connections (and their aiosqlite threads or
+            asyncpg prepared statements) open between sessions, 'null' opens a
+            new connection per session (default: DATABASE_POOL_MODE)
+
+    Returns:
+        Async engine
+    """
+    pool_mode = pool_mode or settings.DATABASE_POOL_MODE
+    if pool_mode not in POOL_MODES:
+        raise ValueError(f"Unknown DATABASE_POOL_MODE '{pool_mode}', expected one of {', '.join(POOL_MODES)}")
+
+    if pool_mode == 'queue':
+        options = {
+            'poolclass': AsyncAdaptedQueuePool,
+            'pool_size': settings.DATABASE_POOL_SIZE,
+            'max_overflow': settings.DATABASE_MAX_OVERFLOW,
+            'pool_timeout': settings.DATABASE_POOL_TIMEOUT,
+            'pool_recycle': settings.DATABASE_POOL_RECYCLE,
+            'pool_pre_ping': settings.DATABASE_POOL_PRE_PING,
+        }
+    else:
+        options = {'poolclass': NullPool}
+
+    if make_url(url).get_backend_name() == 'postgresql':
+        options['connect_args'] = _postgres_connect_args()
+
+    db_engine = create_async_engine(url, echo=False, **options)
+
+    if db_engine.dialect.name == 'sqlite':
+        pragmas = _sqlite_pragmas()
+
+        @event.listens_for(db_engine.sync_engine, 'connect')
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for pragma in pragmas:
+                cursor.execute(pragma)
+            cursor.close()
+
+    return db_engine
+
+
 # Create async engine
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=False,
-    poolclass=NullPool,
-)
+engine = create_db_engine()
 
 # Create session factory
 AsyncSessionLocal = async_sessionmaker(
@@ -21,10 +102,61 @@ AsyncSessionLocal = async_sessionmaker(
 )
 
 
-async def init_db():
-    """Initialize database tables"""
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+def _alembic_config(connection=None) -> Config:
+    """Alembic configuration of the migrations package, optionally bound to a connection"""
+    config = Config(str(BASE_DIR / 'alembic.ini'))
+    config.set_main_option('script_location', str(BASE_DIR / 'migrations'))
+    config.attributes['connection'] = connection
+    return config
+
+
+def _schema_state(connection) -> Tuple[Optional[str], bool]:
+    """Current schema revision and whether the tables exist already"""
+    revision = MigrationContext.configure(connection).get_current_revision()
+    if revision is not None:
+        return revision, True
+    return None, inspect(connection).has_table('users')
+
+
+def _upgrade(connection, stamp_revision: Optional[str] = None):
+    config = _alembic_config(connection)
+    if stamp_revision:
+        command.stamp(config, stamp_revision)
+    command.upgrade(config, 'head')
+
+
+async def init_db(db_engine: AsyncEngine = None):
+    """
+    Bring the database schema up to date
+
+    The fast path only reads the revision in alembic_version and compares it
+    with the newest migration. Databases created with create_all before
+    migrations existed are stamped with the initial revision first.
+
+    Args:
+        db_engine: Engine to migrate (default: the global engine)
+    """
+    db_engine = db_engine or engine
+    head = ScriptDirectory.from_config(_alembic_config()).get_current_head()
+
+    async with db_engine.connect() as conn:
+        revision, has_tables = await conn.run_sync(_schema_state)
+
+    if revision == head:
+        return
+
+    if not settings.DATABASE_MIGRATE_ON_STARTUP:
+        raise RuntimeError(
+            f"Database schema is at revision {revision}, expected {head}. Run 'alembic upgrade head'."
+        )
+
+    stamp_revision = INITIAL_REVISION if revision is None and has_tables else None
+    logger.info(
+        f"Migrating database schema from {revision or stamp_revision or 'empty database'} to {head}"
+    )
+    async with db_engine.connect() as conn:
+        await conn.run_sync(_upgrade, stamp_revision)
+        await conn.commit()
 
 
 async def get_session() -> AsyncSession:
@@ -0,0 +1,17 @@
+"""Leases that elect one worker process for a task"""
+from datetime import datetime
+from sqlalchemy import Column, String, DateTime
+from .user import Base
+
+
+class WorkerLease(Base):
+    """Current holder of a named lease"""
+    __tablename__ = 'worker_leases'
+
+    name = Column(String(100), primary_key=True)  # Task, e.g. "scheduler"
+    holder = Column(String(200), nullable=False)  # Worker, "<host>:<pid>"
+    expires_at = Column(DateTime, nullable=False)
+    acquired_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<WorkerLease(name={self.name}, holder={self.holder}, expires_at={self.expires_at})>"
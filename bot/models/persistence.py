@@ -0,0 +1,29 @@
+"""Models for the bot persistence (conversation states and user_data)"""
+from datetime import datetime
+from sqlalchemy import Column, BigInteger, Integer, String, DateTime, JSON
+from .user import Base
+
+
+class ConversationState(Base):
+    """Current state of one persistent conversation"""
+    __tablename__ = 'conversation_states'
+
+    name = Column(String(100), primary_key=True)  # ConversationHandler name
+    key = Column(String(100), primary_key=True)  # Conversation key, e.g. "[chat_id, user_id]"
+    state = Column(Integer, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<ConversationState(name={self.name}, key={self.key}, state={self.state})>"
+
+
+class UserData(Base):
+    """context.user_data of one Telegram user"""
+    __tablename__ = 'user_data'
+
+    user_id = Column(BigInteger, primary_key=True)  # Telegram user ID
+    data = Column(JSON, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<UserData(user_id={self.user_id})>"
@@ -1,6 +1,6 @@
 """User model for storing user preferences and data"""
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Boolean
+from sqlalchemy import Column, BigInteger, Integer, String, DateTime, Boolean
 from sqlalchemy.orm import declarative_base
 
 Base = declarative_base()
@@ -11,12 +11,12 @@ class User(Base):
     __tablename__ = 'users'
 
     id = Column(Integer, primary_key=True)
-    telegram_id = Column(Integer, unique=True, nullable=False, index=True)
+    telegram_id = Column(BigInteger, unique=True, nullable=False, index=True)  # Telegram IDs exceed 32 bits
     username = Column(String(255), nullable=True)
     first_name = Column(String(255), nullable=True)
     last_name = Column(String(255), nullable=True)
     language = Column(String(10), default='de', nullable=False)
-    state = Column(String(2), nullable=True)  # German state code (BW, BY, etc.)
+    state = Column(String(10), nullable=True)  # German state code (BW, BY, BE_WEST, etc.)
     is_admin = Column(Boolean, default=False)
     terms_accepted = Column(Boolean, default=False)
     terms_accepted_at = Column(DateTime, nullable=True)
@@ -0,0 +1,261 @@
+"""
+Rate Limiter
+Outbound flow control for Telegram Bot API requests
+
+Every request that targets a chat waits for a token of that chat's bucket
+(private chats about one message per second with a short burst, groups 20
+per minute) and then for a token of the global bucket (30 per second).
+Requests waiting for the global bucket are served by priority: interactive
+replies first, broadcasts and admin notifications after them. Requests to
+one chat keep their order. A RetryAfter from Telegram pauses all requests
+for the given time and the request is sent again.
+
+Requests without a chat (answerCallbackQuery, getMe, ...) are not limited.
+"""
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from typing import Any, Callable, Coroutine, Dict, List, Optional, Tuple, Union
+from loguru import logger
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+INTERACTIVE = 0
+BROADCAST = 1
+PRIORITY_NAMES = {INTERACTIVE: 'interactive', BROADCAST: 'broadcast'}
+
+# Buckets of chats idle this long are dropped
+_IDLE_SECONDS = 60
+
+
+def broadcast_kwargs(bot) -> Dict[str, Any]:
+    """Keyword arguments that queue a request behind interactive replies (none without rate limiter)"""
+    if getattr(bot, 'rate_limiter', None) is None:
+        return {}
+    return {'rate_limit_args': {'priority': BROADCAST}}
+
+
+class TokenBucket:
+    """Token bucket: `rate` tokens per second, at most `capacity` saved up"""
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self) -> float:
+        """Seconds until a token is available (0 = now)"""
+        self._refill(time.monotonic())
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class _ChatLimit:
+    """Bucket of one chat and the lock keeping its requests in order"""
+    __slots__ = ('bucket', 'lock', 'used')
+
+    def __init__(self, bucket: TokenBucket):
+        self.bucket = bucket
+        self.lock = asyncio.Lock()
+        self.used = time.monotonic()
+
+
+class PriorityRateLimiter(BaseRateLimiter[Dict[str, Any]]):
+    """Global and per-chat token buckets with priority lanes"""
+
+    def __init__(
+        self,
+        global_per_second: float = 30,
+        chat_per_second: float = 1,
+        chat_burst: int = 3,
+        group_per_minute: float = 20,
+        max_retries: int = 3,
+        wait_samples: int = 1000
+    ):
+        """
+        Args:
+            global_per_second: Requests per second over all chats
+            chat_per_second: Requests per second to one private chat
+            chat_burst: Requests a chat may receive at once after a pause
+            group_per_minute: Requests per minute to one group or channel
+            max_retries: Times a request is sent again after RetryAfter
+            wait_samples: Recent queueing delays kept per lane for get_stats()
+        """
+        self.global_per_second = global_per_second
+        self.chat_per_second = chat_per_second
+        self.chat_burst = chat_burst
+        self.group_per_minute = group_per_minute
+        self.max_retries = max_retries
+
+        self._global = TokenBucket(global_per_second, global_per_second)
+        self._chats: Dict[Union[int, str], _ChatLimit] = {}
+        # (priority, arrival, future) of requests waiting for the global bucket
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._arrivals = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._paused_until = 0.0
+
+        # Metrics per lane
+        self.requests = {priority: 0 for priority in PRIORITY_NAMES}
+        self.waiting = {priority: 0 for priority in PRIORITY_NAMES}
+        self.total_wait = {priority: 0.0 for priority in PRIORITY_NAMES}
+        self.max_wait = {priority: 0.0 for priority in PRIORITY_NAMES}
+        self._recent_waits = {priority: deque(maxlen=wait_samples) for priority in PRIORITY_NAMES}
+        self.retry_afters = 0
+        self.unlimited = 0
+
+    async def initialize(self) -> None:
+        if self._dispatcher is None:
+            self._wakeup = asyncio.Event()
+            self._dispatcher = asyncio.create_task(self._dispatch(), name='rate_limiter_dispatch')
+
+    async def shutdown(self) -> None:
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            try:
+                await self._dispatcher
+            except asyncio.CancelledError:
+                pass
+            self._dispatcher = None
+        for _, _, future in self._waiters:
+            future.cancel()
+        self._waiters.clear()
+        self._chats.clear()
+
+    async def process_request(
+        self,
+        callback: Callable[..., Coroutine[Any, Any, Union[bool, Dict[str, Any], List[Dict[str, Any]]]]],
+        args: Any,
+        kwargs: Dict[str, Any],
+        endpoint: str,
+        data: Dict[str, Any],
+        rate_limit_args: Optional[Dict[str, Any]],
+    ) -> Union[bool, Dict[str, Any], List[Dict[str, Any]]]:
+        chat_id = data.get('chat_id')
+        priority = (rate_limit_args or {}).get('priority', INTERACTIVE)
+        if priority not in PRIORITY_NAMES:
+            priority = BROADCAST
+
+        retries = 0
+        while True:
+            pause = self._paused_until - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+
+            if chat_id is None:
+                self.unlimited += 1
+            else:
+                await self._acquire(chat_id, priority)
+
+            try:
+                return await callback(*args, **kwargs)
+            except RetryAfter as e:
+                retries += 1
+                self.retry_afters += 1
+                # Telegram throttles the whole bot: hold back every request
+                self._paused_until = max(self._paused_until, time.monotonic() + e.retry_after)
+                if retries > self.max_retries:
+                    raise
+                logger.warning(f"{endpoint} hit the flood limit, retrying in {e.retry_after}s")
+
+    async def _acquire(self, chat_id: Union[int, str], priority: int):
+        """Wait for a token of the chat bucket, then for one of the global bucket"""
+        if self._dispatcher is None:
+            await self.initialize()
+
+        arrived = time.monotonic()
+        self.waiting[priority] += 1
+        chat = self._chat_limit(chat_id)
+        try:
+            # Holding the chat lock until the global token is granted keeps the chat's order
+            async with chat.lock:
+                while True:
+                    delay = chat.bucket.delay()
+                    if delay <= 0:
+                        break
+                    await asyncio.sleep(delay)
+                chat.bucket.take()
+
+                future = asyncio.get_running_loop().create_future()
+                heapq.heappush(self._waiters, (priority, next(self._arrivals), future))
+                self._wakeup.set()
+                await future
+                chat.used = time.monotonic()
+        finally:
+            self.waiting[priority] -= 1
+
+        waited = time.monotonic() - arrived
+        self.requests[priority] += 1
+        self.total_wait[priority] += waited
+        self.max_wait[priority] = max(self.max_wait[priority], waited)
+        self._recent_waits[priority].append(waited)
+
+    def _chat_limit(self, chat_id: Union[int, str]) -> _ChatLimit:
+        chat = self._chats.get(chat_id)
+        if chat is None:
+            if len(self._chats) >= 10000:
+                self._drop_idle_chats()
+            # Group and channel IDs are negative (or @usernames)
+            is_group = str(chat_id).startswith(('-', '@'))
+            if is_group:
+                bucket = TokenBucket(self.group_per_minute / 60, self.chat_burst)
+            else:
+                bucket = TokenBucket(self.chat_per_second, self.chat_burst)
+            chat = self._chats[chat_id] = _ChatLimit(bucket)
+        return chat
+
+    def _drop_idle_chats(self):
+        """Forget chats whose bucket is full again"""
+        cutoff = time.monotonic() - _IDLE_SECONDS
+        for chat_id in [key for key, chat in self._chats.items() if chat.used < cutoff and not chat.lock.locked()]:
+            del self._chats[chat_id]
+
+    async def _dispatch(self):
+        """Grant global tokens to the waiting requests, highest priority first"""
+        while True:
+            if not self._waiters:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            delay = max(self._global.delay(), self._paused_until - time.monotonic())
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                # Cancelled while waiting
+                continue
+            self._global.take()
+            future.set_result(None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth and queueing delay per lane"""
+        stats: Dict[str, Any] = {
+            'retry_afters': self.retry_afters,
+            'unlimited': self.unlimited,
+            'chats': len(self._chats),
+        }
+        for priority, name in PRIORITY_NAMES.items():
+            requests = self.requests[priority]
+            waits = sorted(self._recent_waits[priority])
+            stats[name] = {
+                'requests': requests,
+                'waiting': self.waiting[priority],
+                'avg_wait_ms': self.total_wait[priority] / requests * 1000 if requests else 0.0,
+                'p99_wait_ms': waits[min(len(waits) - 1, int(len(waits) * 0.99))] * 1000 if waits else 0.0,
+                'max_wait_ms': self.max_wait[priority] * 1000,
+            }
+        return stats
@@ -0,0 +1,312 @@
+"""
+Broadcast Service
+Sends one message to all users without blocking the bot
+
+A broadcast runs as a background task. Users are read in keyset-paginated
+batches (users.id > last checkpoint), the message is rendered once per
+language, and the messages go out through the bot's rate limiter in the
+broadcast lane, so replies to users are not delayed. Progress is written to
+the broadcasts table after every batch. A broadcast interrupted by a
+restart continues from its last checkpoint; users of the batch in flight
+may get the message twice.
+"""
+import asyncio
+import html
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from loguru import logger
+from sqlalchemy import func, select, update
+from telegram.error import Forbidden, TelegramError
+from config import settings, ADMIN_TELEGRAM_ID
+from bot.models.database import AsyncSessionLocal
+from bot.models.broadcast import Broadcast
+from bot.models.tax_update import TaxUpdate
+from bot.models.user import User
+from bot.rate_limiter import broadcast_kwargs
+from bot.utils import t
+
+TAX_UPDATE_MESSAGE = 'tax_update_broadcast'
+
+
+class BroadcastService:
+    """Run resumable broadcasts to all users"""
+
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        batch_size: int = 500,
+        concurrency: int = 30,
+        stale_minutes: float = 5
+    ):
+        """
+        Args:
+            session_factory: Async session factory
+            batch_size: Users read and checkpointed at a time
+            concurrency: Messages in flight at the same time (the rate limiter paces them)
+            stale_minutes: A running broadcast without checkpoint for this long was interrupted
+        """
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.stale_after = timedelta(minutes=stale_minutes)
+        self._tasks: Dict[int, asyncio.Task] = {}
+
+        # Metrics
+        self.broadcasts_finished = 0
+        self.messages_sent = 0
+        self.messages_blocked = 0
+        self.messages_failed = 0
+        self.last_run: Dict[str, Any] = {}
+
+    async def create(self, message_key: str, params: Dict[str, Any], tax_update_id: Optional[int] = None) -> int:
+        """
+        Record a new broadcast
+
+        Args:
+            message_key: Translation key of the message
+            params: Format arguments of the message (HTML-escaped already)
+            tax_update_id: TaxUpdate the broadcast announces
+
+        Returns:
+            Broadcast ID
+        """
+        async with self.session_factory() as session:
+            total = await session.scalar(select(func.count()).select_from(User).where(User.terms_accepted == True))
+            broadcast = Broadcast(
+                tax_update_id=tax_update_id,
+                message_key=message_key,
+                params=params,
+                status='running',
+                last_user_id=0,
+                total=total,
+                sent=0,
+                blocked=0,
+                failed=0
+            )
+            session.add(broadcast)
+            await session.commit()
+            return broadcast.id
+
+    async def announce_tax_update(self, bot, tax_update: TaxUpdate) -> int:
+        """
+        Start a broadcast about an applied tax update
+
+        Args:
+            bot: Bot sending the messages
+            tax_update: Approved tax update
+
+        Returns:
+            Broadcast ID
+        """
+        effective_date = tax_update.effective_date.strftime('%d.%m.%Y') if tax_update.effective_date else '-'
+        params = {
+            'title': html.escape(tax_update.title),
+            'effective_date': effective_date,
+            'url': html.escape(tax_update.source_url),
+        }
+        broadcast_id = await self.create(TAX_UPDATE_MESSAGE, params, tax_update.id)
+        self.start(bot, broadcast_id)
+        return broadcast_id
+
+    def start(self, bot, broadcast_id: int) -> asyncio.Task:
+        """Run a broadcast in the background"""
+        task = self._tasks.get(broadcast_id)
+        if task is None or task.done():
+            task = asyncio.create_task(self._run_task(bot, broadcast_id), name=f'broadcast_{broadcast_id}')
+            self._tasks[broadcast_id] = task
+        return task
+
+    async def _run_task(self, bot, broadcast_id: int):
+        try:
+            await self.run(bot, broadcast_id)
+        except asyncio.CancelledError:
+            logger.info(f"Broadcast {broadcast_id} interrupted, continues from its last checkpoint")
+            raise
+        except Exception as e:
+            # Stays 'running': resume_stale picks it up again
+            logger.error(f"Broadcast {broadcast_id} failed: {e}")
+        finally:
+            self._tasks.pop(broadcast_id, None)
+
+    async def resume_stale(self, bot) -> List[int]:
+        """
+        Continue broadcasts that were interrupted (scheduled job)
+
+        Args:
+            bot: Bot sending the messages
+
+        Returns:
+            IDs of the resumed broadcasts
+        """
+        cutoff = datetime.utcnow() - self.stale_after
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(Broadcast.id, Broadcast.updated_at)
+                .where(Broadcast.status == 'running', Broadcast.updated_at < cutoff)
+            )
+            stale = [(broadcast_id, updated_at) for broadcast_id, updated_at in result.all()
+                     if broadcast_id not in self._tasks]
+
+            resumed = []
+            for broadcast_id, updated_at in stale:
+                # Claim it: only one worker wins if several look at the same time
+                claim = await session.execute(
+                    update(Broadcast)
+                    .where(Broadcast.id == broadcast_id, Broadcast.updated_at == updated_at)
+                    .values(updated_at=datetime.utcnow())
+                )
+                if claim.rowcount == 1:
+                    resumed.append(broadcast_id)
+            await session.commit()
+
+        for broadcast_id in resumed:
+            logger.info(f"Resuming broadcast {broadcast_id}")
+            self.start(bot, broadcast_id)
+        return resumed
+
+    async def run(self, bot, broadcast_id: int) -> Dict[str, Any]:
+        """
+        Send a broadcast to all users after its last checkpoint
+
+        Args:
+            bot: Bot sending the messages
+            broadcast_id: Broadcast to run
+
+        Returns:
+            Metrics of this run
+        """
+        async with self.session_factory() as session:
+            broadcast = await session.get(Broadcast, broadcast_id)
+        if broadcast is None or broadcast.status != 'running':
+            return {}
+
+        started = time.perf_counter()
+        counts = {'sent': broadcast.sent, 'blocked': broadcast.blocked, 'failed': broadcast.failed}
+        run_counts = dict.fromkeys(counts, 0)
+        last_user_id = broadcast.last_user_id
+        # Rendered message per language
+        texts: Dict[str, str] = {}
+
+        while True:
+            async with self.session_factory() as session:
+                result = await session.execute(
+                    select(User.id, User.telegram_id, User.language)
+                    .where(User.terms_accepted == True, User.id > last_user_id)
+                    .order_by(User.id)
+                    .limit(self.batch_size)
+                )
+                users = result.all()
+            if not users:
+                break
+
+            for language in {language for _, _, language in users} - texts.keys():
+                texts[language] = t(broadcast.message_key, lang=language, **broadcast.params)
+
+            for outcome in await self._send_batch(bot, users, texts):
+                counts[outcome] += 1
+                run_counts[outcome] += 1
+            last_user_id = users[-1].id
+            await self._checkpoint(broadcast_id, last_user_id, counts)
+
+            elapsed = time.perf_counter() - started
+            logger.info(
+                f"Broadcast {broadcast_id}: {sum(counts.values())}/{broadcast.total} users "
+                f"({run_counts['sent'] / elapsed:.1f} messages/s)"
+            )
+
+        await self._checkpoint(broadcast_id, last_user_id, counts, finished=True)
+
+        elapsed = time.perf_counter() - started
+        self.broadcasts_finished += 1
+        self.messages_sent += run_counts['sent']
+        self.messages_blocked += run_counts['blocked']
+        self.messages_failed += run_counts['failed']
+        self.last_run = {
+            'broadcast_id': broadcast_id,
+            **counts,
+            'languages': len(texts),
+            'duration_seconds': round(elapsed, 1),
+            'messages_per_second': round(run_counts['sent'] / elapsed, 1) if elapsed else 0.0,
+        }
+        logger.info(f"Broadcast {broadcast_id} finished: {self.last_run}")
+        await self._report(bot, self.last_run)
+        return self.last_run
+
+    async def _send_batch(self, bot, users, texts: Dict[str, str]) -> List[str]:
+        """Send one batch; outcome per user: 'sent', 'blocked' or 'failed'"""
+        slots = asyncio.Semaphore(self.concurrency)
+
+        async def send(telegram_id: int, language: str) -> str:
+            async with slots:
+                try:
+                    await bot.send_message(
+                        chat_id=telegram_id,
+                        text=texts[language],
+                        parse_mode='HTML',
+                        disable_web_page_preview=True,
+                        **broadcast_kwargs(bot)
+                    )
+                    return 'sent'
+                except Forbidden:
+                    return 'blocked'
+                except TelegramError as e:
+                    logger.debug(f"Broadcast message to {telegram_id} failed: {e}")
+                    return 'failed'
+
+        return await asyncio.gather(*(send(telegram_id, language) for _, telegram_id, language in users))
+
+    async def _checkpoint(self, broadcast_id: int, last_user_id: int, counts: Dict[str, int], finished: bool = False):
+        now = datetime.utcnow()
+        values = {'last_user_id': last_user_id, 'updated_at': now, **counts}
+        if finished:
+            values.update(status='completed', finished_at=now)
+        async with self.session_factory() as session:
+            await session.execute(update(Broadcast).where(Broadcast.id == broadcast_id).values(**values))
+            await session.commit()
+
+    async def _report(self, bot, run: Dict[str, Any]):
+        """Tell the admin how the broadcast went"""
+        async with self.session_factory() as session:
+            language = await session.scalar(select(User.language).where(User.telegram_id == ADMIN_TELEGRAM_ID))
+        try:
+            await bot.send_message(
+                chat_id=ADMIN_TELEGRAM_ID,
+                text=t(
+                    'broadcast_finished',
+                    lang=language or 'de',
+                    sent=run['sent'],
+                    blocked=run['blocked'],
+                    failed=run['failed'],
+                    rate=run['messages_per_second']
+                ),
+                **broadcast_kwargs(bot)
+            )
+        except TelegramError as e:
+            logger.warning(f"Could not report broadcast to admin: {e}")
+
+    async def stop(self):
+        """Interrupt running broadcasts (they resume from their checkpoint)"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Broadcast statistics"""
+        return {
+            'running': len(self._tasks),
+            'broadcasts_finished': self.broadcasts_finished,
+            'messages_sent': self.messages_sent,
+            'messages_blocked': self.messages_blocked,
+            'messages_failed': self.messages_failed,
+            'last_run': self.last_run,
+        }
+
+
+# Global broadcast service
+broadcast_service = BroadcastService(
+    batch_size=settings.BROADCAST_BATCH_SIZE,
+    concurrency=settings.BROADCAST_CONCURRENCY,
+    stale_minutes=settings.BROADCAST_STALE_MINUTES
+)
@@ -0,0 +1,123 @@
+"""
+Calculation Result
+Compact, immutable result type of GermanTaxCalculator.calculate_net_income
+"""
+from collections.abc import Mapping
+from operator import attrgetter
+from typing import Any, Dict, Iterator
+
+# Field names in result order
+FIELDS = (
+    'gross_annual',
+    'income_tax',
+    'solidarity_surcharge',
+    'church_tax',
+    'health_insurance',
+    'pension_insurance',
+    'unemployment_insurance',
+    'care_insurance',
+    'total_deductions',
+    'net_annual',
+    'gross_monthly',
+    'net_monthly',
+    'tax_class',
+    'children',
+    'kinderfreibetrag',
+    'employment_type',
+    'age_group',
+    'health_insurance_company',
+    'year',
+)
+
+_FIELD_SET = frozenset(FIELDS)
+_values = attrgetter(*FIELDS)
+_set = object.__setattr__
+
+
+class NetIncomeResult(Mapping):
+    """
+    Net income breakdown of one calculation
+
+    A slotted object instead of a per-result dict: smaller, and immutable,
+    so one instance can be shared between the calculation cache and all
+    callers. Values are read as attributes (result.net_annual) or, like the
+    former result dict, as a read-only mapping: result['net_annual'], 'key'
+    in result, iteration over the keys, .get(), .items(), dict(result), and
+    equality with a dict of the same items. It is not a dict subclass, so
+    json.dumps() needs to_dict().
+    """
+
+    __slots__ = FIELDS
+
+    def __init__(
+        self,
+        gross_annual: float,
+        income_tax: float,
+        solidarity_surcharge: float,
+        church_tax: float,
+        health_insurance: float,
+        pension_insurance: float,
+        unemployment_insurance: float,
+        care_insurance: float,
+        total_deductions: float,
+        net_annual: float,
+        gross_monthly: float,
+        net_monthly: float,
+        tax_class: int,
+        children: int,
+        kinderfreibetrag: float,
+        employment_type: str,
+        age_group: str,
+        health_insurance_company: str,
+        year: int
+    ):
+        _set(self, 'gross_annual', gross_annual)
+        _set(self, 'income_tax', income_tax)
+        _set(self, 'solidarity_surcharge', solidarity_surcharge)
+        _set(self, 'church_tax', church_tax)
+        _set(self, 'health_insurance', health_insurance)
+        _set(self, 'pension_insurance', pension_insurance)
+        _set(self, 'unemployment_insurance', unemployment_insurance)
+        _set(self, 'care_insurance', care_insurance)
+        _set(self, 'total_deductions', total_deductions)
+        _set(self, 'net_annual', net_annual)
+        _set(self, 'gross_monthly', gross_monthly)
+        _set(self, 'net_monthly', net_monthly)
+        _set(self, 'tax_class', tax_class)
+        _set(self, 'children', children)
+        _set(self, 'kinderfreibetrag', kinderfreibetrag)
+        _set(self, 'employment_type', employment_type)
+        _set(self, 'age_group', age_group)
+        _set(self, 'health_insurance_company', health_insurance_company)
+        _set(self, 'year', year)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in _FIELD_SET:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key) -> bool:
+        return key in _FIELD_SET
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(FIELDS)
+
+    def __len__(self) -> int:
+        return len(FIELDS)
+
+    def __reduce__(self):
+        return type(self), _values(self)
+
+    def __repr__(self) -> str:
+        values = ', '.join(f"{name}={value!r}" for name, value in zip(FIELDS, _values(self)))
+        return f"{type(self).__name__}({values})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Result as a new plain dict (former return value of calculate_net_income)"""
+        return dict(zip(FIELDS, _values(self)))
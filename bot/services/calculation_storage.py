@@ -0,0 +1,226 @@
+"""
+Calculation Storage
+How calculation results are stored in TaxCalculation.calculation_details
+
+'full' stores the complete result dict, although all amounts are already in
+typed columns. 'compact' stores only the inputs that have no column plus the
+tariff version; the full breakdown is recomputed by the engine when it is
+read (load_details).
+"""
+import asyncio
+from typing import Any, Dict, Optional
+from loguru import logger
+from sqlalchemy import select, update
+from config import settings
+from bot.models.database import AsyncSessionLocal
+from bot.models.calculation import TaxCalculation
+from .calculation_result import NetIncomeResult
+from .tax_calculator import GermanTaxCalculator, tax_calculator
+
+
+STORAGE_MODES = ('full', 'compact')
+
+# Inputs of calculate_net_income without a TaxCalculation column
+COMPACT_INPUTS = ('kinderfreibetrag', 'employment_type', 'age_group', 'health_insurance_company')
+
+# Result fields and the columns holding them
+RESULT_COLUMNS = {
+    'gross_annual': 'gross_income',
+    'income_tax': 'income_tax',
+    'solidarity_surcharge': 'solidarity_surcharge',
+    'church_tax': 'church_tax_amount',
+    'health_insurance': 'health_insurance',
+    'pension_insurance': 'pension_insurance',
+    'unemployment_insurance': 'unemployment_insurance',
+    'care_insurance': 'care_insurance',
+    'total_deductions': 'total_deductions',
+    'net_annual': 'net_income',
+}
+
+# Calculators of other tax years than the global one, created on demand
+_calculators: Dict[int, GermanTaxCalculator] = {}
+
+
+def _calculator_for(year: int) -> GermanTaxCalculator:
+    if year == tax_calculator.year:
+        return tax_calculator
+    if year not in _calculators:
+        _calculators[year] = GermanTaxCalculator(year=year)
+    return _calculators[year]
+
+
+def is_compact(details: Optional[Dict[str, Any]]) -> bool:
+    """Whether stored details are in compact form"""
+    return bool(details) and 'net_annual' not in details
+
+
+def details_for_storage(
+    result: NetIncomeResult,
+    annual_gross: float,
+    tariff_version: str,
+    mode: str = settings.CALCULATION_STORAGE_MODE
+) -> Dict[str, Any]:
+    """
+    Value of calculation_details for a new calculation
+
+    Args:
+        result: Calculation result
+        annual_gross: Gross income the calculation was run with
+        tariff_version: Version of the tariff used
+        mode: 'full' or 'compact'
+
+    Returns:
+        Details to store
+    """
+    if mode == 'full':
+        return result.to_dict()
+
+    details = {name: result[name] for name in COMPACT_INPUTS}
+    details['year'] = result.year
+    details['tariff_version'] = tariff_version
+
+    # The gross_income column is rounded; keep the exact input if it differs
+    if annual_gross != result.gross_annual:
+        details['annual_gross'] = annual_gross
+    return details
+
+
+def _recompute(calc: TaxCalculation, details: Dict[str, Any], calculator: GermanTaxCalculator) -> NetIncomeResult:
+    return calculator.calculate_net_income(
+        annual_gross=details.get('annual_gross', calc.gross_income),
+        tax_class=calc.tax_class,
+        children=calc.children or 0,
+        kinderfreibetrag=details['kinderfreibetrag'],
+        church_tax=bool(calc.church_tax),
+        state=calc.state or 'BE_WEST',
+        employment_type=details['employment_type'],
+        age_group=details['age_group'],
+        health_insurance_company=details['health_insurance_company']
+    )
+
+
+def _matches_columns(result: NetIncomeResult, calc: TaxCalculation) -> bool:
+    return all(result[field] == getattr(calc, column) for field, column in RESULT_COLUMNS.items())
+
+
+def load_details(calc: TaxCalculation) -> Optional[Dict[str, Any]]:
+    """
+    Full result dict of a stored calculation
+
+    Compact rows are recomputed with the tariff they were calculated with.
+    If that tariff has changed since, the amounts are taken from the typed
+    columns instead, so stored results are never silently re-priced.
+
+    Args:
+        calc: Stored calculation
+
+    Returns:
+        Result dict as returned by NetIncomeResult.to_dict(), or None if no
+        details were stored
+    """
+    details = calc.calculation_details
+    if not is_compact(details):
+        return details
+
+    calculator = _calculator_for(details['year'])
+    if calculator.tariff.version == details['tariff_version']:
+        return _recompute(calc, details, calculator).to_dict()
+
+    values = {field: getattr(calc, column) for field, column in RESULT_COLUMNS.items()}
+    gross = details.get('annual_gross', calc.gross_income)
+    return {
+        **values,
+        'gross_monthly': round(gross / 12, 2),
+        'net_monthly': round(calc.net_income / 12, 2),
+        'tax_class': calc.tax_class,
+        'children': calc.children,
+        **{name: details[name] for name in COMPACT_INPUTS},
+        'year': details['year'],
+    }
+
+
+def compact_details(calc) -> Optional[Dict[str, Any]]:
+    """
+    Compact form of the full details of a stored calculation
+
+    Args:
+        calc: Stored calculation (TaxCalculation or a row with its columns)
+
+    Returns:
+        Compact details, or None if the row is already compact or the current
+        tariff of its year does not reproduce the stored amounts exactly
+    """
+    details = calc.calculation_details
+    if not details or is_compact(details):
+        return None
+
+    try:
+        calculator = _calculator_for(details['year'])
+        compact = {name: details[name] for name in COMPACT_INPUTS}
+        compact['year'] = details['year']
+        compact['tariff_version'] = calculator.tariff.version
+        if _matches_columns(_recompute(calc, compact, calculator), calc):
+            return compact
+    except (KeyError, ValueError):
+        # Details of an older format or an unsupported year
+        pass
+    return None
+
+
+async def compact_stored_details(session_factory=AsyncSessionLocal, batch_size: int = 1000) -> Dict[str, int]:
+    """
+    Rewrite full calculation_details of existing rows in compact form
+
+    Rows are processed in id order in batches, each in its own transaction.
+    A row is only compacted if the current tariff of its year reproduces the
+    stored amounts exactly, so the details can always be restored.
+
+    Args:
+        session_factory: Async session factory
+        batch_size: Rows per transaction
+
+    Returns:
+        Number of rows scanned, compacted and kept in full form
+    """
+    stats = {'scanned': 0, 'compacted': 0, 'kept': 0}
+    last_id = 0
+
+    while True:
+        async with session_factory() as session:
+            result = await session.execute(
+                select(TaxCalculation)
+                .where(TaxCalculation.id > last_id)
+                .order_by(TaxCalculation.id)
+                .limit(batch_size)
+            )
+            rows = result.scalars().all()
+            if not rows:
+                break
+
+            updates = []
+            for calc in rows:
+                if not calc.calculation_details or is_compact(calc.calculation_details):
+                    continue
+
+                compact = compact_details(calc)
+                if compact is not None:
+                    updates.append({'id': calc.id, 'calculation_details': compact})
+                else:
+                    stats['kept'] += 1
+
+            if updates:
+                await session.execute(update(TaxCalculation), updates)
+                await session.commit()
+
+        stats['scanned'] += len(rows)
+        stats['compacted'] += len(updates)
+        last_id = rows[-1].id
+
+        # Let handlers in between the batches
+        await asyncio.sleep(0)
+
+    logger.info(
+        f"Compacted {stats['compacted']} of {stats['scanned']} stored calculations "
+        f"({stats['kept']} kept in full form)"
+    )
+    return stats
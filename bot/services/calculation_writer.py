@@ -0,0 +1,224 @@
+"""
+Calculation Writer
+Write-behind queue for TaxCalculation inserts
+
+Handlers submit finished calculations and reply to the user right away.
+A background task collects the records and inserts them with one
+multi-row INSERT per batch (every CALCULATION_WRITE_BATCH_SIZE records or
+CALCULATION_WRITE_INTERVAL_MS milliseconds, whichever comes first). A batch
+that fails with a database error (e.g. 'database is locked') is retried
+with exponential backoff before its records are given up.
+"""
+import asyncio
+import time
+from contextlib import suppress
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from loguru import logger
+from sqlalchemy import insert, select
+from sqlalchemy.exc import DBAPIError
+from config import settings
+from bot.models.database import AsyncSessionLocal
+from bot.models.user import User
+from bot.models.calculation import TaxCalculation
+
+
+class CalculationWriter:
+    """Batch TaxCalculation inserts in the background"""
+
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        batch_size: int = 100,
+        flush_interval_ms: float = 200,
+        max_queue_size: int = 10000,
+        max_retries: int = 5,
+        retry_delay_ms: float = 100
+    ):
+        """
+        Args:
+            session_factory: Async session factory
+            batch_size: Maximum records per INSERT transaction
+            flush_interval_ms: Maximum time a record waits for its batch
+            max_queue_size: Queued records before submit() waits (backpressure)
+            max_retries: Retries of a batch after a database error
+            retry_delay_ms: Delay before the first retry (doubled for each further one)
+        """
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_queue_size = max_queue_size
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # Counters
+        self.submitted = 0
+        self.written = 0
+        self.skipped = 0
+        self.failed = 0
+        self.retries = 0
+        self.batches = 0
+        self.max_depth = 0
+        self.backpressure_waits = 0
+        self.backpressure_wait_seconds = 0.0
+        self.last_flush_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    async def start(self):
+        """Start the background flush task"""
+        if self._task is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._task = asyncio.create_task(self._run(), name='calculation_writer')
+        logger.info(
+            f"Calculation write-behind enabled (batches of {self.batch_size}, "
+            f"every {self.flush_interval * 1000:.0f} ms, queue {self.max_queue_size})"
+        )
+
+    async def stop(self):
+        """Write all queued records and stop the background task"""
+        if self._task is None:
+            return
+
+        await self._queue.join()
+        self._task.cancel()
+        with suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+        logger.info(f"Calculation writer stopped ({self.written} records written, {self.failed} failed)")
+
+    async def submit(self, telegram_id: int, values: Dict[str, Any]):
+        """
+        Queue a calculation for insertion
+
+        Args:
+            telegram_id: Telegram ID of the user the calculation belongs to
+            values: TaxCalculation column values (without user_id)
+        """
+        # Keep the time of the calculation, not of the flush
+        values.setdefault('created_at', datetime.utcnow())
+        item = (telegram_id, values)
+        self.submitted += 1
+
+        if self._task is None:
+            # Not started (or disabled): write synchronously
+            await self._write_batch([item])
+            return
+
+        if self._queue.full():
+            self.backpressure_waits += 1
+            started = time.perf_counter()
+            await self._queue.put(item)
+            self.backpressure_wait_seconds += time.perf_counter() - started
+        else:
+            self._queue.put_nowait(item)
+
+        self.max_depth = max(self.max_depth, self._queue.qsize())
+
+    async def _run(self):
+        """Collect queued records into batches and write them"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.flush_interval
+
+            while len(batch) < self.batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                await self._write_batch(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _write_batch(self, batch: List[Tuple[int, Dict[str, Any]]]):
+        """Insert a batch of records, retrying after database errors"""
+        started = time.perf_counter()
+        attempt = 0
+        try:
+            while True:
+                try:
+                    written = await self._insert(batch)
+                    break
+                except DBAPIError as e:
+                    if attempt >= self.max_retries:
+                        raise
+                    delay = self.retry_delay * 2 ** attempt
+                    attempt += 1
+                    self.retries += 1
+                    logger.warning(
+                        f"Writing {len(batch)} calculations failed ({e}), "
+                        f"retry {attempt}/{self.max_retries} in {delay * 1000:.0f} ms"
+                    )
+                    await asyncio.sleep(delay)
+
+            self.written += written
+            # Users that do not exist (any more) - same as the former direct insert
+            self.skipped += len(batch) - written
+            self.batches += 1
+        except Exception as e:
+            self.failed += len(batch)
+            logger.error(f"Failed to write {len(batch)} calculations after {attempt + 1} attempts: {e}")
+        finally:
+            self.last_flush_ms = (time.perf_counter() - started) * 1000
+
+    async def _insert(self, batch: List[Tuple[int, Dict[str, Any]]]) -> int:
+        """Insert a batch of records in one transaction, returns the number of rows written"""
+        async with self.session_factory() as session:
+            # Resolve all users of the batch with one query
+            telegram_ids = {telegram_id for telegram_id, _ in batch}
+            result = await session.execute(
+                select(User.telegram_id, User.id).where(User.telegram_id.in_(telegram_ids))
+            )
+            user_ids = dict(result.all())
+
+            rows = [
+                {**values, 'user_id': user_ids[telegram_id]}
+                for telegram_id, values in batch
+                if telegram_id in user_ids
+            ]
+            if rows:
+                await session.execute(insert(TaxCalculation), rows)
+                await session.commit()
+        return len(rows)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Writer statistics"""
+        return {
+            'running': self.running,
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+            'max_depth': self.max_depth,
+            'submitted': self.submitted,
+            'written': self.written,
+            'skipped': self.skipped,
+            'failed': self.failed,
+            'retries': self.retries,
+            'batches': self.batches,
+            'avg_batch_size': self.written / self.batches if self.batches else 0.0,
+            'last_flush_ms': self.last_flush_ms,
+            'backpressure_waits': self.backpressure_waits,
+            'backpressure_wait_seconds': self.backpressure_wait_seconds,
+        }
+
+
+# Global writer instance
+calculation_writer = CalculationWriter(
+    batch_size=settings.CALCULATION_WRITE_BATCH_SIZE,
+    flush_interval_ms=settings.CALCULATION_WRITE_INTERVAL_MS,
+    max_queue_size=settings.CALCULATION_WRITE_QUEUE_SIZE,
+    max_retries=settings.CALCULATION_WRITE_RETRIES
+)
@@ -0,0 +1,275 @@
+"""
+History Retention Service
+Enforces MAX_CALCULATION_HISTORY by pruning the oldest calculations per user
+
+Runs as a scheduled job. Rows beyond the per-user cap are deleted in small
+chunks, each in its own short transaction, so the bot keeps writing while
+the job runs. Pruned rows can be archived to gzip-compressed JSONL files
+first. On SQLite the freed pages are returned to the file system afterwards.
+
+The job never converts a database to incremental auto_vacuum itself: that
+takes a full VACUUM, which locks the database and needs about twice its
+size on disk. Run enable_incremental_vacuum() once (enable_incremental_vacuum.py)
+while the bot is stopped.
+"""
+import asyncio
+import gzip
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from loguru import logger
+from sqlalchemy import and_, delete, func, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from config import settings, BASE_DIR
+from bot.models.database import AsyncSessionLocal, engine as default_engine
+from bot.models.calculation import TaxCalculation
+
+
+VACUUM_MODES = ('incremental', 'full', 'off')
+
+
+class HistoryRetention:
+    """Prune calculation history beyond the per-user cap"""
+
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        engine: AsyncEngine = default_engine,
+        max_per_user: int = 50,
+        chunk_size: int = 500,
+        archive_dir: Optional[Path] = None,
+        vacuum_mode: str = 'incremental'
+    ):
+        """
+        Args:
+            session_factory: Async session factory
+            engine: Engine of the session factory (used for VACUUM)
+            max_per_user: Calculations kept per user (0 = keep all)
+            chunk_size: Rows deleted per transaction
+            archive_dir: Directory for archives of pruned rows (None = no archive)
+            vacuum_mode: SQLite space reclaim: 'incremental', 'full' or 'off'
+        """
+        if vacuum_mode not in VACUUM_MODES:
+            raise ValueError(f"Unknown vacuum mode '{vacuum_mode}', expected one of {', '.join(VACUUM_MODES)}")
+
+        self.session_factory = session_factory
+        self.engine = engine
+        self.max_per_user = max_per_user
+        self.chunk_size = chunk_size
+        self.archive_dir = Path(archive_dir) if archive_dir else None
+        self.vacuum_mode = vacuum_mode
+        self._lock = asyncio.Lock()
+        self._vacuum_hint_logged = False
+
+        # Metrics
+        self.runs = 0
+        self.total_rows_pruned = 0
+        self.total_bytes_reclaimed = 0
+        self.last_run: Dict[str, Any] = {}
+
+    async def run(self) -> Dict[str, Any]:
+        """
+        Prune all users over the cap
+
+        Returns:
+            Metrics of this run
+        """
+        if self.max_per_user <= 0:
+            return {}
+
+        if self._lock.locked():
+            logger.info("History retention is already running, skipping")
+            return {}
+
+        async with self._lock:
+            started = time.perf_counter()
+            archive_path = self._archive_path() if self.archive_dir else None
+
+            users = await self._users_over_cap()
+            rows_pruned = 0
+            for user_id in users:
+                rows_pruned += await self._prune_user(user_id, archive_path)
+
+            bytes_reclaimed = await self._reclaim_space() if rows_pruned else 0
+
+            self.runs += 1
+            self.total_rows_pruned += rows_pruned
+            self.total_bytes_reclaimed += bytes_reclaimed
+            self.last_run = {
+                'finished_at': datetime.utcnow().isoformat(timespec='seconds'),
+                'users': len(users),
+                'rows_pruned': rows_pruned,
+                'bytes_reclaimed': bytes_reclaimed,
+                'archive': str(archive_path) if archive_path and rows_pruned else None,
+                'duration_seconds': round(time.perf_counter() - started, 3),
+            }
+
+            if rows_pruned:
+                logger.info(
+                    f"History retention pruned {rows_pruned} calculations of {len(users)} users, "
+                    f"reclaimed {bytes_reclaimed / 1024:.0f} KiB in {self.last_run['duration_seconds']}s"
+                )
+            return self.last_run
+
+    async def _users_over_cap(self) -> List[int]:
+        """IDs of users with more calculations than the cap"""
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(TaxCalculation.user_id)
+                .group_by(TaxCalculation.user_id)
+                .having(func.count() > self.max_per_user)
+            )
+            return list(result.scalars().all())
+
+    async def _prune_user(self, user_id: int, archive_path: Optional[Path]) -> int:
+        """Delete the calculations of one user beyond the cap, chunk by chunk"""
+        async with self.session_factory() as session:
+            # Oldest calculation that is kept (index range scan)
+            result = await session.execute(
+                select(TaxCalculation.created_at, TaxCalculation.id)
+                .where(TaxCalculation.user_id == user_id)
+                .order_by(TaxCalculation.created_at.desc(), TaxCalculation.id.desc())
+                .offset(self.max_per_user - 1)
+                .limit(1)
+            )
+            boundary = result.one_or_none()
+
+        if boundary is None:
+            return 0
+
+        created_at, calc_id = boundary
+        older = and_(
+            TaxCalculation.user_id == user_id,
+            or_(
+                TaxCalculation.created_at < created_at,
+                and_(TaxCalculation.created_at == created_at, TaxCalculation.id < calc_id)
+            )
+        )
+
+        pruned = 0
+        while True:
+            async with self.session_factory() as session:
+                result = await session.execute(
+                    select(TaxCalculation).where(older).order_by(TaxCalculation.id).limit(self.chunk_size)
+                )
+                rows = result.scalars().all()
+                if not rows:
+                    return pruned
+
+                if archive_path is not None:
+                    await asyncio.to_thread(self._archive_rows, archive_path, [self._row_to_dict(row) for row in rows])
+
+                await session.execute(
+                    delete(TaxCalculation).where(TaxCalculation.id.in_([row.id for row in rows]))
+                )
+                await session.commit()
+
+            pruned += len(rows)
+
+            # Let handlers in between the chunks
+            await asyncio.sleep(0)
+
+    async def _reclaim_space(self) -> int:
+        """Return freed pages to the file system (SQLite only), returns bytes reclaimed"""
+        if self.vacuum_mode == 'off' or self.engine.dialect.name != 'sqlite':
+            return 0
+
+        # VACUUM cannot run inside a transaction
+        async with self.engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level='AUTOCOMMIT')
+            size_before = await self._database_size(conn)
+
+            if self.vacuum_mode == 'incremental':
+                auto_vacuum = (await conn.execute(text("PRAGMA auto_vacuum"))).scalar()
+                if auto_vacuum != 2:
+                    if not self._vacuum_hint_logged:
+                        self._vacuum_hint_logged = True
+                        logger.info(
+                            "SQLite auto_vacuum is not INCREMENTAL, freed pages stay in the database file. "
+                            "Stop the bot and run 'python enable_incremental_vacuum.py' once to enable it"
+                        )
+                    return 0
+
+                # incremental_vacuum frees one page per step and the sqlite3
+                # module steps a statement once; executescript runs it to the end
+                raw_connection = await conn.get_raw_connection()
+                await raw_connection.driver_connection.executescript("PRAGMA incremental_vacuum;")
+            else:
+                await conn.execute(text("VACUUM"))
+
+            return max(0, size_before - await self._database_size(conn))
+
+    async def enable_incremental_vacuum(self) -> bool:
+        """
+        Switch the SQLite database to incremental auto_vacuum
+
+        Takes one full VACUUM: the database is locked while it runs and needs
+        up to twice its size in free disk space. Run it while the bot is stopped.
+
+        Returns:
+            True if the database was converted, False if it already was
+            incremental or is not SQLite
+        """
+        if self.engine.dialect.name != 'sqlite':
+            return False
+
+        async with self.engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level='AUTOCOMMIT')
+            if (await conn.execute(text("PRAGMA auto_vacuum"))).scalar() == 2:
+                return False
+
+            started = time.perf_counter()
+            size_before = await self._database_size(conn)
+            await conn.execute(text("PRAGMA auto_vacuum=INCREMENTAL"))
+            await conn.execute(text("VACUUM"))
+            size_after = await self._database_size(conn)
+
+        logger.info(
+            f"Enabled SQLite incremental auto_vacuum in {time.perf_counter() - started:.1f}s "
+            f"({size_before / 1024:.0f} KiB -> {size_after / 1024:.0f} KiB)"
+        )
+        return True
+
+    @staticmethod
+    async def _database_size(conn) -> int:
+        page_count = (await conn.execute(text("PRAGMA page_count"))).scalar()
+        page_size = (await conn.execute(text("PRAGMA page_size"))).scalar()
+        return page_count * page_size
+
+    def _archive_path(self) -> Path:
+        return self.archive_dir / f"tax_calculations_{datetime.utcnow():%Y%m%d_%H%M%S}.jsonl.gz"
+
+    @staticmethod
+    def _row_to_dict(row: TaxCalculation) -> Dict[str, Any]:
+        values = {column.name: getattr(row, column.name) for column in TaxCalculation.__table__.columns}
+        values['created_at'] = row.created_at.isoformat() if row.created_at else None
+        return values
+
+    @staticmethod
+    def _archive_rows(path: Path, rows: List[Dict[str, Any]]):
+        """Append rows to a gzip JSONL archive (runs in a worker thread)"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with gzip.open(path, 'at', encoding='utf-8') as f:
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False))
+                f.write('\n')
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retention statistics"""
+        return {
+            'runs': self.runs,
+            'total_rows_pruned': self.total_rows_pruned,
+            'total_bytes_reclaimed': self.total_bytes_reclaimed,
+            'last_run': self.last_run,
+        }
+
+
+# Global retention job instance
+history_retention = HistoryRetention(
+    max_per_user=settings.MAX_CALCULATION_HISTORY,
+    chunk_size=settings.HISTORY_RETENTION_CHUNK_SIZE,
+    archive_dir=BASE_DIR / settings.HISTORY_ARCHIVE_DIR if settings.HISTORY_ARCHIVE_ENABLED else None,
+    vacuum_mode=settings.HISTORY_VACUUM_MODE
+)
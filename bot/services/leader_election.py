@@ -0,0 +1,162 @@
+"""
+Leader Election
+Database lease that elects one worker process for the scheduled jobs
+
+With several worker processes every worker schedules the jobs, but only the
+current holder of the lease runs them. The holder renews the lease every
+third of its duration; when it stops (or dies) another worker takes over
+once the lease has expired. The database is the only shared component, so
+this works for workers on several hosts as long as their clocks agree.
+"""
+import functools
+import os
+import socket
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional
+from loguru import logger
+from sqlalchemy import insert, or_, update
+from sqlalchemy.exc import IntegrityError
+from config import settings
+from bot.models.database import AsyncSessionLocal
+from bot.models.lease import WorkerLease
+
+
+def default_holder() -> str:
+    """Lease holder name of this process"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class LeaderLease:
+    """Named lease held by at most one worker at a time"""
+
+    def __init__(
+        self,
+        name: str,
+        holder: Optional[str] = None,
+        ttl_seconds: float = 30,
+        session_factory=AsyncSessionLocal
+    ):
+        """
+        Args:
+            name: Lease name
+            holder: Name of this worker (default: <host>:<pid>)
+            ttl_seconds: Seconds the lease stays valid without renewal
+            session_factory: Async session factory
+        """
+        self.name = name
+        self.holder = holder or default_holder()
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.session_factory = session_factory
+        # Monotonic time until which this worker may act as leader
+        self._valid_until = 0.0
+
+        # Metrics
+        self.renewals = 0
+        self.acquisitions = 0
+        self.failures = 0
+        self.skipped_jobs = 0
+
+    @property
+    def renew_interval(self) -> float:
+        """Seconds between two renewals"""
+        return self.ttl.total_seconds() / 3
+
+    @property
+    def is_leader(self) -> bool:
+        return time.monotonic() < self._valid_until
+
+    async def renew(self) -> bool:
+        """
+        Acquire the lease, or extend it if this worker holds it already
+
+        Returns:
+            True if this worker is the leader now
+        """
+        # Measured before the query: the local validity never outlasts the stored one
+        started = time.monotonic()
+        now = datetime.utcnow()
+        values = {'holder': self.holder, 'expires_at': now + self.ttl}
+        was_leader = self.is_leader
+
+        try:
+            async with self.session_factory() as session:
+                result = await session.execute(
+                    update(WorkerLease)
+                    .where(
+                        WorkerLease.name == self.name,
+                        or_(WorkerLease.holder == self.holder, WorkerLease.expires_at < now)
+                    )
+                    .values(**values)
+                )
+                acquired = result.rowcount == 1
+                if not acquired:
+                    try:
+                        await session.execute(insert(WorkerLease).values(name=self.name, acquired_at=now, **values))
+                        acquired = True
+                    except IntegrityError:
+                        # Held by another worker
+                        await session.rollback()
+                await session.commit()
+        except Exception as e:
+            # Keep the lease until it runs out: nobody else can take it before
+            self.failures += 1
+            logger.warning(f"Could not renew lease '{self.name}': {e}")
+            return self.is_leader
+
+        if not acquired:
+            if was_leader:
+                logger.warning(f"Lost lease '{self.name}'")
+            self._valid_until = 0.0
+            return False
+
+        self._valid_until = started + self.ttl.total_seconds()
+        self.renewals += 1
+        if not was_leader:
+            self.acquisitions += 1
+            logger.info(f"Acquired lease '{self.name}' as {self.holder}")
+        return True
+
+    async def release(self):
+        """Give up the lease so another worker can take over right away"""
+        if not self.is_leader:
+            return
+        self._valid_until = 0.0
+        try:
+            async with self.session_factory() as session:
+                await session.execute(
+                    update(WorkerLease)
+                    .where(WorkerLease.name == self.name, WorkerLease.holder == self.holder)
+                    .values(expires_at=datetime.utcnow())
+                )
+                await session.commit()
+            logger.info(f"Released lease '{self.name}'")
+        except Exception as e:
+            logger.warning(f"Could not release lease '{self.name}': {e}")
+
+    def leader_only(self, job: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        """Wrap a scheduled job so it only runs on the leader"""
+        @functools.wraps(job)
+        async def run_if_leader(*args, **kwargs):
+            if not self.is_leader:
+                self.skipped_jobs += 1
+                return None
+            return await job(*args, **kwargs)
+
+        return run_if_leader
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Lease statistics"""
+        return {
+            'name': self.name,
+            'holder': self.holder,
+            'is_leader': self.is_leader,
+            'renewals': self.renewals,
+            'acquisitions': self.acquisitions,
+            'failures': self.failures,
+            'skipped_jobs': self.skipped_jobs,
+        }
+
+
+# Global lease of the scheduled jobs
+scheduler_lease = LeaderLease('scheduler', ttl_seconds=settings.LEADER_LEASE_SECONDS)
@@ -0,0 +1,265 @@
+"""
+Bot Persistence
+Database-backed persistence for conversation states and user_data
+
+The Application hands changed user_data and conversation states to the
+persistence every PERSISTENCE_UPDATE_INTERVAL_SECONDS. All changes of one
+such run are coalesced into a single transaction (one DELETE and one
+multi-row INSERT per table) instead of one write per update. On start only
+entries changed within PERSISTENCE_MAX_AGE_HOURS are loaded; older ones are
+deleted.
+"""
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple, Union
+from loguru import logger
+from sqlalchemy import delete, insert, select
+from telegram.ext import BasePersistence, PersistenceInput
+from config import settings
+from bot.models.database import AsyncSessionLocal
+from bot.models.persistence import ConversationState, UserData
+
+ConversationKey = Tuple[Union[int, str], ...]
+ConversationDict = Dict[ConversationKey, object]
+
+# Rows per DELETE ... IN statement
+_CHUNK_SIZE = 500
+
+
+def _chunks(items: List[Any]):
+    for start in range(0, len(items), _CHUNK_SIZE):
+        yield items[start:start + _CHUNK_SIZE]
+
+
+class SQLPersistence(BasePersistence):
+    """Store conversation states and user_data in the bot database"""
+
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        update_interval: float = 5,
+        max_age_hours: float = 24
+    ):
+        """
+        Args:
+            session_factory: Async session factory
+            update_interval: Seconds between two flushes (upper bound for lost changes on a crash)
+            max_age_hours: Entries not changed for this long are not restored on start
+        """
+        super().__init__(
+            store_data=PersistenceInput(bot_data=False, chat_data=False, user_data=True, callback_data=False),
+            update_interval=update_interval
+        )
+        self.session_factory = session_factory
+        self.max_age = timedelta(hours=max_age_hours)
+
+        # Latest change per key since the last flush (None = delete)
+        self._pending_user_data: Dict[int, Optional[Dict[str, Any]]] = {}
+        self._pending_conversations: Dict[Tuple[str, str], Optional[int]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        self._pruned = False
+
+        # Metrics
+        self.flushes = 0
+        self.rows_written = 0
+        self.rows_deleted = 0
+        self.coalesced = 0
+        self.failed_flushes = 0
+        self.last_flush_ms = 0.0
+        self.warm_up_ms = 0.0
+
+    @staticmethod
+    def _encode_key(key: ConversationKey) -> str:
+        return json.dumps(list(key))
+
+    @staticmethod
+    def _decode_key(key: str) -> ConversationKey:
+        return tuple(json.loads(key))
+
+    async def _prune_expired(self):
+        """Delete entries older than max_age (once, before the first load)"""
+        if self._pruned:
+            return
+        self._pruned = True
+
+        cutoff = datetime.utcnow() - self.max_age
+        async with self.session_factory() as session:
+            users = await session.execute(delete(UserData).where(UserData.updated_at < cutoff))
+            conversations = await session.execute(
+                delete(ConversationState).where(ConversationState.updated_at < cutoff)
+            )
+            await session.commit()
+
+        if users.rowcount or conversations.rowcount:
+            logger.info(
+                f"Dropped persisted data older than {self.max_age} "
+                f"({users.rowcount} users, {conversations.rowcount} conversations)"
+            )
+
+    async def get_user_data(self) -> Dict[int, Dict[str, Any]]:
+        started = time.perf_counter()
+        await self._prune_expired()
+        async with self.session_factory() as session:
+            result = await session.execute(select(UserData.user_id, UserData.data))
+            user_data = {user_id: data for user_id, data in result.all()}
+
+        self.warm_up_ms += (time.perf_counter() - started) * 1000
+        logger.info(f"Restored user_data of {len(user_data)} users")
+        return user_data
+
+    async def get_conversations(self, name: str) -> ConversationDict:
+        started = time.perf_counter()
+        await self._prune_expired()
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(ConversationState.key, ConversationState.state).where(ConversationState.name == name)
+            )
+            conversations = {self._decode_key(key): state for key, state in result.all()}
+
+        self.warm_up_ms += (time.perf_counter() - started) * 1000
+        logger.info(f"Restored {len(conversations)} active '{name}' conversations")
+        return conversations
+
+    async def get_chat_data(self) -> Dict[int, Dict[Any, Any]]:
+        return {}
+
+    async def get_bot_data(self) -> Dict[Any, Any]:
+        return {}
+
+    async def get_callback_data(self) -> None:
+        return None
+
+    async def update_user_data(self, user_id: int, data: Dict[str, Any]) -> None:
+        if user_id in self._pending_user_data:
+            self.coalesced += 1
+        self._pending_user_data[user_id] = data
+        self._schedule_flush()
+
+    async def drop_user_data(self, user_id: int) -> None:
+        self._pending_user_data[user_id] = None
+        self._schedule_flush()
+
+    async def update_conversation(self, name: str, key: ConversationKey, new_state: Optional[object]) -> None:
+        pending_key = (name, self._encode_key(key))
+        if pending_key in self._pending_conversations:
+            self.coalesced += 1
+        self._pending_conversations[pending_key] = new_state
+        self._schedule_flush()
+
+    async def update_chat_data(self, chat_id: int, data: Dict[Any, Any]) -> None:
+        pass
+
+    async def drop_chat_data(self, chat_id: int) -> None:
+        pass
+
+    async def update_bot_data(self, data: Dict[Any, Any]) -> None:
+        pass
+
+    async def update_callback_data(self, data: Any) -> None:
+        pass
+
+    async def refresh_user_data(self, user_id: int, user_data: Dict[str, Any]) -> None:
+        pass
+
+    async def refresh_chat_data(self, chat_id: int, chat_data: Dict[Any, Any]) -> None:
+        pass
+
+    async def refresh_bot_data(self, bot_data: Dict[Any, Any]) -> None:
+        pass
+
+    def _schedule_flush(self):
+        """Write the pending changes once the current persistence run has handed over all of them"""
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_soon(), name='persistence_flush')
+
+    async def _flush_soon(self):
+        # The Application passes all changes of a run concurrently; let them arrive first
+        await asyncio.sleep(0)
+        await self._write_pending()
+
+    async def _write_pending(self):
+        """Write all pending changes in one transaction"""
+        async with self._flush_lock:
+            user_data, self._pending_user_data = self._pending_user_data, {}
+            conversations, self._pending_conversations = self._pending_conversations, {}
+            if not user_data and not conversations:
+                return
+
+            started = time.perf_counter()
+            now = datetime.utcnow()
+            try:
+                async with self.session_factory() as session:
+                    for user_ids in _chunks(list(user_data)):
+                        await session.execute(delete(UserData).where(UserData.user_id.in_(user_ids)))
+                    user_rows = [
+                        {'user_id': user_id, 'data': data, 'updated_at': now}
+                        for user_id, data in user_data.items()
+                        if data is not None
+                    ]
+                    if user_rows:
+                        await session.execute(insert(UserData), user_rows)
+
+                    keys_by_name: Dict[str, List[str]] = {}
+                    for name, key in conversations:
+                        keys_by_name.setdefault(name, []).append(key)
+                    for name, keys in keys_by_name.items():
+                        for chunk in _chunks(keys):
+                            await session.execute(
+                                delete(ConversationState)
+                                .where(ConversationState.name == name, ConversationState.key.in_(chunk))
+                            )
+                    conversation_rows = [
+                        {'name': name, 'key': key, 'state': state, 'updated_at': now}
+                        for (name, key), state in conversations.items()
+                        if state is not None
+                    ]
+                    if conversation_rows:
+                        await session.execute(insert(ConversationState), conversation_rows)
+
+                    await session.commit()
+            except Exception as e:
+                # Keep the changes for the next run unless newer ones arrived meanwhile
+                for user_id, data in user_data.items():
+                    self._pending_user_data.setdefault(user_id, data)
+                for key, state in conversations.items():
+                    self._pending_conversations.setdefault(key, state)
+                self.failed_flushes += 1
+                logger.error(f"Failed to write persistence data: {e}")
+                return
+
+            written = len(user_rows) + len(conversation_rows)
+            self.flushes += 1
+            self.rows_written += written
+            self.rows_deleted += len(user_data) + len(conversations) - written
+            self.last_flush_ms = (time.perf_counter() - started) * 1000
+
+    async def flush(self) -> None:
+        """Write everything still pending (called when the Application stops)"""
+        if self._flush_task is not None:
+            await self._flush_task
+            self._flush_task = None
+        await self._write_pending()
+        logger.info(f"Persistence flushed ({self.flushes} flushes, {self.rows_written} rows written)")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Persistence statistics"""
+        return {
+            'pending': len(self._pending_user_data) + len(self._pending_conversations),
+            'flushes': self.flushes,
+            'rows_written': self.rows_written,
+            'rows_deleted': self.rows_deleted,
+            'coalesced': self.coalesced,
+            'failed_flushes': self.failed_flushes,
+            'last_flush_ms': self.last_flush_ms,
+            'warm_up_ms': self.warm_up_ms,
+        }
+
+
+# Global persistence instance
+bot_persistence = SQLPersistence(
+    update_interval=settings.PERSISTENCE_UPDATE_INTERVAL_SECONDS,
+    max_age_hours=settings.PERSISTENCE_MAX_AGE_HOURS
+)
@@ -0,0 +1,163 @@
+"""
+Compiled tax tariffs
+Per-year tax and social security parameters, resolved once from config
+"""
+import hashlib
+from types import MappingProxyType
+from typing import Dict, Mapping
+from config.settings import (
+    TAX_YEARS,
+    GERMAN_STATES,
+    EMPLOYMENT_TYPES,
+    HEALTH_INSURANCE_COMPANIES
+)
+
+
+class Tariff:
+    """
+    Immutable tax parameters for one tax year
+
+    All values are plain floats or read-only mappings so the calculation
+    hot path does not have to walk the nested config dictionaries.
+    """
+
+    __slots__ = (
+        'year',
+        'version',
+        'basic_allowance',
+        'child_allowance',
+        'zone1_end',
+        'zone2_end',
+        'zone3_end',
+        'zone1_a',
+        'zone1_b',
+        'zone2_a',
+        'zone2_b',
+        'zone2_c',
+        'zone3_rate',
+        'zone3_offset',
+        'zone4_rate',
+        'zone4_offset',
+        'soli_threshold',
+        'soli_rate',
+        'unemployment_rate',
+        'care_rate',
+        'care_rate_childless',
+        'contribution_ceilings',
+        'church_tax_rates',
+        'health_rates',
+        'pension_rates',
+    )
+
+    def __init__(self, year: int, tax_brackets: Dict, social_security: Dict):
+        """
+        Compile the config dictionaries of one tax year
+
+        Args:
+            year: Tax year
+            tax_brackets: TAX_BRACKETS_<year> from config
+            social_security: SOCIAL_SECURITY_<year> from config
+        """
+        edges = [bracket['to'] for bracket in tax_brackets['brackets']]
+        coefficients = tax_brackets['coefficients']
+        zone1_a, zone1_b = coefficients['zone1']
+        zone2_a, zone2_b, zone2_c = coefficients['zone2']
+        zone3_rate, zone3_offset = coefficients['zone3']
+        zone4_rate, zone4_offset = coefficients['zone4']
+
+        care_rate = social_security['care_insurance'] / 2 / 100
+
+        values = {
+            'year': year,
+            'basic_allowance': tax_brackets['basic_allowance'],
+            'child_allowance': tax_brackets['child_allowance'],
+            'zone1_end': edges[1],
+            'zone2_end': edges[2],
+            'zone3_end': edges[3],
+            'zone1_a': zone1_a,
+            'zone1_b': zone1_b,
+            'zone2_a': zone2_a,
+            'zone2_b': zone2_b,
+            'zone2_c': zone2_c,
+            'zone3_rate': zone3_rate,
+            'zone3_offset': zone3_offset,
+            'zone4_rate': zone4_rate,
+            'zone4_offset': zone4_offset,
+            'soli_threshold': tax_brackets['solidarity_surcharge_threshold'],
+            'soli_rate': tax_brackets['solidarity_surcharge_rate'] / 100,
+            'unemployment_rate': social_security['unemployment_insurance'] / 2 / 100,
+            'care_rate': care_rate,
+            # 23+ without children pay a 0.6% supplement
+            'care_rate_childless': care_rate + (0.6 / 100),
+            'contribution_ceilings': MappingProxyType({
+                code: (
+                    social_security['contribution_ceiling_east']
+                    if data['is_east']
+                    else social_security['contribution_ceiling']
+                )
+                for code, data in GERMAN_STATES.items()
+            }),
+            'church_tax_rates': MappingProxyType({
+                code: data['church_tax'] / 100
+                for code, data in GERMAN_STATES.items()
+            }),
+            'health_rates': MappingProxyType({
+                code: data['employee_share'] / 100
+                for code, data in HEALTH_INSURANCE_COMPANIES.items()
+            }),
+            'pension_rates': MappingProxyType({
+                code: data['pension_rate'] / 2 / 100
+                for code, data in EMPLOYMENT_TYPES.items()
+            }),
+        }
+
+        # Content-based version: changes whenever any parameter changes
+        fingerprint = repr(sorted(
+            (key, sorted(value.items()) if isinstance(value, Mapping) else value)
+            for key, value in values.items()
+        ))
+        values['version'] = f"{year}-{hashlib.sha1(fingerprint.encode()).hexdigest()[:12]}"
+
+        for key, value in values.items():
+            object.__setattr__(self, key, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __repr__(self):
+        return f"<Tariff(year={self.year}, version={self.version})>"
+
+
+# Compiled tariffs by year
+_tariffs: Dict[int, Tariff] = {}
+
+
+def compile_tariff(year: int) -> Tariff:
+    """
+    (Re)compile the tariff of a tax year from config
+
+    Args:
+        year: Tax year
+
+    Returns:
+        Freshly compiled tariff, also stored for get_tariff
+    """
+    if year not in TAX_YEARS:
+        supported = ', '.join(str(y) for y in sorted(TAX_YEARS))
+        raise ValueError(f"Unsupported tax year {year} (supported: {supported})")
+
+    params = TAX_YEARS[year]
+    tariff = Tariff(year, params['tax_brackets'], params['social_security'])
+    _tariffs[year] = tariff
+    return tariff
+
+
+def get_tariff(year: int) -> Tariff:
+    """Get the compiled tariff of a tax year, compiling it on first use"""
+    tariff = _tariffs.get(year)
+    if tariff is None:
+        tariff = compile_tariff(year)
+    return tariff
@@ -2,28 +2,117 @@
 German Tax Calculator Service
 Based on official data from Bundesministerium der Finanzen (BMF)
 """
-from typing import Dict, Tuple
+from typing import Dict, Iterator, Mapping, NamedTuple, Optional, Tuple, Union
 from datetime import datetime
+import numpy as np
 from config import settings
-from config.settings import (
-    TAX_BRACKETS_2024,
-    SOCIAL_SECURITY_2024,
-    TAX_CLASSES,
-    EMPLOYMENT_TYPES,
-    HEALTH_INSURANCE_COMPANIES,
-    CHILD_ALLOWANCE,
-    GERMAN_STATES
-)
+from config.settings import TAX_YEARS, TAX_CLASSES
+from .tariff import get_tariff, compile_tariff
+from .calculation_cache import CalculationCache
+from .calculation_result import NetIncomeResult
+from .tax_table import IncomeTaxTable, load_tax_table, default_table_path
 import math
 
 
+ArrayLike = Union[float, int, str, bool, np.ndarray, list, tuple]
+
+
+class SweepPoint(NamedTuple):
+    """One point of a salary sweep (all values annual, in EUR)"""
+    gross_annual: float
+    income_tax: float
+    solidarity_surcharge: float
+    church_tax: float
+    social_security: float
+    net_annual: float
+
+# Tax class multipliers used by _apply_tax_class_adjustment (classes 1 and 4 are neutral)
+TAX_CLASS_FACTORS = {2: 0.95, 3: 0.85, 5: 1.15, 6: 1.20}
+
+# Employment types without social security contributions
+EXEMPT_EMPLOYMENT_TYPES = ('civil_servant', 'self_employed')
+
+
+def _lookup_column(values: ArrayLike, rates: Mapping[str, float], default: float):
+    """
+    Map a column of codes (state, insurer, ...) to per-row rates
+
+    Scalars are looked up once and returned as float so they broadcast
+    against the other columns. Arrays are matched against the sorted key
+    list with a single binary search instead of one dict lookup per row.
+    """
+    values = np.asarray(values)
+    if values.ndim == 0:
+        return rates.get(str(values), default)
+
+    keys = np.array(sorted(rates))
+    key_rates = np.array([rates[k] for k in keys], dtype=np.float64)
+
+    idx = np.searchsorted(keys, values).clip(max=len(keys) - 1)
+    found = keys[idx] == values
+    return np.where(found, key_rates[idx], default)
+
+
+def _round2(values: np.ndarray) -> np.ndarray:
+    """
+    Round an array to 2 decimals exactly like the builtin round(x, 2)
+
+    np.round scales by 100 and rounds in binary, which can pick the other
+    neighbour when the scaled value lies within a few ulps of .5. Those
+    rows are rare and are re-rounded with the builtin.
+    """
+    if values.size == 0:
+        return values.copy()
+
+    scaled = values * 100.0
+    rounded = np.rint(scaled)
+
+    # Distance to the nearest integer, computed in place; .5 means a tie
+    np.subtract(scaled, rounded, out=scaled)
+    np.abs(scaled, out=scaled)
+    tolerance = 4 * np.spacing(100.0 * max(abs(values.max()), abs(values.min())))
+    ambiguous = np.flatnonzero(scaled >= 0.5 - tolerance)
+
+    rounded /= 100.0
+    for i in ambiguous:
+        rounded.flat[i] = round(float(values.flat[i]), 2)
+    return rounded
+
+
 class GermanTaxCalculator:
     """Calculate German income tax and social security contributions"""
 
-    def __init__(self, year: int = 2024):
+    def __init__(
+        self,
+        year: int = 2024,
+        cache: Optional[CalculationCache] = None,
+        tax_table: Optional[IncomeTaxTable] = None
+    ):
         self.year = year
-        self.tax_brackets = TAX_BRACKETS_2024
-        self.social_security = SOCIAL_SECURITY_2024
+        self.tariff = get_tariff(year)
+        self.tax_brackets = TAX_YEARS[year]['tax_brackets']
+        self.social_security = TAX_YEARS[year]['social_security']
+        self.cache = cache
+        self.tax_table = None
+        if tax_table is not None:
+            self.attach_tax_table(tax_table)
+
+    def attach_tax_table(self, tax_table: IncomeTaxTable):
+        """Answer calculate_income_tax from a precomputed table of this tariff"""
+        if tax_table.version != self.tariff.version:
+            raise ValueError(
+                f"Tax table was built for tariff {tax_table.version}, "
+                f"calculator uses {self.tariff.version}"
+            )
+        self.tax_table = tax_table
+
+    def reload_tariff(self):
+        """Recompile the tariff from config and drop cached results"""
+        self.tariff = compile_tariff(self.year)
+        if self.cache is not None:
+            self.cache.clear()
+        if self.tax_table is not None and self.tax_table.version != self.tariff.version:
+            self.tax_table = None
 
     def calculate_income_tax(
         self,
@@ -43,12 +132,14 @@ class GermanTaxCalculator:
         Returns:
             Annual income tax in EUR
         """
+        tariff = self.tariff
+
         # Apply basic allowance (Grundfreibetrag)
-        taxable_income = max(0, annual_income - self.tax_brackets['basic_allowance'])
+        taxable_income = max(0, annual_income - tariff.basic_allowance)
 
         # Apply Kinderfreibetrag
         if kinderfreibetrag > 0:
-            child_deduction = CHILD_ALLOWANCE['per_child'] * kinderfreibetrag
+            child_deduction = tariff.child_allowance * kinderfreibetrag
             taxable_income = max(0, taxable_income - child_deduction)
 
         if taxable_income == 0:
@@ -57,26 +148,48 @@ class GermanTaxCalculator:
         # Round down to full EUR
         zvE = math.floor(taxable_income)
 
-        # Apply German tax formula (Einkommensteuerformel 2024)
-        if zvE <= self.tax_brackets['basic_allowance']:
+        # Precomputed result for this zvE and tax class, if a table is attached
+        if self.tax_table is not None:
+            column = self.tax_table.columns.get(tax_class)
+            if column is not None and zvE < len(column):
+                return column[zvE]
+
+        return self.calculate_income_tax_for_zve(zvE, tax_class, annual_income)
+
+    def calculate_income_tax_for_zve(self, zvE: int, tax_class: int, annual_income: float = 0.0) -> float:
+        """
+        Evaluate the income tax formula for a taxable income in full EUR
+
+        Args:
+            zvE: Taxable income (zu versteuerndes Einkommen), floored to full EUR
+            tax_class: Tax class (1-6)
+            annual_income: Annual gross income in EUR
+
+        Returns:
+            Annual income tax in EUR
+        """
+        tariff = self.tariff
+
+        # Apply German tax formula (Einkommensteuerformel of the tariff year)
+        if zvE <= tariff.basic_allowance:
             # Zone 0: No tax
             tax = 0
-        elif zvE <= 17005:
+        elif zvE <= tariff.zone1_end:
             # Zone 1: Progressive from 14% to 24%
-            # Formula: (922.98 * y + 1400) * y
-            y = (zvE - 11604) / 10000
-            tax = (922.98 * y + 1400) * y
-        elif zvE <= 66760:
+            # Formula: (a * y + b) * y
+            y = (zvE - tariff.basic_allowance) / 10000
+            tax = (tariff.zone1_a * y + tariff.zone1_b) * y
+        elif zvE <= tariff.zone2_end:
             # Zone 2: Progressive from 24% to 42%
-            # Formula: (181.19 * z + 2397) * z + 1025.38
-            z = (zvE - 17005) / 10000
-            tax = (181.19 * z + 2397) * z + 1025.38
-        elif zvE <= 277825:
+            # Formula: (a * z + b) * z + c
+            z = (zvE - tariff.zone1_end) / 10000
+            tax = (tariff.zone2_a * z + tariff.zone2_b) * z + tariff.zone2_c
+        elif zvE <= tariff.zone3_end:
             # Zone 3: Flat rate 42%
-            tax = 0.42 * zvE - 10602.13
+            tax = tariff.zone3_rate * zvE - tariff.zone3_offset
         else:
             # Zone 4: Top rate 45% (Reichensteuer)
-            tax = 0.45 * zvE - 18936.88
+            tax = tariff.zone4_rate * zvE - tariff.zone4_offset
 
         # Apply tax class adjustments
         tax = self._apply_tax_class_adjustment(tax, tax_class, annual_income)
@@ -114,13 +227,10 @@ class GermanTaxCalculator:
         Returns:
             Solidarity surcharge in EUR
         """
-        threshold = self.tax_brackets['solidarity_surcharge_threshold']
-
-        if income_tax <= threshold:
+        if income_tax <= self.tariff.soli_threshold:
             return 0
 
-        rate = self.tax_brackets['solidarity_surcharge_rate'] / 100
-        soli = income_tax * rate
+        soli = income_tax * self.tariff.soli_rate
 
         return round(soli, 2)
 
@@ -137,9 +247,8 @@ class GermanTaxCalculator:
             Church tax in EUR
         """
         # Get church tax rate from state
-        state_data = GERMAN_STATES.get(state, GERMAN_STATES['BE_WEST'])
-        rate = state_data['church_tax']
-        church_tax = income_tax * (rate / 100)
+        rates = self.tariff.church_tax_rates
+        church_tax = income_tax * rates.get(state, rates['BE_WEST'])
 
         return round(church_tax, 2)
 
@@ -164,11 +273,10 @@ class GermanTaxCalculator:
         Returns:
             Dictionary with breakdown of contributions
         """
-        # Get employment type data
-        emp_data = EMPLOYMENT_TYPES.get(employment_type, EMPLOYMENT_TYPES['standard'])
+        tariff = self.tariff
 
         # For civil servants and self-employed, no social security contributions
-        if employment_type in ['civil_servant', 'self_employed']:
+        if employment_type in EXEMPT_EMPLOYMENT_TYPES:
             return {
                 'health_insurance': 0,
                 'pension_insurance': 0,
@@ -178,39 +286,36 @@ class GermanTaxCalculator:
             }
 
         # Get contribution ceiling based on state
-        state_data = GERMAN_STATES.get(state, GERMAN_STATES['BE_WEST'])
-        ceiling = state_data['contribution_ceiling']
+        ceilings = tariff.contribution_ceilings
+        ceiling = ceilings.get(state, ceilings['BE_WEST'])
 
         # Income subject to contributions (capped at ceiling)
         contributable_income = min(annual_income, ceiling)
 
         # Calculate health insurance based on selected company
         if health_insurance_company != 'private':
-            company_data = HEALTH_INSURANCE_COMPANIES.get(
+            health_rate = tariff.health_rates.get(
                 health_insurance_company,
-                HEALTH_INSURANCE_COMPANIES['tk']
+                tariff.health_rates['tk']
             )
-            health_rate = company_data['employee_share'] / 100
             health = contributable_income * health_rate
         else:
             # Private insurance - no contribution here, handled separately
             health = 0
 
         # Calculate pension insurance (employee share only)
-        pension_rate = emp_data['pension_rate'] / 2 / 100  # Employee pays half
+        pension_rate = tariff.pension_rates.get(employment_type, tariff.pension_rates['standard'])
         pension = contributable_income * pension_rate
 
         # Calculate unemployment insurance (employee share only)
-        unemployment = contributable_income * (self.social_security['unemployment_insurance'] / 2 / 100)
+        unemployment = contributable_income * tariff.unemployment_rate
 
         # Calculate care insurance (Pflegeversicherung)
-        care_base_rate = self.social_security['care_insurance'] / 2 / 100
-
         # Add supplement for 23+ without children (+0.6%)
         if age_group == 'over_23_no_children':
-            care_rate = care_base_rate + (0.6 / 100)
+            care_rate = tariff.care_rate_childless
         else:
-            care_rate = care_base_rate
+            care_rate = tariff.care_rate
 
         care = contributable_income * care_rate
 
@@ -233,7 +338,7 @@ class GermanTaxCalculator:
         employment_type: str = 'standard',
         age_group: str = 'under_23',
         health_insurance_company: str = 'tk'
-    ) -> Dict[str, float]:
+    ) -> NetIncomeResult:
         """
         Calculate complete net income with all deductions
 
@@ -249,8 +354,49 @@ class GermanTaxCalculator:
             health_insurance_company: Health insurance company code
 
         Returns:
-            Dictionary with complete breakdown
+            Immutable result with complete breakdown (read like a dict,
+            use to_dict() for a plain copy)
         """
+        if self.cache is None:
+            return self._calculate_net_income(
+                annual_gross, tax_class, children, kinderfreibetrag, church_tax,
+                state, employment_type, age_group, health_insurance_company
+            )
+
+        # Normalize so that e.g. 45000 and 45000.0 share one cache entry
+        key = (
+            self.tariff.version,
+            float(annual_gross),
+            int(tax_class),
+            int(children),
+            float(kinderfreibetrag),
+            bool(church_tax),
+            state,
+            employment_type,
+            age_group,
+            health_insurance_company
+        )
+        result = self.cache.get(key)
+        if result is None:
+            result = self._calculate_net_income(*key[1:])
+            self.cache.put(key, result)
+
+        # Results are immutable, so the cached instance can be shared
+        return result
+
+    def _calculate_net_income(
+        self,
+        annual_gross: float,
+        tax_class: int,
+        children: int,
+        kinderfreibetrag: float,
+        church_tax: bool,
+        state: str,
+        employment_type: str,
+        age_group: str,
+        health_insurance_company: str
+    ) -> NetIncomeResult:
+        """Uncached implementation of calculate_net_income"""
         # Calculate income tax
         income_tax = self.calculate_income_tax(annual_gross, tax_class, kinderfreibetrag)
 
@@ -277,28 +423,266 @@ class GermanTaxCalculator:
         # Calculate net income
         net_annual = annual_gross - total_deductions
 
+        return NetIncomeResult(
+            gross_annual=round(annual_gross, 2),
+            income_tax=round(income_tax, 2),
+            solidarity_surcharge=round(soli, 2),
+            church_tax=round(church, 2),
+            health_insurance=social_security['health_insurance'],
+            pension_insurance=social_security['pension_insurance'],
+            unemployment_insurance=social_security['unemployment_insurance'],
+            care_insurance=social_security['care_insurance'],
+            total_deductions=round(total_deductions, 2),
+            net_annual=round(net_annual, 2),
+            gross_monthly=round(annual_gross / 12, 2),
+            net_monthly=round(net_annual / 12, 2),
+            tax_class=tax_class,
+            children=children,
+            kinderfreibetrag=kinderfreibetrag,
+            employment_type=employment_type,
+            age_group=age_group,
+            health_insurance_company=health_insurance_company,
+            year=self.year
+        )
+
+    def sweep_net_income(
+        self,
+        start: float,
+        stop: float,
+        step: float,
+        tax_class: int,
+        kinderfreibetrag: float = 0.0,
+        church_tax: bool = False,
+        state: str = 'BE_WEST',
+        employment_type: str = 'standard',
+        age_group: str = 'under_23',
+        health_insurance_company: str = 'tk'
+    ) -> Iterator[SweepPoint]:
+        """
+        Lazily calculate net income over a range of gross incomes
+
+        The profile (tax class, state, insurer, ...) is fixed for the whole
+        sweep, so its rates are resolved once and each point is yielded as
+        a compact tuple instead of a full result dict.
+
+        Args:
+            start: First annual gross income
+            stop: End of the range (exclusive, like range())
+            step: Distance between two gross incomes
+            tax_class: Tax class (1-6)
+            kinderfreibetrag: Child tax allowance (0.0-6.0)
+            church_tax: Whether church tax applies
+            state: Federal state code
+            employment_type: Type of employment
+            age_group: Age group (affects care insurance)
+            health_insurance_company: Health insurance company code
+
+        Yields:
+            SweepPoint with the same values calculate_net_income returns
+        """
+        if step <= 0:
+            raise ValueError("step must be positive")
+
+        tariff = self.tariff
+
+        # Resolve the profile once (same rules as calculate_social_security)
+        church_rate = tariff.church_tax_rates.get(state, tariff.church_tax_rates['BE_WEST'])
+        exempt = employment_type in EXEMPT_EMPLOYMENT_TYPES
+        ceiling = tariff.contribution_ceilings.get(state, tariff.contribution_ceilings['BE_WEST'])
+        if health_insurance_company != 'private':
+            health_rate = tariff.health_rates.get(health_insurance_company, tariff.health_rates['tk'])
+        else:
+            health_rate = 0.0
+        pension_rate = tariff.pension_rates.get(employment_type, tariff.pension_rates['standard'])
+        unemployment_rate = tariff.unemployment_rate
+        if age_group == 'over_23_no_children':
+            care_rate = tariff.care_rate_childless
+        else:
+            care_rate = tariff.care_rate
+
+        soli_threshold = tariff.soli_threshold
+        soli_rate = tariff.soli_rate
+        calculate_income_tax = self.calculate_income_tax
+
+        for i in range(max(0, math.ceil((stop - start) / step))):
+            # Multiply instead of accumulating to avoid drift over long sweeps
+            gross = start + i * step
+
+            income_tax = calculate_income_tax(gross, tax_class, kinderfreibetrag)
+            soli = round(income_tax * soli_rate, 2) if income_tax > soli_threshold else 0
+            church = round(income_tax * church_rate, 2) if church_tax else 0
+
+            if exempt:
+                social = 0
+            else:
+                contributable_income = min(gross, ceiling)
+                social = round(
+                    contributable_income * health_rate
+                    + contributable_income * pension_rate
+                    + contributable_income * unemployment_rate
+                    + contributable_income * care_rate,
+                    2
+                )
+
+            total_deductions = income_tax + soli + church + social
+            yield SweepPoint(
+                round(gross, 2),
+                income_tax,
+                soli,
+                church,
+                social,
+                round(gross - total_deductions, 2)
+            )
+
+    def calculate_net_income_batch(
+        self,
+        annual_gross: ArrayLike,
+        tax_class: ArrayLike,
+        kinderfreibetrag: ArrayLike = 0.0,
+        church_tax: ArrayLike = False,
+        state: ArrayLike = 'BE_WEST',
+        employment_type: ArrayLike = 'standard',
+        age_group: ArrayLike = 'under_23',
+        health_insurance_company: ArrayLike = 'tk'
+    ) -> Dict[str, np.ndarray]:
+        """
+        Calculate net income for many people at once using array operations
+
+        Every argument is either a column (array/list, one value per row) or
+        a scalar applied to all rows. Results are identical to calling
+        calculate_net_income row by row, including rounding.
+
+        Args:
+            annual_gross: Annual gross incomes in EUR
+            tax_class: Tax classes (1-6)
+            kinderfreibetrag: Child tax allowances (0.0-6.0)
+            church_tax: Whether church tax applies
+            state: Federal state codes
+            employment_type: Types of employment
+            age_group: Age groups (affects care insurance)
+            health_insurance_company: Health insurance company codes
+
+        Returns:
+            Dictionary of arrays (one entry per row) with the numeric
+            fields of calculate_net_income
+        """
+        gross, tax_class, kinderfreibetrag, church_tax = np.broadcast_arrays(
+            np.atleast_1d(np.asarray(annual_gross, dtype=np.float64)),
+            np.asarray(tax_class),
+            np.asarray(kinderfreibetrag, dtype=np.float64),
+            np.asarray(church_tax, dtype=bool),
+        )
+
+        tariff = self.tariff
+
+        # Income tax (same zones as calculate_income_tax)
+        basic_allowance = tariff.basic_allowance
+        taxable_income = np.maximum(gross - basic_allowance, 0.0)
+        child_deduction = tariff.child_allowance * kinderfreibetrag
+        taxable_income = np.where(
+            kinderfreibetrag > 0,
+            np.maximum(taxable_income - child_deduction, 0.0),
+            taxable_income
+        )
+        zvE = np.floor(taxable_income)
+
+        y = (zvE - basic_allowance) / 10000
+        z = (zvE - tariff.zone1_end) / 10000
+        tax = np.select(
+            [
+                zvE <= basic_allowance,
+                zvE <= tariff.zone1_end,
+                zvE <= tariff.zone2_end,
+                zvE <= tariff.zone3_end,
+            ],
+            [
+                0.0,
+                (tariff.zone1_a * y + tariff.zone1_b) * y,
+                (tariff.zone2_a * z + tariff.zone2_b) * z + tariff.zone2_c,
+                tariff.zone3_rate * zvE - tariff.zone3_offset,
+            ],
+            tariff.zone4_rate * zvE - tariff.zone4_offset
+        )
+
+        factor = np.ones(tax.shape)
+        for tc, tc_factor in TAX_CLASS_FACTORS.items():
+            factor[tax_class == tc] = tc_factor
+        # Multiplying by exactly 1.0 leaves classes 1 and 4 untouched
+        income_tax = _round2(tax * factor)
+
+        # Solidarity surcharge
+        soli = np.where(
+            income_tax <= tariff.soli_threshold,
+            0.0,
+            _round2(income_tax * tariff.soli_rate)
+        )
+
+        # Church tax
+        church_rates = tariff.church_tax_rates
+        church_rate = _lookup_column(state, church_rates, church_rates['BE_WEST'])
+        church = np.where(church_tax, _round2(income_tax * church_rate), 0.0)
+
+        # Social security (same rules as calculate_social_security)
+        ceilings = tariff.contribution_ceilings
+        ceiling = _lookup_column(state, ceilings, ceilings['BE_WEST'])
+        contributable_income = np.minimum(gross, ceiling)
+
+        health_rates = dict(tariff.health_rates, private=0.0)
+        health_rate = _lookup_column(health_insurance_company, health_rates, health_rates['tk'])
+
+        pension_rates = tariff.pension_rates
+        pension_rate = _lookup_column(employment_type, pension_rates, pension_rates['standard'])
+
+        unemployment_rate = tariff.unemployment_rate
+
+        care_rate = _lookup_column(
+            age_group,
+            {'over_23_no_children': tariff.care_rate_childless},
+            tariff.care_rate
+        )
+
+        exempt = _lookup_column(
+            employment_type,
+            {code: 1.0 for code in EXEMPT_EMPLOYMENT_TYPES},
+            0.0
+        ) == 1.0
+        contributable_income = np.where(exempt, 0.0, contributable_income)
+
+        health = contributable_income * health_rate
+        pension = contributable_income * pension_rate
+        unemployment = contributable_income * unemployment_rate
+        care = contributable_income * care_rate
+        social_total = _round2(health + pension + unemployment + care)
+
+        # Totals
+        total_deductions = income_tax + soli + church + social_total
+        net_annual = gross - total_deductions
+
         return {
-            'gross_annual': round(annual_gross, 2),
-            'income_tax': round(income_tax, 2),
-            'solidarity_surcharge': round(soli, 2),
-            'church_tax': round(church, 2),
-            'health_insurance': social_security['health_insurance'],
-            'pension_insurance': social_security['pension_insurance'],
-            'unemployment_insurance': social_security['unemployment_insurance'],
-            'care_insurance': social_security['care_insurance'],
-            'total_deductions': round(total_deductions, 2),
-            'net_annual': round(net_annual, 2),
-            'gross_monthly': round(annual_gross / 12, 2),
-            'net_monthly': round(net_annual / 12, 2),
-            'tax_class': tax_class,
-            'children': children,
-            'kinderfreibetrag': kinderfreibetrag,
-            'employment_type': employment_type,
-            'age_group': age_group,
-            'health_insurance_company': health_insurance_company,
-            'year': self.year
+            'gross_annual': _round2(gross),
+            'income_tax': income_tax,
+            'solidarity_surcharge': soli,
+            'church_tax': church,
+            'health_insurance': _round2(health),
+            'pension_insurance': _round2(pension),
+            'unemployment_insurance': _round2(unemployment),
+            'care_insurance': _round2(care),
+            'total_deductions': _round2(total_deductions),
+            'net_annual': _round2(net_annual),
+            'gross_monthly': _round2(gross / 12),
+            'net_monthly': _round2(net_annual / 12),
         }
 
 
 # Global instance
-tax_calculator = GermanTaxCalculator()
+tax_calculator = GermanTaxCalculator(
+    cache=CalculationCache(
+        maxsize=settings.CALCULATION_CACHE_SIZE,
+        ttl_seconds=settings.CALCULATION_CACHE_TTL_SECONDS
+    ) if settings.CALCULATION_CACHE_SIZE > 0 else None
+)
+
+if settings.TAX_TABLE_ENABLED:
+    _table = load_tax_table(default_table_path(tax_calculator.year), tax_calculator.tariff)
+    if _table is not None:
+        tax_calculator.attach_tax_table(_table)
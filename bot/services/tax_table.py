@@ -0,0 +1,192 @@
+"""
+Precomputed Income Tax Table
+Income tax for every full-EUR zvE up to the 45% zone, per tax class
+
+The income tax formula floors the taxable income (zvE) to full EUR, so a
+table indexed by zvE reproduces it exactly without interpolation.
+
+Build and validate tables with build_tax_table.py
+"""
+import mmap
+import os
+import struct
+from array import array
+from pathlib import Path
+from typing import Dict, Optional, Sequence, TYPE_CHECKING
+from loguru import logger
+from config import BASE_DIR
+
+if TYPE_CHECKING:
+    from .tariff import Tariff
+    from .tax_calculator import GermanTaxCalculator
+
+
+TABLE_MAGIC = b'ESTTAB01'
+
+# magic, tariff version, year, number of tax classes, max zvE (padded to 64 bytes)
+TABLE_HEADER = struct.Struct('<8s32sHHI16x')
+
+TAX_CLASSES = (1, 2, 3, 4, 5, 6)
+
+
+class IncomeTaxTable:
+    """Income tax lookup by zvE and tax class"""
+
+    def __init__(self, version: str, year: int, max_zve: int, columns: Dict[int, Sequence[float]], buffer=None):
+        """
+        Args:
+            version: Tariff version the table was built from
+            year: Tax year
+            max_zve: Largest tabulated zvE
+            columns: Income tax per zvE (index) for each tax class
+            buffer: Memory map backing the columns, kept open while in use
+        """
+        self.version = version
+        self.year = year
+        self.max_zve = max_zve
+        self.columns = columns
+        self._buffer = buffer
+
+    def lookup(self, zvE: int, tax_class: int) -> Optional[float]:
+        """Get the tabulated income tax, or None outside the table"""
+        column = self.columns.get(tax_class)
+        if column is None or not 0 <= zvE < len(column):
+            return None
+        return column[zvE]
+
+    def save(self, path: Path):
+        """Write the table to a file (atomically replaced)"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + '.tmp')
+
+        with open(tmp_path, 'wb') as f:
+            f.write(TABLE_HEADER.pack(
+                TABLE_MAGIC,
+                self.version.encode('ascii'),
+                self.year,
+                len(TAX_CLASSES),
+                self.max_zve
+            ))
+            for tax_class in TAX_CLASSES:
+                array('d', self.columns[tax_class]).tofile(f)
+
+        os.replace(tmp_path, path)
+
+
+def default_table_path(year: int) -> Path:
+    """Location of the table file for a tax year"""
+    return BASE_DIR / 'data' / f'income_tax_table_{year}.bin'
+
+
+def build_tax_table(calculator: 'GermanTaxCalculator', max_zve: Optional[int] = None) -> IncomeTaxTable:
+    """
+    Tabulate the income tax formula of a calculator's tariff
+
+    Args:
+        calculator: Calculator whose tariff is tabulated
+        max_zve: Largest zvE to tabulate (default: end of the 42% zone)
+
+    Returns:
+        In-memory table
+    """
+    tariff = calculator.tariff
+    if max_zve is None:
+        max_zve = tariff.zone3_end
+
+    columns = {}
+    for tax_class in TAX_CLASSES:
+        columns[tax_class] = array(
+            'd',
+            (calculator.calculate_income_tax_for_zve(zvE, tax_class) for zvE in range(max_zve + 1))
+        )
+
+    return IncomeTaxTable(tariff.version, tariff.year, max_zve, columns)
+
+
+def load_tax_table(path: Path, tariff: 'Tariff') -> Optional[IncomeTaxTable]:
+    """
+    Memory-map a table file
+
+    Args:
+        path: Table file
+        tariff: Tariff the table must have been built from
+
+    Returns:
+        Table, or None if the file is missing, damaged or belongs to another
+        tariff
+    """
+    path = Path(path)
+    if not path.exists():
+        logger.warning(f"Income tax table {path} not found, using the formula")
+        return None
+
+    try:
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < TABLE_HEADER.size:
+                logger.warning(f"Income tax table {path} is truncated, using the formula")
+                return None
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Income tax table {path} cannot be read ({e}), using the formula")
+        return None
+
+    magic, version, year, class_count, max_zve = TABLE_HEADER.unpack_from(buffer, 0)
+    version = version.rstrip(b'\0').decode('ascii')
+
+    if magic != TABLE_MAGIC or class_count != len(TAX_CLASSES):
+        buffer.close()
+        logger.warning(f"Income tax table {path} has an unknown format, using the formula")
+        return None
+
+    if version != tariff.version:
+        buffer.close()
+        logger.warning(
+            f"Income tax table {path} was built for tariff {version}, "
+            f"current tariff is {tariff.version}; using the formula"
+        )
+        return None
+
+    length = max_zve + 1
+    expected_size = TABLE_HEADER.size + array('d').itemsize * len(TAX_CLASSES) * length
+    if len(buffer) != expected_size:
+        logger.warning(
+            f"Income tax table {path} has {len(buffer)} bytes, expected {expected_size}; using the formula"
+        )
+        buffer.close()
+        return None
+
+    values = memoryview(buffer)[TABLE_HEADER.size:].cast('d')
+    columns = {
+        tax_class: values[i * length:(i + 1) * length]
+        for i, tax_class in enumerate(TAX_CLASSES)
+    }
+
+    logger.info(f"Loaded income tax table {path} (tariff {version}, zvE 0-{max_zve})")
+    return IncomeTaxTable(version, year, max_zve, columns, buffer)
+
+
+def validate_tax_table(table: IncomeTaxTable, calculator: 'GermanTaxCalculator') -> int:
+    """
+    Compare every table entry with the formula
+
+    Args:
+        table: Table to check
+        calculator: Calculator providing the formula
+
+    Returns:
+        Number of entries that differ from the formula
+    """
+    mismatches = 0
+    for tax_class in TAX_CLASSES:
+        column = table.columns[tax_class]
+        for zvE in range(table.max_zve + 1):
+            expected = calculator.calculate_income_tax_for_zve(zvE, tax_class)
+            if column[zvE] != expected:
+                mismatches += 1
+                if mismatches <= 10:
+                    logger.error(
+                        f"Table mismatch: zvE={zvE}, tax_class={tax_class}: "
+                        f"table={column[zvE]}, formula={expected}"
+                    )
+    return mismatches
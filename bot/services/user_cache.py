@@ -0,0 +1,170 @@
+"""
+User Cache
+In-process cache of the user fields handlers need on every interaction
+
+Handlers look users up by Telegram ID on almost every update. The cache
+keeps a small read-only profile per user (LRU), loads it from the database
+on first touch and is updated whenever a handler changes the user
+(write-through), so it never serves stale values written by this process.
+"""
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, NamedTuple, Optional
+from sqlalchemy import select, update
+from config import settings
+from bot.models.database import AsyncSessionLocal
+from bot.models.user import User
+
+
+class UserProfile(NamedTuple):
+    """Cached user fields"""
+    id: int
+    telegram_id: int
+    language: str
+    state: Optional[str]
+    is_admin: bool
+    terms_accepted: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> 'UserProfile':
+        return cls(
+            user.id,
+            user.telegram_id,
+            user.language,
+            user.state,
+            bool(user.is_admin),
+            bool(user.terms_accepted)
+        )
+
+
+# Columns loaded for a profile (no full ORM object needed)
+PROFILE_COLUMNS = (User.id, User.telegram_id, User.language, User.state, User.is_admin, User.terms_accepted)
+
+# User fields that are part of the profile
+PROFILE_FIELDS = frozenset(UserProfile._fields)
+
+
+class UserCache:
+    """LRU cache of user profiles by Telegram ID"""
+
+    def __init__(self, session_factory=AsyncSessionLocal, maxsize: int = 10000):
+        """
+        Args:
+            session_factory: Async session factory
+            maxsize: Maximum number of cached profiles
+        """
+        self.session_factory = session_factory
+        self.maxsize = maxsize
+        self._profiles: 'OrderedDict[int, UserProfile]' = OrderedDict()
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    async def get(self, telegram_id: int) -> Optional[UserProfile]:
+        """
+        Get the profile of a user
+
+        Args:
+            telegram_id: Telegram user ID
+
+        Returns:
+            Profile, or None if the user is not registered
+        """
+        profile = self._profiles.get(telegram_id)
+        if profile is not None:
+            self._profiles.move_to_end(telegram_id)
+            self.hits += 1
+            return profile
+
+        self.misses += 1
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(*PROFILE_COLUMNS).where(User.telegram_id == telegram_id)
+            )
+            row = result.one_or_none()
+
+        if row is None:
+            # Not cached: the user may register at any moment
+            return None
+
+        profile = UserProfile(row[0], row[1], row[2], row[3], bool(row[4]), bool(row[5]))
+        self._store(profile)
+        return profile
+
+    async def set_fields(self, telegram_id: int, **values: Any) -> Optional[UserProfile]:
+        """
+        Update user columns in the database and in the cache
+
+        Args:
+            telegram_id: Telegram user ID
+            **values: User columns to set
+
+        Returns:
+            Updated profile, or None if the user is not registered
+        """
+        async with self.session_factory() as session:
+            result = await session.execute(
+                update(User)
+                .where(User.telegram_id == telegram_id)
+                .values(**values, updated_at=datetime.utcnow())
+            )
+            await session.commit()
+        self.writes += 1
+
+        if result.rowcount == 0:
+            self.invalidate(telegram_id)
+            return None
+
+        profile = self._profiles.get(telegram_id)
+        if profile is None:
+            return await self.get(telegram_id)
+
+        profile = profile._replace(**{key: value for key, value in values.items() if key in PROFILE_FIELDS})
+        self._store(profile)
+        return profile
+
+    def update(self, user: User) -> UserProfile:
+        """Store the profile of a user after it was created or changed in a session"""
+        profile = UserProfile.from_user(user)
+        self._store(profile)
+        self.writes += 1
+        return profile
+
+    def invalidate(self, telegram_id: int):
+        """Drop a cached profile"""
+        self._profiles.pop(telegram_id, None)
+
+    def clear(self):
+        """Drop all cached profiles"""
+        self._profiles.clear()
+
+    def _store(self, profile: UserProfile):
+        self._profiles[profile.telegram_id] = profile
+        self._profiles.move_to_end(profile.telegram_id)
+
+        while len(self._profiles) > self.maxsize:
+            self._profiles.popitem(last=False)
+            self.evictions += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache statistics (every hit is a saved database round trip)"""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._profiles),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'writes': self.writes,
+            'evictions': self.evictions,
+        }
+
+    def __len__(self):
+        return len(self._profiles)
+
+
+# Global user cache instance
+user_cache = UserCache(maxsize=settings.USER_CACHE_SIZE)
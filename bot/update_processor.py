@@ -0,0 +1,139 @@
+"""
+Update Processor
+Concurrent update processing with strict ordering per (chat, user)
+
+Updates of different users are processed in parallel, up to
+CONCURRENT_UPDATES at a time. Updates of the same (chat_id, user_id) run
+one after another in arrival order, so the ConversationHandler state
+machine sees them exactly as with sequential processing. An update that
+waits for an earlier update of its user does not take one of the
+concurrency slots.
+"""
+import asyncio
+import sys
+import time
+from collections import deque
+from typing import Any, Awaitable, Dict, Hashable, Optional
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+
+def update_key(update: object) -> Optional[Hashable]:
+    """Ordering key of an update: (chat_id, user_id), None if it has neither"""
+    if not isinstance(update, Update):
+        return None
+    chat = update.effective_chat
+    user = update.effective_user
+    if chat is None and user is None:
+        return None
+    return (chat.id if chat else None, user.id if user else None)
+
+
+class _KeyLock:
+    """Lock of one ordering key and the number of updates holding or waiting for it"""
+    __slots__ = ('lock', 'updates')
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.updates = 0
+
+
+class PerUserUpdateProcessor(BaseUpdateProcessor):
+    """Process different users concurrently, each user's updates in order"""
+
+    def __init__(self, max_concurrent_updates: int, wait_samples: int = 1000):
+        """
+        Args:
+            max_concurrent_updates: Updates processed at the same time
+            wait_samples: Recent wait times kept for the percentiles in get_stats()
+        """
+        if max_concurrent_updates < 1:
+            raise ValueError("`max_concurrent_updates` must be a positive integer!")
+
+        # The base class semaphore is taken before do_process_update; it must
+        # never block, otherwise updates could reach the per-key locks out of
+        # order. The limit is applied after the per-key lock instead.
+        super().__init__(sys.maxsize)
+        self.concurrency = max_concurrent_updates
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._keys: Dict[Hashable, _KeyLock] = {}
+
+        # Metrics
+        self.waiting = 0
+        self.running = 0
+        self.max_waiting = 0
+        self.processed = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self._recent_waits = deque(maxlen=wait_samples)
+
+    async def initialize(self) -> None:
+        self._slots = asyncio.Semaphore(self.concurrency)
+
+    async def shutdown(self) -> None:
+        self._keys.clear()
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        if self._slots is None:
+            await self.initialize()
+
+        # Register synchronously (no await before this point): arrival order is preserved
+        key = update_key(update)
+        key_lock = None
+        if key is not None:
+            key_lock = self._keys.get(key)
+            if key_lock is None:
+                key_lock = self._keys[key] = _KeyLock()
+            key_lock.updates += 1
+
+        arrived = time.perf_counter()
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        acquired = False
+        started = False
+        try:
+            if key_lock is not None:
+                await key_lock.lock.acquire()
+                acquired = True
+            async with self._slots:
+                self._record_wait(time.perf_counter() - arrived)
+                self.waiting -= 1
+                self.running += 1
+                started = True
+                try:
+                    await coroutine
+                finally:
+                    self.running -= 1
+                    self.processed += 1
+        finally:
+            if acquired:
+                key_lock.lock.release()
+            if not started:
+                # Cancelled while waiting
+                self.waiting -= 1
+                if asyncio.iscoroutine(coroutine):
+                    coroutine.close()
+            if key_lock is not None:
+                key_lock.updates -= 1
+                if key_lock.updates == 0:
+                    del self._keys[key]
+
+    def _record_wait(self, seconds: float):
+        self.total_wait_seconds += seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+        self._recent_waits.append(seconds)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth and wait time statistics"""
+        waits = sorted(self._recent_waits)
+        return {
+            'concurrency': self.concurrency,
+            'running': self.running,
+            'waiting': self.waiting,
+            'max_waiting': self.max_waiting,
+            'active_keys': len(self._keys),
+            'processed': self.processed,
+            'avg_wait_ms': self.total_wait_seconds / self.processed * 1000 if self.processed else 0.0,
+            'p99_wait_ms': waits[min(len(waits) - 1, int(len(waits) * 0.99))] * 1000 if waits else 0.0,
+            'max_wait_ms': self.max_wait_seconds * 1000,
+        }
@@ -2,20 +2,75 @@
 Enhanced Local Error Tracking System
 تتبع الأخطاء المحلي المحسّن مع تفاصيل كاملة
 """
+import heapq
 import traceback
 import sys
+from collections import deque
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from loguru import logger
 import json
+from config import settings
+
+
+def error_json_files(json_file: str = None) -> List[Path]:
+    """
+    JSONL error files of all workers
+
+    Args:
+        json_file: Base file (default: ERROR_JSON_FILE); worker files are
+            named <stem>.worker-<id>.jsonl next to it
+
+    Returns:
+        Existing files, base file first
+    """
+    base = Path(json_file or settings.ERROR_JSON_FILE)
+    files = [base] if base.exists() else []
+    files.extend(sorted(base.parent.glob(f"{base.stem}.worker-*{base.suffix}")))
+    return files
+
+
+def _read_errors(path: Path, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Errors of one JSONL file (the last `limit` ones)"""
+    errors = []
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = deque(f, maxlen=limit) if limit else f
+        for line in lines:
+            try:
+                errors.append(json.loads(line))
+            except ValueError:
+                continue
+    return errors
+
+
+def merge_error_logs(files: List[Path], limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Merge the JSONL error files of several workers by timestamp
+
+    Every file is in time order already, so the files are merged, not sorted.
+
+    Args:
+        files: JSONL error files
+        limit: Only the most recent errors (None = all)
+
+    Returns:
+        Errors, oldest first
+    """
+    merged = heapq.merge(
+        *(_read_errors(path, limit) for path in files),
+        key=lambda error: error.get('timestamp', '')
+    )
+    return list(deque(merged, maxlen=limit)) if limit else list(merged)
 
 
 class ErrorTracker:
     """نظام تتبع الأخطاء المحلي مع تفاصيل شاملة"""
 
-    def __init__(self, error_log_file: str = 'logs/errors.log'):
-        self.error_log_file = error_log_file
+    def __init__(self, error_log_file: str = None, error_json_file: str = None):
+        # Every worker process writes its own files (see merge_error_logs)
+        self.error_log_file = error_log_file or settings.worker_file(settings.ERROR_LOG_FILE)
+        self.error_json_file = error_json_file or settings.worker_file(settings.ERROR_JSON_FILE)
         self.setup_error_logging()
 
     def setup_error_logging(self):
@@ -60,6 +115,7 @@ class ErrorTracker:
             'operation': operation or 'unknown',
             'user_id': user_id,
             'context': context or {},
+            'worker_id': settings.WORKER_ID,
         }
 
         # الحصول على Stack Trace الكامل
@@ -129,7 +185,7 @@ class ErrorTracker:
     def _save_error_json(self, error_info: Dict[str, Any]):
         """حفظ تفاصيل الخطأ في ملف JSON للتحليل السريع"""
         try:
-            json_file = Path('logs/errors_detailed.jsonl')
+            json_file = Path(self.error_json_file)
             json_file.parent.mkdir(parents=True, exist_ok=True)
 
             # حفظ كل خطأ في سطر منفصل (JSONL format)
@@ -141,22 +197,9 @@ class ErrorTracker:
             logger.warning(f"Failed to save error JSON: {e}")
 
     def get_recent_errors(self, limit: int = 10) -> list:
-        """الحصول على آخر الأخطاء من ملف JSON"""
+        """الحصول على آخر الأخطاء من ملفات JSON (كل العمال | all workers)"""
         try:
-            json_file = Path('logs/errors_detailed.jsonl')
-            if not json_file.exists():
-                return []
-
-            errors = []
-            with open(json_file, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-                for line in lines[-limit:]:
-                    try:
-                        errors.append(json.loads(line))
-                    except:
-                        continue
-
-            return errors
+            return merge_error_logs(error_json_files(settings.ERROR_JSON_FILE), limit)
 
         except Exception as e:
             logger.warning(f"Failed to read error JSON: {e}")
@@ -1,9 +1,93 @@
-"""Internationalization (i18n) utilities for multi-language support"""
+"""Internationalization (i18n) utilities for multi-language support
+
+Translations are compiled into a catalog when they are loaded: every
+message with placeholders becomes a function built from an f-string, so
+rendering does not parse the template again, and a key missing in a
+language is resolved through the fallback languages once instead of on
+every call.
+
+Locale files can be reloaded while the bot runs (reload_async): changed
+files are parsed and compiled in a thread, then the new catalog replaces
+the old one in a single assignment and the reload listeners drop caches
+built from the old translations. A file that does not parse keeps its
+previous translations.
+"""
+import asyncio
 import json
+import keyword
+import string
+import time
+from datetime import datetime
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from loguru import logger
 from config import BASE_DIR, SUPPORTED_LANGUAGES, DEFAULT_LANGUAGE
 
+# Languages tried, in order, for keys missing in the requested language
+FALLBACK_LANGUAGES = ('en', DEFAULT_LANGUAGE)
+
+_formatter = string.Formatter()
+
+
+class CompiledMessage:
+    """Message text and its pre-parsed renderer"""
+    __slots__ = ('text', 'fields', 'render')
+
+    def __init__(self, text: str, fields: Tuple[str, ...], render: Callable[..., str]):
+        self.text = text
+        self.fields = fields
+        self.render = render
+
+
+def _fstring_renderer(parsed, fields: Tuple[str, ...]) -> Optional[Callable[..., str]]:
+    """Function rendering the template as an f-string (None if the template needs str.format)"""
+    pieces = []
+    for literal, field, spec, conversion in parsed:
+        pieces.append(literal.replace('{', '{{').replace('}', '}}'))
+        if field is None:
+            continue
+        if not field.isidentifier() or keyword.iskeyword(field) or field.startswith('_') or '{' in spec:
+            return None
+        pieces.append('{' + field + ('!' + conversion if conversion else '') + (':' + spec if spec else '') + '}')
+
+    # Keyword-only arguments: a missing one raises TypeError, extra ones are ignored
+    source = f"lambda *, {', '.join(fields)}, **_: f{''.join(pieces)!r}"
+    try:
+        return eval(compile(source, '<i18n>', 'eval'), {})
+    except SyntaxError:
+        return None
+
+
+def compile_message(text: str) -> CompiledMessage:
+    """
+    Parse a message template once
+
+    Args:
+        text: Template in str.format syntax
+
+    Returns:
+        Compiled message; render(**kwargs) equals text.format(**kwargs)
+    """
+    parsed = list(_formatter.parse(text))
+    fields = tuple(dict.fromkeys(field for _, field, _, _ in parsed if field is not None))
+    if not fields:
+        return CompiledMessage(text, fields, lambda **kwargs: text)
+
+    render = _fstring_renderer(parsed, fields) or (lambda **kwargs: text.format(**kwargs))
+    return CompiledMessage(text, fields, render)
+
+
+class CatalogUpdate(NamedTuple):
+    """Catalog parsed and compiled by prepare_reload, not yet in use"""
+    translations: Dict[str, Dict[str, str]]
+    mtimes: Dict[str, int]
+    catalog: Dict[str, Dict[str, CompiledMessage]]
+    fallbacks: Dict[str, int]
+    changed: List[str]
+    failed: List[str]
+    parse_ms: float
+    compile_ms: float
+
 
 class I18nManager:
     """Manage translations for multiple languages"""
@@ -11,23 +95,209 @@ class I18nManager:
     def __init__(self):
         self.locales_path = BASE_DIR / 'bot' / 'locales'
         self.translations: Dict[str, Dict[str, str]] = {}
+        # Language -> key -> compiled message, fallbacks already applied
+        self.catalog: Dict[str, Dict[str, CompiledMessage]] = {}
+        self.fallbacks: Dict[str, int] = {}
+        # Called after every catalog swap (caches built from translations)
+        self._reload_listeners: List[Callable[[], None]] = []
+        # Modification time (ns) of each locale file when it was read
+        self._mtimes: Dict[str, int] = {}
+        self._reload_lock = asyncio.Lock()
+
+        # Reload metrics
+        self.reloads = 0
+        self.reload_errors = 0
+        self.max_reload_ms = 0.0
+        self.last_reload: Dict[str, Any] = {}
+
         self.load_all_translations()
 
     def load_all_translations(self):
         """Load all translation files"""
         for lang_code in SUPPORTED_LANGUAGES:
-            self.load_language(lang_code)
+            self._read_language(lang_code)
+        self.compile_catalog()
 
     def load_language(self, lang_code: str):
         """Load translations for a specific language"""
-        lang_file = self.locales_path / lang_code / 'messages.json'
+        self._read_language(lang_code)
+        self.compile_catalog()
+
+    def _lang_file(self, lang_code: str) -> Path:
+        return self.locales_path / lang_code / 'messages.json'
+
+    def _read_language(self, lang_code: str):
+        lang_file = self._lang_file(lang_code)
         try:
+            # Taken before reading: a write in between is picked up by the next reload
+            self._mtimes[lang_code] = lang_file.stat().st_mtime_ns
             with open(lang_file, 'r', encoding='utf-8') as f:
                 self.translations[lang_code] = json.load(f)
         except FileNotFoundError:
             print(f"Warning: Translation file for {lang_code} not found")
             self.translations[lang_code] = {}
 
+    def changed_languages(self) -> List[str]:
+        """Languages whose locale file was modified since it was read"""
+        changed = []
+        for lang_code in SUPPORTED_LANGUAGES:
+            try:
+                mtime = self._lang_file(lang_code).stat().st_mtime_ns
+            except FileNotFoundError:
+                continue
+            if mtime != self._mtimes.get(lang_code):
+                changed.append(lang_code)
+        return changed
+
+    def prepare_reload(self, languages: Optional[Iterable[str]] = None) -> CatalogUpdate:
+        """
+        Parse locale files and compile a new catalog without putting it in use
+
+        Only reads files and the current translations, so it can run in a
+        thread while the event loop keeps serving the old catalog.
+
+        Args:
+            languages: Languages to read (default: those whose file changed)
+
+        Returns:
+            New catalog for apply_reload()
+        """
+        languages = self.changed_languages() if languages is None else list(languages)
+        translations = dict(self.translations)
+        mtimes = dict(self._mtimes)
+        changed, failed = [], []
+
+        started = time.perf_counter()
+        for lang_code in languages:
+            lang_file = self._lang_file(lang_code)
+            try:
+                mtime = lang_file.stat().st_mtime_ns
+                with open(lang_file, 'r', encoding='utf-8') as f:
+                    messages = json.load(f)
+                if not isinstance(messages, dict) or not all(isinstance(text, str) for text in messages.values()):
+                    raise ValueError("expected an object of strings")
+                # Fails here, not when a user hits the broken message
+                for text in messages.values():
+                    list(_formatter.parse(text))
+            except (OSError, ValueError) as e:
+                logger.error(f"Keeping previous translations for {lang_code}: {lang_file} is invalid ({e})")
+                failed.append(lang_code)
+                if isinstance(e, ValueError):
+                    # Not retried until the file changes again
+                    mtimes[lang_code] = mtime
+                continue
+            translations[lang_code] = messages
+            mtimes[lang_code] = mtime
+            changed.append(lang_code)
+        parsed = time.perf_counter()
+
+        catalog, fallbacks = self._build_catalog(translations)
+        compiled = time.perf_counter()
+
+        return CatalogUpdate(
+            translations=translations,
+            mtimes=mtimes,
+            catalog=catalog,
+            fallbacks=fallbacks,
+            changed=changed,
+            failed=failed,
+            parse_ms=(parsed - started) * 1000,
+            compile_ms=(compiled - parsed) * 1000
+        )
+
+    def apply_reload(self, update: CatalogUpdate, started: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Put a prepared catalog in use and record the reload
+
+        Args:
+            update: Result of prepare_reload()
+            started: perf_counter() when the reload was requested (for the latency)
+
+        Returns:
+            Summary of the reload
+        """
+        self._mtimes = update.mtimes
+        if update.changed:
+            self.translations = update.translations
+            self._swap(update.catalog, update.fallbacks)
+
+        total_ms = (time.perf_counter() - started) * 1000 if started is not None else update.parse_ms + update.compile_ms
+        self.reloads += 1
+        self.reload_errors += len(update.failed)
+        self.max_reload_ms = max(self.max_reload_ms, total_ms)
+        self.last_reload = {
+            'at': datetime.utcnow().isoformat(timespec='seconds'),
+            'changed': update.changed,
+            'failed': update.failed,
+            'parse_ms': round(update.parse_ms, 2),
+            'compile_ms': round(update.compile_ms, 2),
+            'total_ms': round(total_ms, 2),
+        }
+        if update.changed or update.failed:
+            logger.info(f"Translations reloaded: {self.last_reload}")
+        return self.last_reload
+
+    def reload(self, languages: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Reload locale files in the calling thread (see reload_async)"""
+        started = time.perf_counter()
+        return self.apply_reload(self.prepare_reload(languages), started)
+
+    async def reload_async(self, force: bool = False) -> Dict[str, Any]:
+        """
+        Reload changed locale files without blocking the event loop
+
+        Args:
+            force: Read all files, not only those modified since they were read
+
+        Returns:
+            Summary of the reload (changed and failed languages, latency)
+        """
+        async with self._reload_lock:
+            started = time.perf_counter()
+            languages = SUPPORTED_LANGUAGES if force else await asyncio.to_thread(self.changed_languages)
+            if not languages:
+                return {'changed': [], 'failed': []}
+            update = await asyncio.to_thread(self.prepare_reload, languages)
+            # Swapped on the loop: listeners never race with handlers building from the old catalog
+            return self.apply_reload(update, started)
+
+    def compile_catalog(self):
+        """Compile all loaded translations and resolve the fallback chains"""
+        self._swap(*self._build_catalog(self.translations))
+
+    def _build_catalog(
+        self,
+        translations: Dict[str, Dict[str, str]]
+    ) -> Tuple[Dict[str, Dict[str, CompiledMessage]], Dict[str, int]]:
+        compiled: Dict[str, CompiledMessage] = {}
+        catalog = {}
+        fallbacks = {}
+
+        for lang_code, messages in translations.items():
+            chain = [lang_code] + [fallback for fallback in FALLBACK_LANGUAGES if fallback != lang_code]
+            resolved = {}
+            # Fallbacks first, so the language's own messages override them
+            for source in reversed(chain):
+                for key, text in translations.get(source, {}).items():
+                    message = compiled.get(text)
+                    if message is None:
+                        message = compiled[text] = compile_message(text)
+                    resolved[key] = message
+            catalog[lang_code] = resolved
+            fallbacks[lang_code] = len(resolved) - len(messages)
+        return catalog, fallbacks
+
+    def _swap(self, catalog: Dict[str, Dict[str, CompiledMessage]], fallbacks: Dict[str, int]):
+        # Swap in one step: readers never see a half-built catalog
+        self.catalog = catalog
+        self.fallbacks = fallbacks
+        for listener in self._reload_listeners:
+            listener()
+
+    def add_reload_listener(self, listener: Callable[[], None]):
+        """Call `listener` whenever the catalog has been rebuilt"""
+        self._reload_listeners.append(listener)
+
     def get(self, key: str, lang: str = DEFAULT_LANGUAGE, **kwargs) -> str:
         """
         Get translated message for a key
@@ -41,20 +311,25 @@ class I18nManager:
             Translated message with format args applied
         """
         # Fallback to default language if requested language not found
-        if lang not in self.translations:
-            lang = DEFAULT_LANGUAGE
+        messages = self.catalog.get(lang)
+        if messages is None:
+            messages = self.catalog.get(DEFAULT_LANGUAGE, {})
 
         # Get translation or return key if not found
-        message = self.translations.get(lang, {}).get(key, key)
-
-        # Apply formatting if kwargs provided
-        if kwargs:
-            try:
-                message = message.format(**kwargs)
-            except KeyError as e:
-                print(f"Warning: Missing format key {e} in translation '{key}'")
+        message = messages.get(key)
+        if message is None:
+            return key
+        if not kwargs:
+            return message.text
 
-        return message
+        try:
+            return message.render(**kwargs)
+        except (TypeError, KeyError):
+            missing = [field for field in message.fields if field not in kwargs]
+            if not missing:
+                raise
+            print(f"Warning: Missing format key '{missing[0]}' in translation '{key}'")
+            return message.text
 
     def get_language_name(self, lang_code: str) -> str:
         """Get the native name of a language"""
@@ -76,6 +351,19 @@ class I18nManager:
         """Check if a language is supported"""
         return lang_code in SUPPORTED_LANGUAGES
 
+    def get_stats(self) -> Dict[str, object]:
+        """Catalog and reload statistics"""
+        return {
+            'languages': len(self.catalog),
+            'messages': sum(len(messages) for messages in self.catalog.values()),
+            'templates': len({id(message) for messages in self.catalog.values() for message in messages.values()}),
+            'fallbacks': dict(self.fallbacks),
+            'reloads': self.reloads,
+            'reload_errors': self.reload_errors,
+            'max_reload_ms': round(self.max_reload_ms, 2),
+            'last_reload': self.last_reload,
+        }
+
 
 # Global instance
 i18n = I18nManager()
@@ -0,0 +1,292 @@
+"""
+Keyboard Registry
+Static inline keyboards, built once per language
+
+Most keyboards of the bot only depend on the user's language. They are
+built the first time they are needed (or at startup by warm()) and the
+same InlineKeyboardMarkup is sent again afterwards; PTB objects are
+immutable, so sharing them is safe. The cache is cleared when the
+translations are reloaded.
+
+Keyboards with per-message data (history pages, admin approval buttons)
+are still built by their handlers.
+"""
+from typing import Callable, Dict, Iterable, List, Tuple
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+from config import (
+    SUPPORTED_LANGUAGES,
+    GERMAN_STATES,
+    HEALTH_INSURANCE_COMPANIES,
+    KINDERFREIBETRAG_OPTIONS
+)
+from .i18n import i18n, t
+
+Builder = Callable[[str], List[List[InlineKeyboardButton]]]
+
+
+def _columns(buttons: List[InlineKeyboardButton], columns: int) -> List[List[InlineKeyboardButton]]:
+    """Arrange buttons in rows of `columns`"""
+    return [buttons[i:i + columns] for i in range(0, len(buttons), columns)]
+
+
+class KeyboardRegistry:
+    """Named keyboards memoized per language"""
+
+    def __init__(self):
+        self._builders: Dict[str, Builder] = {}
+        self._cache: Dict[Tuple[str, str], InlineKeyboardMarkup] = {}
+
+        # Metrics
+        self.hits = 0
+        self.builds = 0
+        self.invalidations = 0
+
+    def register(self, name: str) -> Callable[[Builder], Builder]:
+        """Register a function returning the button rows of a keyboard for a language"""
+        def decorator(builder: Builder) -> Builder:
+            self._builders[name] = builder
+            return builder
+        return decorator
+
+    def get(self, name: str, lang: str) -> InlineKeyboardMarkup:
+        """
+        Keyboard for a language
+
+        Args:
+            name: Registered keyboard name
+            lang: Language code
+
+        Returns:
+            Shared InlineKeyboardMarkup
+        """
+        markup = self._cache.get((name, lang))
+        if markup is not None:
+            self.hits += 1
+            return markup
+
+        markup = InlineKeyboardMarkup(self._builders[name](lang))
+        self._cache[(name, lang)] = markup
+        self.builds += 1
+        return markup
+
+    def warm(self, languages: Iterable[str] = SUPPORTED_LANGUAGES) -> int:
+        """Build every keyboard for the given languages; returns the number built"""
+        built = self.builds
+        for lang in languages:
+            for name in self._builders:
+                self.get(name, lang)
+        return self.builds - built
+
+    def invalidate(self):
+        """Drop all cached keyboards (translations changed)"""
+        self._cache = {}
+        self.invalidations += 1
+
+    def get_stats(self) -> Dict[str, int]:
+        """Cache statistics"""
+        return {
+            'keyboards': len(self._builders),
+            'cached': len(self._cache),
+            'hits': self.hits,
+            'builds': self.builds,
+            'invalidations': self.invalidations,
+        }
+
+
+# Global keyboard registry
+keyboards = KeyboardRegistry()
+i18n.add_reload_listener(keyboards.invalidate)
+
+
+def keyboard(name: str, lang: str) -> InlineKeyboardMarkup:
+    """Shortcut for keyboards.get()"""
+    return keyboards.get(name, lang)
+
+
+def _cancel_row(lang: str) -> List[InlineKeyboardButton]:
+    return [InlineKeyboardButton(t('cancel', lang=lang), callback_data='main_menu')]
+
+
+@keyboards.register('main_menu')
+def _main_menu(lang):
+    return [
+        [InlineKeyboardButton(t('calculate_tax', lang=lang), callback_data='calculate')],
+        [InlineKeyboardButton(t('my_calculations', lang=lang), callback_data='history')],
+        [
+            InlineKeyboardButton(t('settings', lang=lang), callback_data='settings'),
+            InlineKeyboardButton(t('help', lang=lang), callback_data='help')
+        ]
+    ]
+
+
+@keyboards.register('back_to_menu')
+def _back_to_menu(lang):
+    return [[InlineKeyboardButton(t('back', lang=lang), callback_data='main_menu')]]
+
+
+@keyboards.register('main_menu_button')
+def _main_menu_button(lang):
+    return [[InlineKeyboardButton(t('main_menu', lang=lang), callback_data='main_menu')]]
+
+
+@keyboards.register('cancel')
+def _cancel(lang):
+    return [_cancel_row(lang)]
+
+
+# Onboarding
+
+@keyboards.register('choose_language')
+def _choose_language(lang):
+    buttons = [
+        InlineKeyboardButton(i18n.get_language_name(code), callback_data=f'setlang_{code}')
+        for code in SUPPORTED_LANGUAGES
+    ]
+    return _columns(buttons, 2)
+
+
+@keyboards.register('terms')
+def _terms(lang):
+    return [[
+        InlineKeyboardButton(t('accept_terms', lang=lang), callback_data='terms_accept'),
+        InlineKeyboardButton(t('decline_terms', lang=lang), callback_data='terms_decline')
+    ]]
+
+
+@keyboards.register('terms_declined')
+def _terms_declined(lang):
+    return [[InlineKeyboardButton(t('reconsider_terms', lang=lang), callback_data='terms_reconsider')]]
+
+
+# Settings
+
+@keyboards.register('settings')
+def _settings(lang):
+    return [
+        [InlineKeyboardButton(t('language', lang=lang), callback_data='change_language')],
+        [InlineKeyboardButton(t('back', lang=lang), callback_data='main_menu')]
+    ]
+
+
+@keyboards.register('language_menu')
+def _language_menu(lang):
+    buttons = [
+        InlineKeyboardButton(i18n.get_language_name(code), callback_data=f'lang_{code}')
+        for code in SUPPORTED_LANGUAGES
+    ]
+    return _columns(buttons, 2) + [[InlineKeyboardButton(t('back', lang=lang), callback_data='settings')]]
+
+
+# Tax calculation
+
+@keyboards.register('period')
+def _period(lang):
+    return [
+        [
+            InlineKeyboardButton(t('monthly', lang=lang), callback_data='period_monthly'),
+            InlineKeyboardButton(t('annual', lang=lang), callback_data='period_annual'),
+        ],
+        _cancel_row(lang)
+    ]
+
+
+@keyboards.register('state')
+def _state(lang):
+    buttons = [
+        InlineKeyboardButton(t(f'state_{code}', lang=lang), callback_data=f'state_{code}')
+        for code in GERMAN_STATES
+    ]
+    return _columns(buttons, 2) + [_cancel_row(lang)]
+
+
+@keyboards.register('employment_type')
+def _employment_type(lang):
+    return [
+        [InlineKeyboardButton(t(f'employment_{employment}', lang=lang), callback_data=f'emp_{employment}')]
+        for employment in ('standard', 'trainee', 'civil_servant', 'self_employed')
+    ] + [_cancel_row(lang)]
+
+
+@keyboards.register('tax_class')
+def _tax_class(lang):
+    return [
+        [InlineKeyboardButton(t(f'tax_class_{tax_class}_detailed', lang=lang), callback_data=f'tc_{tax_class}')]
+        for tax_class in range(1, 7)
+    ] + [_cancel_row(lang)]
+
+
+@keyboards.register('has_children')
+def _has_children(lang):
+    return [
+        [
+            InlineKeyboardButton(t('yes', lang=lang), callback_data='has_children_yes'),
+            InlineKeyboardButton(t('no', lang=lang), callback_data='has_children_no'),
+        ],
+        _cancel_row(lang)
+    ]
+
+
+@keyboards.register('children_count')
+def _children_count(lang):
+    buttons = [
+        InlineKeyboardButton('5+' if count == 5 else str(count), callback_data=f'children_count_{count}')
+        for count in range(6)
+    ]
+    return _columns(buttons, 3) + [_cancel_row(lang)]
+
+
+@keyboards.register('kinderfreibetrag')
+def _kinderfreibetrag(lang):
+    buttons = [
+        InlineKeyboardButton(str(value), callback_data=f'kfb_{str(value).replace(".", "_")}')
+        for value in KINDERFREIBETRAG_OPTIONS
+    ]
+    return _columns(buttons, 4) + [_cancel_row(lang)]
+
+
+@keyboards.register('age_group')
+def _age_group(lang):
+    return [
+        [InlineKeyboardButton(t(f'age_{age_group}', lang=lang), callback_data=f'age_{age_group}')]
+        for age_group in ('under_23', 'over_23_children', 'over_23_no_children')
+    ] + [_cancel_row(lang)]
+
+
+@keyboards.register('health_insurance_type')
+def _health_insurance_type(lang):
+    return [
+        [InlineKeyboardButton(t('health_insurance_public', lang=lang), callback_data='health_type_public')],
+        [InlineKeyboardButton(t('health_insurance_private', lang=lang), callback_data='health_type_private')],
+        _cancel_row(lang)
+    ]
+
+
+@keyboards.register('health_insurance_company')
+def _health_insurance_company(lang):
+    buttons = [
+        InlineKeyboardButton(
+            f"{t(f'health_company_{code}', lang=lang)} ({company['employee_share']}%)",
+            callback_data=f'hc_{code}'
+        )
+        for code, company in HEALTH_INSURANCE_COMPANIES.items()
+    ]
+    return _columns(buttons, 2) + [_cancel_row(lang)]
+
+
+@keyboards.register('church_tax')
+def _church_tax(lang):
+    return [
+        [
+            InlineKeyboardButton(t('yes', lang=lang), callback_data='church_yes'),
+            InlineKeyboardButton(t('no', lang=lang), callback_data='church_no'),
+        ],
+        _cancel_row(lang)
+    ]
+
+
+@keyboards.register('calculation_result')
+def _calculation_result(lang):
+    return [
+        [InlineKeyboardButton(t('calculate_tax', lang=lang), callback_data='calculate')],
+        [InlineKeyboardButton(t('main_menu', lang=lang), callback_data='main_menu')]
+    ]
@@ -0,0 +1,172 @@
+"""
+Webhook Server
+In-process aiohttp server that receives Telegram updates by webhook
+
+Telegram POSTs every update to WEBHOOK_PATH. The server checks the secret
+token, hands the update to the Application's update queue and answers
+right away, so Telegram can deliver the next update while the previous one
+is still being processed (see bot.update_processor).
+
+Endpoints:
+    POST <WEBHOOK_PATH>  Telegram updates
+    GET  /healthz        Process is alive
+    GET  /readyz         Application is running and the database answers
+    GET  /metrics        Webhook, update queue and translation statistics (JSON)
+"""
+import asyncio
+import hmac
+import json
+import time
+from typing import Any, Dict, Optional
+from aiohttp import web
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from telegram import Update
+from telegram.ext import Application
+from bot.models.database import engine as default_engine
+from bot.utils import i18n
+from bot.utils.keyboards import keyboards
+
+SECRET_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+
+
+class WebhookServer:
+    """Receive updates by webhook and feed them to the Application"""
+
+    def __init__(
+        self,
+        application: Application,
+        listen: str = '0.0.0.0',
+        port: int = 8080,
+        path: str = '/telegram',
+        secret_token: Optional[str] = None,
+        engine: AsyncEngine = default_engine,
+        readiness_timeout: float = 2.0
+    ):
+        """
+        Args:
+            application: Application processing the updates
+            listen: Address to bind
+            port: Port to bind
+            path: URL path Telegram posts updates to
+            secret_token: Expected X-Telegram-Bot-Api-Secret-Token (None = not checked)
+            engine: Database engine checked by /readyz
+            readiness_timeout: Seconds /readyz waits for the database
+        """
+        self.application = application
+        self.listen = listen
+        self.port = port
+        self.path = path
+        self.secret_token = secret_token
+        self.engine = engine
+        self.readiness_timeout = readiness_timeout
+        self._runner: Optional[web.AppRunner] = None
+
+        # Metrics
+        self.updates_received = 0
+        self.updates_rejected = 0
+        self.invalid_requests = 0
+        self.started_at: Optional[float] = None
+
+        self.app = web.Application()
+        self.app.router.add_post(path, self.handle_update)
+        self.app.router.add_get('/healthz', self.handle_health)
+        self.app.router.add_get('/readyz', self.handle_ready)
+        self.app.router.add_get('/metrics', self.handle_metrics)
+
+    async def start(self):
+        """Start serving"""
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.listen, self.port)
+        await site.start()
+        self.started_at = time.monotonic()
+        logger.info(f"Webhook server listening on {self.listen}:{self.port}{self.path}")
+
+    async def stop(self):
+        """Stop accepting requests"""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+            logger.info("Webhook server stopped")
+
+    async def set_webhook(self, url: str, max_connections: int = 40, drop_pending_updates: bool = False):
+        """
+        Register the webhook with Telegram
+
+        Args:
+            url: Public base URL of this server (the path is appended)
+            max_connections: Parallel connections Telegram opens to deliver updates
+            drop_pending_updates: Discard updates that arrived while the bot was down
+        """
+        webhook_url = url.rstrip('/') + self.path
+        await self.application.bot.set_webhook(
+            url=webhook_url,
+            secret_token=self.secret_token,
+            max_connections=max_connections,
+            allowed_updates=Update.ALL_TYPES,
+            drop_pending_updates=drop_pending_updates
+        )
+        logger.info(f"Webhook set to {webhook_url} (max {max_connections} connections)")
+
+    async def handle_update(self, request: web.Request) -> web.Response:
+        """Accept one update from Telegram"""
+        if self.secret_token is not None:
+            token = request.headers.get(SECRET_HEADER, '')
+            if not hmac.compare_digest(token, self.secret_token):
+                self.updates_rejected += 1
+                return web.Response(status=403)
+
+        try:
+            data = await request.json()
+            update = Update.de_json(data, self.application.bot)
+        except (ValueError, KeyError, TypeError) as e:
+            self.invalid_requests += 1
+            logger.warning(f"Invalid webhook request: {e}")
+            return web.Response(status=400)
+
+        if update is None:
+            self.invalid_requests += 1
+            return web.Response(status=400)
+
+        self.updates_received += 1
+        await self.application.update_queue.put(update)
+        return web.Response()
+
+    async def handle_health(self, request: web.Request) -> web.Response:
+        return web.Response(text='ok')
+
+    async def handle_ready(self, request: web.Request) -> web.Response:
+        if not self.application.running:
+            return web.Response(status=503, text='application not running')
+
+        try:
+            async with self.engine.connect() as conn:
+                await asyncio.wait_for(conn.execute(text('SELECT 1')), self.readiness_timeout)
+        except Exception as e:
+            return web.Response(status=503, text=f'database unavailable: {type(e).__name__}')
+
+        return web.Response(text='ready')
+
+    async def handle_metrics(self, request: web.Request) -> web.Response:
+        return web.Response(text=json.dumps(self.get_stats()), content_type='application/json')
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Webhook statistics"""
+        stats = {
+            'updates_received': self.updates_received,
+            'updates_rejected': self.updates_rejected,
+            'invalid_requests': self.invalid_requests,
+            'update_queue_depth': self.application.update_queue.qsize(),
+            'uptime_seconds': round(time.monotonic() - self.started_at, 1) if self.started_at else 0,
+            'translations': i18n.get_stats(),
+            'keyboards': keyboards.get_stats(),
+        }
+        processor = self.application.update_processor
+        if hasattr(processor, 'get_stats'):
+            stats['update_processor'] = processor.get_stats()
+        rate_limiter = self.application.bot.rate_limiter
+        if hasattr(rate_limiter, 'get_stats'):
+            stats['rate_limiter'] = rate_limiter.get_stats()
+        return stats
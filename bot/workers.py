@@ -0,0 +1,293 @@
+"""
+Worker Supervisor
+Several bot processes behind one webhook
+
+With WORKERS > 1, main.py starts WORKERS copies of itself as worker
+processes and receives the webhook itself. Every update is forwarded to the
+worker that owns its sender (Telegram user ID modulo WORKERS), in the order
+it arrived. The Application keeps conversation states and user_data in
+memory, so routing each user to one worker keeps them consistent; the
+database persistence makes them survive worker restarts.
+
+Workers listen on 127.0.0.1 at WEBHOOK_PORT + 1 + worker ID. A worker that
+exits is restarted; updates for it are held until it answers again.
+"""
+import asyncio
+import hmac
+import json
+import os
+import signal
+import sys
+import time
+from typing import Any, Dict, List, Optional
+from aiohttp import ClientError, ClientSession, ClientTimeout, web
+from loguru import logger
+from telegram import Bot, Update
+from config import BASE_DIR
+from bot.webhook import SECRET_HEADER
+
+
+def routing_id(update: Dict[str, Any]) -> int:
+    """Telegram ID that decides the worker of an update: the sender, else the chat"""
+    for value in update.values():
+        if not isinstance(value, dict):
+            continue
+        user = value.get('from')
+        if isinstance(user, dict) and 'id' in user:
+            return user['id']
+        chat = value.get('chat') or (value.get('message') or {}).get('chat')
+        if isinstance(chat, dict) and 'id' in chat:
+            return chat['id']
+    return 0
+
+
+def worker_index(update: Dict[str, Any], workers: int) -> int:
+    """Worker that processes an update"""
+    return routing_id(update) % workers
+
+
+class WorkerSupervisor:
+    """Start the worker processes and route webhook updates to them"""
+
+    def __init__(
+        self,
+        workers: int,
+        listen: str = '0.0.0.0',
+        port: int = 8080,
+        path: str = '/telegram',
+        secret_token: Optional[str] = None,
+        spawn: bool = True,
+        queue_size: int = 10000,
+        stop_timeout: float = 40
+    ):
+        """
+        Args:
+            workers: Number of worker processes
+            listen: Address the webhook is received on
+            port: Port the webhook is received on (workers use the following ports)
+            path: URL path Telegram posts updates to
+            secret_token: Expected X-Telegram-Bot-Api-Secret-Token, also sent to the workers
+            spawn: Start the worker processes (False = they are started elsewhere)
+            queue_size: Updates held per worker before the webhook stops answering
+            stop_timeout: Seconds a worker gets to finish its updates on stop
+        """
+        self.workers = workers
+        self.listen = listen
+        self.port = port
+        self.path = path
+        self.secret_token = secret_token
+        self.spawn = spawn
+        self.stop_timeout = stop_timeout
+        self.worker_urls = [f"http://127.0.0.1:{self.worker_port(index)}" for index in range(workers)]
+
+        self._queues: List[asyncio.Queue] = [asyncio.Queue(maxsize=queue_size) for _ in range(workers)]
+        self._processes: List[Optional[asyncio.subprocess.Process]] = [None] * workers
+        self._tasks: List[asyncio.Task] = []
+        self._session: Optional[ClientSession] = None
+        self._runner: Optional[web.AppRunner] = None
+        self._stopping = False
+
+        # Metrics
+        self.updates_received = 0
+        self.updates_rejected = 0
+        self.invalid_requests = 0
+        self.forwarded = [0] * workers
+        self.forward_retries = [0] * workers
+        self.restarts = [0] * workers
+        self.started_at: Optional[float] = None
+
+        self.app = web.Application()
+        self.app.router.add_post(path, self.handle_update)
+        self.app.router.add_get('/healthz', self.handle_health)
+        self.app.router.add_get('/readyz', self.handle_ready)
+        self.app.router.add_get('/metrics', self.handle_metrics)
+
+    def worker_port(self, index: int) -> int:
+        return self.port + 1 + index
+
+    async def start(self):
+        """Start the workers, the forwarding and the webhook server"""
+        self._session = ClientSession(timeout=ClientTimeout(total=10))
+        for index in range(self.workers):
+            if self.spawn:
+                self._tasks.append(asyncio.create_task(self._supervise(index), name=f'worker_{index}'))
+            self._tasks.append(asyncio.create_task(self._forward(index), name=f'forward_{index}'))
+
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.listen, self.port).start()
+        self.started_at = time.monotonic()
+        logger.info(f"Webhook server listening on {self.listen}:{self.port}{self.path} for {self.workers} workers")
+
+    async def stop(self):
+        """Stop receiving, hand the received updates to the workers, then stop the workers"""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(queue.join() for queue in self._queues)), self.stop_timeout
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"Dropping {sum(queue.qsize() for queue in self._queues)} updates not forwarded")
+
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self._stop_processes()
+
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        logger.info("Workers stopped")
+
+    async def set_webhook(self, token: str, url: str, max_connections: int = 40, drop_pending_updates: bool = False):
+        """
+        Register the webhook with Telegram
+
+        Args:
+            token: Bot token
+            url: Public base URL of this server (the path is appended)
+            max_connections: Parallel connections Telegram opens to deliver updates
+            drop_pending_updates: Discard updates that arrived while the bot was down
+        """
+        webhook_url = url.rstrip('/') + self.path
+        async with Bot(token) as bot:
+            await bot.set_webhook(
+                url=webhook_url,
+                secret_token=self.secret_token,
+                max_connections=max_connections,
+                allowed_updates=Update.ALL_TYPES,
+                drop_pending_updates=drop_pending_updates
+            )
+        logger.info(f"Webhook set to {webhook_url} (max {max_connections} connections)")
+
+    async def _supervise(self, index: int):
+        """Run one worker process and restart it when it exits"""
+        env = dict(os.environ, WORKER_ID=str(index))
+        delay = 1.0
+        while not self._stopping:
+            process = await asyncio.create_subprocess_exec(
+                sys.executable, str(BASE_DIR / 'main.py'),
+                env=env,
+                # Ctrl+C reaches only this process, which stops the workers in order
+                start_new_session=True
+            )
+            self._processes[index] = process
+            started = time.monotonic()
+            logger.info(f"Worker {index} started (pid {process.pid})")
+
+            returncode = await process.wait()
+            if self._stopping:
+                return
+            self.restarts[index] += 1
+            # Back off while a worker keeps crashing right after its start
+            delay = 1.0 if time.monotonic() - started > 60 else min(delay * 2, 30.0)
+            logger.error(f"Worker {index} exited with code {returncode}, restarting in {delay:.0f}s")
+            await asyncio.sleep(delay)
+
+    async def _stop_processes(self):
+        running = [process for process in self._processes if process is not None and process.returncode is None]
+        for process in running:
+            # Workers finish their received updates on SIGINT
+            process.send_signal(signal.SIGINT)
+        try:
+            await asyncio.wait_for(asyncio.gather(*(process.wait() for process in running)), self.stop_timeout)
+        except asyncio.TimeoutError:
+            for process in running:
+                if process.returncode is None:
+                    logger.warning(f"Killing worker process {process.pid}")
+                    process.kill()
+
+    async def _forward(self, index: int):
+        """Hand the updates of one worker over one at a time, in arrival order"""
+        queue = self._queues[index]
+        url = self.worker_urls[index] + self.path
+        headers = {SECRET_HEADER: self.secret_token} if self.secret_token else {}
+        while True:
+            body = await queue.get()
+            try:
+                delay = 0.1
+                while True:
+                    try:
+                        async with self._session.post(url, data=body, headers=headers) as response:
+                            if response.status < 500:
+                                if response.status != 200:
+                                    logger.warning(f"Worker {index} rejected an update ({response.status})")
+                                break
+                    except (ClientError, asyncio.TimeoutError):
+                        pass
+                    # Worker (re)starting: keep the update and its successors
+                    self.forward_retries[index] += 1
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, 5.0)
+                self.forwarded[index] += 1
+            finally:
+                queue.task_done()
+
+    async def handle_update(self, request: web.Request) -> web.Response:
+        """Accept one update from Telegram and queue it for its worker"""
+        if self.secret_token:
+            token = request.headers.get(SECRET_HEADER, '')
+            if not hmac.compare_digest(token, self.secret_token):
+                self.updates_rejected += 1
+                return web.Response(status=403)
+
+        body = await request.read()
+        try:
+            update = json.loads(body)
+            index = worker_index(update, self.workers)
+        except (ValueError, TypeError, AttributeError) as e:
+            self.invalid_requests += 1
+            logger.warning(f"Invalid webhook request: {e}")
+            return web.Response(status=400)
+
+        self.updates_received += 1
+        await self._queues[index].put(body)
+        return web.Response()
+
+    async def handle_health(self, request: web.Request) -> web.Response:
+        return web.Response(text='ok')
+
+    async def handle_ready(self, request: web.Request) -> web.Response:
+        """Ready when every worker is ready"""
+        for index, url in enumerate(self.worker_urls):
+            try:
+                async with self._session.get(url + '/readyz') as response:
+                    if response.status != 200:
+                        return web.Response(status=503, text=f'worker {index} not ready')
+            except (ClientError, asyncio.TimeoutError):
+                return web.Response(status=503, text=f'worker {index} unavailable')
+        return web.Response(text='ready')
+
+    async def handle_metrics(self, request: web.Request) -> web.Response:
+        stats = self.get_stats()
+        for index, url in enumerate(self.worker_urls):
+            try:
+                async with self._session.get(url + '/metrics') as response:
+                    stats['workers'][index]['metrics'] = await response.json()
+            except (ClientError, asyncio.TimeoutError, ValueError):
+                stats['workers'][index]['metrics'] = None
+        return web.Response(text=json.dumps(stats), content_type='application/json')
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Webhook and forwarding statistics"""
+        return {
+            'updates_received': self.updates_received,
+            'updates_rejected': self.updates_rejected,
+            'invalid_requests': self.invalid_requests,
+            'uptime_seconds': round(time.monotonic() - self.started_at, 1) if self.started_at else 0,
+            'workers': [
+                {
+                    'pid': process.pid if process is not None else None,
+                    'queued': self._queues[index].qsize(),
+                    'forwarded': self.forwarded[index],
+                    'forward_retries': self.forward_retries[index],
+                    'restarts': self.restarts[index],
+                }
+                for index, process in enumerate(self._processes)
+            ],
+        }
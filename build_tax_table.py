@@ -0,0 +1,55 @@
+"""
+Build or validate the precomputed income tax table
+
+Usage:
+    python build_tax_table.py build --year 2024
+    python build_tax_table.py validate --year 2024
+"""
+import argparse
+import sys
+from pathlib import Path
+from loguru import logger
+
+from bot.services.tax_calculator import GermanTaxCalculator
+from bot.services.tax_table import (
+    TAX_CLASSES,
+    build_tax_table,
+    default_table_path,
+    load_tax_table,
+    validate_tax_table
+)
+
+
+def main(argv=None) -> int:
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Build or validate the precomputed income tax table')
+    parser.add_argument('command', choices=['build', 'validate'])
+    parser.add_argument('--year', type=int, default=2024, help='Tax year')
+    parser.add_argument('--path', type=Path, default=None, help='Table file (default: data/income_tax_table_<year>.bin)')
+    args = parser.parse_args(argv)
+
+    calculator = GermanTaxCalculator(year=args.year)
+    path = args.path or default_table_path(args.year)
+
+    if args.command == 'build':
+        table = build_tax_table(calculator)
+        table.save(path)
+        logger.info(f"Wrote income tax table {path} (tariff {table.version}, zvE 0-{table.max_zve})")
+        return 0
+
+    table = load_tax_table(path, calculator.tariff)
+    if table is None:
+        return 1
+
+    mismatches = validate_tax_table(table, calculator)
+    if mismatches:
+        logger.error(f"Income tax table {path}: {mismatches} entries differ from the formula")
+        return 1
+
+    entries = len(TAX_CLASSES) * (table.max_zve + 1)
+    logger.info(f"Income tax table {path} matches the formula for all {entries} entries")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
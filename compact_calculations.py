@@ -0,0 +1,39 @@
+"""
+Rewrite stored calculation details in compact form
+
+Replaces the full result dict in tax_calculations.calculation_details with
+the compact form (inputs + tariff version) wherever the current tariff
+reproduces the stored amounts. Safe to run while the bot is running and to
+run repeatedly.
+
+Usage:
+    python compact_calculations.py
+    python compact_calculations.py --batch-size 5000
+"""
+import argparse
+import asyncio
+import sys
+
+from bot.models.database import close_db
+from bot.services.calculation_storage import compact_stored_details
+
+
+async def run(batch_size: int):
+    try:
+        await compact_stored_details(batch_size=batch_size)
+    finally:
+        await close_db()
+
+
+def main(argv=None) -> int:
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Rewrite stored calculation details in compact form')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Rows per transaction')
+    args = parser.parse_args(argv)
+
+    asyncio.run(run(args.batch_size))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
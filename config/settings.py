@@ -16,9 +16,82 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
 ADMIN_TELEGRAM_ID = int(os.getenv('ADMIN_TELEGRAM_ID', '0'))
 
+# How updates are received: polling (getUpdates loop) or webhook (in-process HTTP server)
+BOT_MODE = os.getenv('BOT_MODE', 'polling').lower()
+
+# Webhook mode: public base URL Telegram posts to and the local server address
+WEBHOOK_URL = os.getenv('WEBHOOK_URL', '')
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/telegram')
+WEBHOOK_LISTEN = os.getenv('WEBHOOK_LISTEN', '0.0.0.0')
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', '8080'))
+WEBHOOK_SECRET_TOKEN = os.getenv('WEBHOOK_SECRET_TOKEN', '')
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv('WEBHOOK_MAX_CONNECTIONS', '40'))
+
+# Updates of different users processed at the same time (1 = one after another);
+# the updates of one user are always processed in order
+CONCURRENT_UPDATES = int(os.getenv('CONCURRENT_UPDATES', '32'))
+# Seconds to finish received updates on shutdown
+SHUTDOWN_DRAIN_TIMEOUT_SECONDS = float(os.getenv('SHUTDOWN_DRAIN_TIMEOUT_SECONDS', '30'))
+
+# Webhook mode: bot processes behind one webhook. With more than one, main.py
+# receives the webhook and routes every user to the same worker process;
+# workers listen on 127.0.0.1 at WEBHOOK_PORT + 1 + worker ID
+WORKERS = int(os.getenv('WORKERS', '1'))
+# Set by main.py for its worker processes
+WORKER_ID = int(os.environ['WORKER_ID']) if os.getenv('WORKER_ID') else None
+# Seconds a worker stays leader (runs the scheduled jobs) without renewing
+LEADER_LEASE_SECONDS = int(os.getenv('LEADER_LEASE_SECONDS', '30'))
+
+# Outbound flow control for Telegram API requests (Telegram allows about 30 messages
+# per second overall, 1 per second per private chat and 20 per minute per group)
+RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+RATE_LIMIT_GLOBAL_PER_SECOND = float(os.getenv('RATE_LIMIT_GLOBAL_PER_SECOND', '30'))
+RATE_LIMIT_CHAT_PER_SECOND = float(os.getenv('RATE_LIMIT_CHAT_PER_SECOND', '1'))
+# Messages a chat may receive at once after a pause
+RATE_LIMIT_CHAT_BURST = int(os.getenv('RATE_LIMIT_CHAT_BURST', '3'))
+RATE_LIMIT_GROUP_PER_MINUTE = float(os.getenv('RATE_LIMIT_GROUP_PER_MINUTE', '20'))
+# Times a request is sent again after Telegram answered RetryAfter
+RATE_LIMIT_MAX_RETRIES = int(os.getenv('RATE_LIMIT_MAX_RETRIES', '3'))
+
+# Notify all users when the admin applies a tax update
+BROADCAST_ENABLED = os.getenv('BROADCAST_ENABLED', 'true').lower() == 'true'
+# Users read (and progress checkpointed) at a time
+BROADCAST_BATCH_SIZE = int(os.getenv('BROADCAST_BATCH_SIZE', '500'))
+# Messages in flight at the same time (the rate limiter paces them)
+BROADCAST_CONCURRENCY = int(os.getenv('BROADCAST_CONCURRENCY', '30'))
+# Minutes without checkpoint after which a running broadcast is resumed
+BROADCAST_STALE_MINUTES = float(os.getenv('BROADCAST_STALE_MINUTES', '5'))
+
+# Seconds between checks for modified locale files (0 = only reload with /reload_locales)
+LOCALE_RELOAD_INTERVAL_SECONDS = float(os.getenv('LOCALE_RELOAD_INTERVAL_SECONDS', '30'))
+
 # Database Configuration
 DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite+aiosqlite:///./data/tax_bot.db')
 
+# Apply pending Alembic migrations on startup (disable to run `alembic upgrade head` separately)
+DATABASE_MIGRATE_ON_STARTUP = os.getenv('DATABASE_MIGRATE_ON_STARTUP', 'true').lower() == 'true'
+
+# Connection pool: 'queue' keeps connections open, 'null' opens one per session
+DATABASE_POOL_MODE = os.getenv('DATABASE_POOL_MODE', 'queue').lower()
+DATABASE_POOL_SIZE = int(os.getenv('DATABASE_POOL_SIZE', '5'))
+DATABASE_MAX_OVERFLOW = int(os.getenv('DATABASE_MAX_OVERFLOW', '10'))
+DATABASE_POOL_TIMEOUT = float(os.getenv('DATABASE_POOL_TIMEOUT', '30'))
+# Seconds after which pooled connections are replaced (-1 = never)
+DATABASE_POOL_RECYCLE = int(os.getenv('DATABASE_POOL_RECYCLE', '1800'))
+# Test connections on checkout (one extra round trip, survives server restarts)
+DATABASE_POOL_PRE_PING = os.getenv('DATABASE_POOL_PRE_PING', 'false').lower() == 'true'
+
+# PostgreSQL (asyncpg) connection settings
+DATABASE_STATEMENT_CACHE_SIZE = int(os.getenv('DATABASE_STATEMENT_CACHE_SIZE', '500'))
+DATABASE_APPLICATION_NAME = os.getenv('DATABASE_APPLICATION_NAME', 'german-tax-bot')
+
+# SQLite PRAGMAs applied to every new connection
+SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE_KB = int(os.getenv('SQLITE_CACHE_SIZE_KB', str(64 * 1024)))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+
 # Tax Update Monitoring - Check every 10 minutes for updates
 CHECK_UPDATES_INTERVAL_MINUTES = int(os.getenv('CHECK_UPDATES_INTERVAL_MINUTES', '10'))
 TAX_SOURCES_CHECK_ENABLED = os.getenv('TAX_SOURCES_CHECK_ENABLED', 'true').lower() == 'true'
@@ -32,12 +105,51 @@ ELSTER_URL = os.getenv('ELSTER_URL', 'https://www.elster.de')
 LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
 LOG_FILE = os.getenv('LOG_FILE', 'logs/tax_bot.log')
 ERROR_LOG_FILE = os.getenv('ERROR_LOG_FILE', 'logs/errors.log')
+ERROR_JSON_FILE = os.getenv('ERROR_JSON_FILE', 'logs/errors_detailed.jsonl')
 ENABLE_DETAILED_ERRORS = os.getenv('ENABLE_DETAILED_ERRORS', 'true').lower() == 'true'
 ENABLE_STACK_TRACE = os.getenv('ENABLE_STACK_TRACE', 'true').lower() == 'true'
 
 # Bot Configuration
 DEFAULT_LANGUAGE = os.getenv('DEFAULT_LANGUAGE', 'de')
 MAX_CALCULATION_HISTORY = int(os.getenv('MAX_CALCULATION_HISTORY', '50'))
+HISTORY_PAGE_SIZE = int(os.getenv('HISTORY_PAGE_SIZE', '10'))
+
+# History retention job (prunes calculations beyond MAX_CALCULATION_HISTORY per user)
+HISTORY_RETENTION_ENABLED = os.getenv('HISTORY_RETENTION_ENABLED', 'true').lower() == 'true'
+HISTORY_RETENTION_INTERVAL_MINUTES = int(os.getenv('HISTORY_RETENTION_INTERVAL_MINUTES', '60'))
+HISTORY_RETENTION_CHUNK_SIZE = int(os.getenv('HISTORY_RETENTION_CHUNK_SIZE', '500'))
+HISTORY_ARCHIVE_ENABLED = os.getenv('HISTORY_ARCHIVE_ENABLED', 'false').lower() == 'true'
+HISTORY_ARCHIVE_DIR = os.getenv('HISTORY_ARCHIVE_DIR', 'data/archive')
+# SQLite space reclaim after pruning: incremental, full or off
+HISTORY_VACUUM_MODE = os.getenv('HISTORY_VACUUM_MODE', 'incremental').lower()
+
+# Calculation result cache (0 disables the cache / the expiry)
+CALCULATION_CACHE_SIZE = int(os.getenv('CALCULATION_CACHE_SIZE', '4096'))
+CALCULATION_CACHE_TTL_SECONDS = int(os.getenv('CALCULATION_CACHE_TTL_SECONDS', '3600'))
+
+# In-process cache of user profiles (language, state, admin and terms flags)
+USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', '10000'))
+
+# Storage of calculation_details: full (complete result) or compact (inputs + tariff version)
+CALCULATION_STORAGE_MODE = os.getenv('CALCULATION_STORAGE_MODE', 'compact').lower()
+
+# Write-behind queue for calculation history (false = insert in the handler)
+CALCULATION_WRITE_BEHIND = os.getenv('CALCULATION_WRITE_BEHIND', 'true').lower() == 'true'
+CALCULATION_WRITE_BATCH_SIZE = int(os.getenv('CALCULATION_WRITE_BATCH_SIZE', '100'))
+CALCULATION_WRITE_INTERVAL_MS = int(os.getenv('CALCULATION_WRITE_INTERVAL_MS', '200'))
+CALCULATION_WRITE_QUEUE_SIZE = int(os.getenv('CALCULATION_WRITE_QUEUE_SIZE', '10000'))
+# Retries of a failed batch (backoff from 100 ms, doubled per retry)
+CALCULATION_WRITE_RETRIES = int(os.getenv('CALCULATION_WRITE_RETRIES', '5'))
+
+# Persistence of conversation states and user_data across restarts
+PERSISTENCE_ENABLED = os.getenv('PERSISTENCE_ENABLED', 'true').lower() == 'true'
+# Changes are written in one batch per interval (at most this many seconds are lost on a crash)
+PERSISTENCE_UPDATE_INTERVAL_SECONDS = float(os.getenv('PERSISTENCE_UPDATE_INTERVAL_SECONDS', '5'))
+# Conversations and user_data untouched for longer are not restored
+PERSISTENCE_MAX_AGE_HOURS = float(os.getenv('PERSISTENCE_MAX_AGE_HOURS', '24'))
+
+# Precomputed income tax table (build with: python build_tax_table.py build)
+TAX_TABLE_ENABLED = os.getenv('TAX_TABLE_ENABLED', 'false').lower() == 'true'
 
 # Auto-update Configuration
 AUTO_APPLY_UPDATES = os.getenv('AUTO_APPLY_UPDATES', 'false').lower() == 'true'
@@ -67,11 +179,63 @@ TAX_BRACKETS_2024 = {
         {'from': 66761, 'to': 277825, 'rate': 42},
         {'from': 277826, 'to': float('inf'), 'rate': 45},  # Reichensteuer
     ],
+    # Einkommensteuerformel (§ 32a EStG) coefficients per zone
+    'coefficients': {
+        'zone1': (922.98, 1400),  # (a * y + b) * y
+        'zone2': (181.19, 2397, 1025.38),  # (a * z + b) * z + c
+        'zone3': (0.42, 10602.13),  # rate * zvE - offset
+        'zone4': (0.45, 18936.88),
+    },
+    'child_allowance': 6384,  # Kinderfreibetrag per child (both parents)
     'solidarity_surcharge_threshold': 18130,  # Solidaritätszuschlag
     'solidarity_surcharge_rate': 5.5,
     'church_tax_rate': 8,  # or 9% depending on state
 }
 
+# Tax Brackets 2025
+TAX_BRACKETS_2025 = {
+    'basic_allowance': 12096,
+    'brackets': [
+        {'from': 0, 'to': 12096, 'rate': 0},
+        {'from': 12097, 'to': 17443, 'rate': 'progressive'},
+        {'from': 17444, 'to': 68480, 'rate': 'progressive'},
+        {'from': 68481, 'to': 277825, 'rate': 42},
+        {'from': 277826, 'to': float('inf'), 'rate': 45},
+    ],
+    'coefficients': {
+        'zone1': (932.30, 1400),
+        'zone2': (176.64, 2397, 1015.13),
+        'zone3': (0.42, 10911.92),
+        'zone4': (0.45, 19246.67),
+    },
+    'child_allowance': 6672,
+    'solidarity_surcharge_threshold': 19950,
+    'solidarity_surcharge_rate': 5.5,
+    'church_tax_rate': 8,
+}
+
+# Tax Brackets 2026
+TAX_BRACKETS_2026 = {
+    'basic_allowance': 12348,
+    'brackets': [
+        {'from': 0, 'to': 12348, 'rate': 0},
+        {'from': 12349, 'to': 17799, 'rate': 'progressive'},
+        {'from': 17800, 'to': 69878, 'rate': 'progressive'},
+        {'from': 69879, 'to': 277825, 'rate': 42},
+        {'from': 277826, 'to': float('inf'), 'rate': 45},
+    ],
+    'coefficients': {
+        'zone1': (914.51, 1400),
+        'zone2': (173.10, 2397, 1034.87),
+        'zone3': (0.42, 11135.63),
+        'zone4': (0.45, 19470.38),
+    },
+    'child_allowance': 6828,
+    'solidarity_surcharge_threshold': 20350,
+    'solidarity_surcharge_rate': 5.5,
+    'church_tax_rate': 8,
+}
+
 # Social Security Contributions 2024
 SOCIAL_SECURITY_2024 = {
     'health_insurance': 14.6,  # Krankenversicherung (employee: 7.3%)
@@ -82,6 +246,33 @@ SOCIAL_SECURITY_2024 = {
     'contribution_ceiling_east': 58800,  # BBG East
 }
 
+# Social Security Contributions 2025 (BBG unified for East and West)
+SOCIAL_SECURITY_2025 = {
+    'health_insurance': 14.6,
+    'pension_insurance': 18.6,
+    'unemployment_insurance': 2.6,
+    'care_insurance': 3.6,
+    'contribution_ceiling': 66150,
+    'contribution_ceiling_east': 66150,
+}
+
+# Social Security Contributions 2026
+SOCIAL_SECURITY_2026 = {
+    'health_insurance': 14.6,
+    'pension_insurance': 18.6,
+    'unemployment_insurance': 2.6,
+    'care_insurance': 3.6,
+    'contribution_ceiling': 69750,
+    'contribution_ceiling_east': 69750,
+}
+
+# Supported tax years and their parameters
+TAX_YEARS = {
+    2024: {'tax_brackets': TAX_BRACKETS_2024, 'social_security': SOCIAL_SECURITY_2024},
+    2025: {'tax_brackets': TAX_BRACKETS_2025, 'social_security': SOCIAL_SECURITY_2025},
+    2026: {'tax_brackets': TAX_BRACKETS_2026, 'social_security': SOCIAL_SECURITY_2026},
+}
+
 # Tax Classes (Steuerklassen) with detailed descriptions
 TAX_CLASSES = {
     1: {
@@ -462,12 +653,41 @@ PRIVATE_HEALTH_INSURANCE = {
     'description_ar': 'تأمين صحي خاص',
 }
 
+def worker_file(path: str) -> str:
+    """
+    Per-worker variant of a log file path
+
+    Args:
+        path: Log file path, e.g. logs/errors.log
+
+    Returns:
+        logs/errors.worker-<WORKER_ID>.log in a worker process, path otherwise
+    """
+    if WORKER_ID is None:
+        return path
+    file = Path(path)
+    return str(file.with_name(f"{file.stem}.worker-{WORKER_ID}{file.suffix}"))
+
+
 def validate_config():
     """Validate required configuration"""
     if not TELEGRAM_BOT_TOKEN:
         raise ValueError("TELEGRAM_BOT_TOKEN is required")
     if not ADMIN_TELEGRAM_ID:
         raise ValueError("ADMIN_TELEGRAM_ID is required")
+    if CALCULATION_STORAGE_MODE not in ('full', 'compact'):
+        raise ValueError("CALCULATION_STORAGE_MODE must be 'full' or 'compact'")
+    if BOT_MODE not in ('polling', 'webhook'):
+        raise ValueError("BOT_MODE must be 'polling' or 'webhook'")
+    if BOT_MODE == 'webhook':
+        if not WEBHOOK_URL:
+            raise ValueError("WEBHOOK_URL is required in webhook mode")
+        if not WEBHOOK_SECRET_TOKEN:
+            raise ValueError("WEBHOOK_SECRET_TOKEN is required in webhook mode")
+    if WORKERS < 1:
+        raise ValueError("WORKERS must be at least 1")
+    if WORKERS > 1 and BOT_MODE != 'webhook':
+        raise ValueError("WORKERS > 1 requires BOT_MODE=webhook")
 
     # Create necessary directories
     (BASE_DIR / 'data').mkdir(exist_ok=True)
@@ -0,0 +1,38 @@
+"""
+Switch the SQLite database to incremental auto_vacuum
+
+After that, the history retention job returns the pages of pruned rows to
+the file system (HISTORY_VACUUM_MODE=incremental). The switch takes one full
+VACUUM, which locks the database and needs up to twice its size in free disk
+space, so stop the bot first. Does nothing if the database already uses
+incremental auto_vacuum or is not SQLite.
+
+Usage:
+    python enable_incremental_vacuum.py
+"""
+import argparse
+import asyncio
+import sys
+
+from bot.models.database import close_db
+from bot.services.history_retention import history_retention
+
+
+async def run() -> bool:
+    try:
+        return await history_retention.enable_incremental_vacuum()
+    finally:
+        await close_db()
+
+
+def main(argv=None) -> int:
+    """Command line entry point"""
+    argparse.ArgumentParser(description='Switch the SQLite database to incremental auto_vacuum').parse_args(argv)
+
+    if not asyncio.run(run()):
+        print("Nothing to do: not SQLite, or incremental auto_vacuum is already enabled")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,6 +3,8 @@ German Tax Calculator Telegram Bot
 Main entry point
 """
 import asyncio
+import signal
+from datetime import datetime
 from telegram import Update
 from telegram.ext import (
     Application,
@@ -56,15 +58,27 @@ from bot.handlers.calculation import (
     CHURCH_TAX
 )
 from bot.handlers.settings import settings_menu, language_menu, set_language
-from bot.handlers.admin import approve_update, reject_update, send_update_notification
-from bot.handlers.history import show_history
+from bot.handlers.admin import approve_update, reject_update, send_update_notification, reload_locales
+from bot.handlers.history import show_history, HISTORY_PATTERN
 
 # Import services
 from bot.services.tax_update_monitor import tax_update_monitor
+from bot.services.calculation_writer import calculation_writer
+from bot.services.user_cache import user_cache
+from bot.services.history_retention import history_retention
+from bot.services.persistence import bot_persistence
+from bot.services.broadcast import broadcast_service
 from bot.models.database import init_db, close_db
+from bot.services.leader_election import scheduler_lease
+from bot.webhook import WebhookServer
+from bot.update_processor import PerUserUpdateProcessor
+from bot.rate_limiter import PriorityRateLimiter
+from bot.workers import WorkerSupervisor
 
 # Import error tracking
 from bot.utils.error_tracker import error_tracker, track_error
+from bot.utils.keyboards import keyboards
+from bot.utils import i18n
 
 
 def setup_logging():
@@ -81,7 +95,7 @@ def setup_logging():
 
     # Main log file
     logger.add(
-        settings.LOG_FILE,
+        settings.worker_file(settings.LOG_FILE),
         rotation="10 MB",
         retention="30 days",
         level=settings.LOG_LEVEL,
@@ -91,7 +105,7 @@ def setup_logging():
 
     # Error-specific log file with detailed information
     logger.add(
-        settings.ERROR_LOG_FILE,
+        settings.worker_file(settings.ERROR_LOG_FILE),
         rotation="5 MB",
         retention="90 days",
         level="ERROR",
@@ -172,24 +186,48 @@ async def error_handler(update: Update, context):
             logger.error(f"Failed to send error message: {e}")
 
 
-async def main():
-    """Main function to run the bot"""
-    # Validate configuration
-    settings.validate_config()
-
-    # Setup logging
-    setup_logging()
-    logger.info("🚀 Starting German Tax Calculator Bot...")
-
-    # Show previous error statistics
-    show_error_statistics()
-
-    # Initialize database
-    await init_db()
-    logger.info("Database initialized")
-
-    # Create application
-    application = Application.builder().token(settings.TELEGRAM_BOT_TOKEN).build()
+async def stop_background_work(app):
+    """Stop scheduled jobs and running broadcasts while the bot can still send"""
+    scheduler = app.bot_data.pop('scheduler', None)
+    if scheduler is not None:
+        scheduler.shutdown(wait=False)
+    # Running broadcasts continue from their checkpoint after the restart
+    await broadcast_service.stop()
+
+
+def build_application(token: str = None, base_url: str = None) -> Application:
+    """
+    Create the Application with all handlers
+
+    Args:
+        token: Bot token (default: TELEGRAM_BOT_TOKEN)
+        base_url: Bot API base URL (default: api.telegram.org)
+
+    Returns:
+        Application, not initialized yet
+    """
+    builder = Application.builder().token(token or settings.TELEGRAM_BOT_TOKEN)
+    if base_url:
+        builder = builder.base_url(base_url)
+    if settings.PERSISTENCE_ENABLED:
+        # Calculations in progress survive restarts
+        builder = builder.persistence(bot_persistence)
+    if settings.CONCURRENT_UPDATES > 1:
+        # Different users in parallel, the updates of each user in order
+        builder = builder.concurrent_updates(PerUserUpdateProcessor(settings.CONCURRENT_UPDATES))
+    if settings.RATE_LIMIT_ENABLED:
+        builder = builder.rate_limiter(PriorityRateLimiter(
+            # Every worker gets its share of the global limit; a chat is always served by one worker
+            global_per_second=settings.RATE_LIMIT_GLOBAL_PER_SECOND / settings.WORKERS,
+            chat_per_second=settings.RATE_LIMIT_CHAT_PER_SECOND,
+            chat_burst=settings.RATE_LIMIT_CHAT_BURST,
+            group_per_minute=settings.RATE_LIMIT_GROUP_PER_MINUTE,
+            max_retries=settings.RATE_LIMIT_MAX_RETRIES
+        ))
+    if settings.BOT_MODE == 'webhook':
+        # Updates arrive through bot.webhook.WebhookServer
+        builder = builder.updater(None)
+    application = builder.build()
 
     # Conversation handler for tax calculation
     calculation_conv = ConversationHandler(
@@ -210,6 +248,7 @@ async def main():
         },
         fallbacks=[CallbackQueryHandler(cancel_calculation, pattern='^main_menu$')],
         name="tax_calculation",
+        persistent=settings.PERSISTENCE_ENABLED,
         allow_reentry=True,
         per_chat=True,
         per_user=True,
@@ -231,11 +270,12 @@ async def main():
     application.add_handler(CallbackQueryHandler(settings_menu, pattern='^settings$'))
     application.add_handler(CallbackQueryHandler(language_menu, pattern='^change_language$'))
     application.add_handler(CallbackQueryHandler(set_language, pattern='^lang_'))
-    application.add_handler(CallbackQueryHandler(show_history, pattern='^history$'))
+    application.add_handler(CallbackQueryHandler(show_history, pattern=HISTORY_PATTERN))
 
     # Admin handlers
     application.add_handler(CallbackQueryHandler(approve_update, pattern='^approve_update_'))
     application.add_handler(CallbackQueryHandler(reject_update, pattern='^reject_update_'))
+    application.add_handler(CommandHandler('reload_locales', reload_locales))
 
     # Calculation conversation handler
     application.add_handler(calculation_conv)
@@ -246,7 +286,24 @@ async def main():
     # Register cleanup handler
     async def post_shutdown(app):
         """Cleanup after bot shutdown"""
+        # No jobs may run once the lease is released and the engine disposed
+        # (main() already did this before Application.stop)
+        await stop_background_work(app)
+        # Write queued calculations before the connections go away
+        await calculation_writer.stop()
+        if settings.WORKERS > 1:
+            # Another worker takes over the scheduled jobs right away
+            await scheduler_lease.release()
+            logger.info(f"Scheduler lease: {scheduler_lease.get_stats()}")
         await close_db()
+        logger.info(f"User cache: {user_cache.get_stats()}")
+        if settings.PERSISTENCE_ENABLED:
+            logger.info(f"Persistence: {bot_persistence.get_stats()}")
+        if isinstance(app.update_processor, PerUserUpdateProcessor):
+            logger.info(f"Update processing: {app.update_processor.get_stats()}")
+        logger.info(f"Broadcasts: {broadcast_service.get_stats()}")
+        if isinstance(app.bot.rate_limiter, PriorityRateLimiter):
+            logger.info(f"Outbound rate limiting: {app.bot.rate_limiter.get_stats()}")
         logger.info("Database connections closed")
 
     application.post_shutdown = post_shutdown
@@ -254,27 +311,167 @@ async def main():
     # Setup scheduler for tax updates monitoring after initialization
     async def post_init(app):
         """Initialize scheduler after event loop is ready"""
+        if settings.CALCULATION_WRITE_BEHIND:
+            await calculation_writer.start()
+
+        logger.info(f"Built {keyboards.warm()} keyboards")
+
+        scheduler = AsyncIOScheduler()
+
+        # With several workers the jobs only run on the one holding the lease
+        def scheduled(job):
+            return scheduler_lease.leader_only(job) if settings.WORKERS > 1 else job
+
         if settings.TAX_SOURCES_CHECK_ENABLED:
-            scheduler = AsyncIOScheduler()
             scheduler.add_job(
-                check_tax_updates,
+                scheduled(check_tax_updates),
                 'interval',
                 minutes=settings.CHECK_UPDATES_INTERVAL_MINUTES,
                 args=[app],
                 id='tax_updates_check'
             )
-            scheduler.start()
             logger.info(f"Tax updates monitoring enabled (every {settings.CHECK_UPDATES_INTERVAL_MINUTES} minutes)")
 
+        if settings.HISTORY_RETENTION_ENABLED and settings.MAX_CALCULATION_HISTORY > 0:
+            scheduler.add_job(
+                scheduled(history_retention.run),
+                'interval',
+                minutes=settings.HISTORY_RETENTION_INTERVAL_MINUTES,
+                id='history_retention',
+                max_instances=1
+            )
+            logger.info(
+                f"History retention enabled ({settings.MAX_CALCULATION_HISTORY} calculations per user, "
+                f"every {settings.HISTORY_RETENTION_INTERVAL_MINUTES} minutes)"
+            )
+
+        if settings.BROADCAST_ENABLED:
+            scheduler.add_job(
+                scheduled(broadcast_service.resume_stale),
+                'interval',
+                minutes=1,
+                args=[app.bot],
+                id='broadcast_resume',
+                max_instances=1,
+                next_run_time=datetime.now()
+            )
+
+        if settings.LOCALE_RELOAD_INTERVAL_SECONDS > 0:
+            # Not leader-only: every worker holds its own translations
+            scheduler.add_job(
+                i18n.reload_async,
+                'interval',
+                seconds=settings.LOCALE_RELOAD_INTERVAL_SECONDS,
+                id='locale_reload',
+                max_instances=1
+            )
+
+        if scheduler.get_jobs():
+            if settings.WORKERS > 1:
+                await scheduler_lease.renew()
+                scheduler.add_job(
+                    scheduler_lease.renew,
+                    'interval',
+                    seconds=scheduler_lease.renew_interval,
+                    id='scheduler_lease',
+                    max_instances=1
+                )
+            scheduler.start()
+            # Shut down by stop_background_work
+            app.bot_data['scheduler'] = scheduler
+
     application.post_init = post_init
 
+    return application
+
+
+async def run_workers():
+    """Receive the webhook and route the updates to WORKERS worker processes"""
+    supervisor = WorkerSupervisor(
+        settings.WORKERS,
+        listen=settings.WEBHOOK_LISTEN,
+        port=settings.WEBHOOK_PORT,
+        path=settings.WEBHOOK_PATH,
+        secret_token=settings.WEBHOOK_SECRET_TOKEN,
+        # Workers drain their own queues before they exit
+        stop_timeout=settings.SHUTDOWN_DRAIN_TIMEOUT_SECONDS + 10
+    )
+
+    stop = asyncio.Event()
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set)
+    except NotImplementedError:
+        # Windows
+        pass
+
+    await supervisor.start()
+    try:
+        await supervisor.set_webhook(
+            settings.TELEGRAM_BOT_TOKEN, settings.WEBHOOK_URL, settings.WEBHOOK_MAX_CONNECTIONS
+        )
+        await stop.wait()
+        logger.info("Received stop signal")
+    finally:
+        await supervisor.stop()
+
+
+async def main():
+    """Main function to run the bot"""
+    # Validate configuration
+    settings.validate_config()
+
+    # Setup logging
+    setup_logging()
+    logger.info("🚀 Starting German Tax Calculator Bot...")
+
+    # Show previous error statistics
+    show_error_statistics()
+
+    # Initialize database
+    await init_db()
+    logger.info("Database initialized")
+
+    if settings.WORKERS > 1 and settings.WORKER_ID is None:
+        # The worker processes open their own connections
+        await close_db()
+        await run_workers()
+        return
+
+    # Create application
+    application = build_application()
+
     # Start bot
     logger.info("Bot started successfully!")
 
     # Initialize and run
     await application.initialize()
+    # post_init/post_shutdown are only called by run_polling/run_webhook
+    await application.post_init(application)
     await application.start()
-    await application.updater.start_polling(allowed_updates=Update.ALL_TYPES)
+
+    webhook_server = None
+    if settings.BOT_MODE == 'webhook' and settings.WORKER_ID is not None:
+        # Worker process: updates come from the supervisor (bot.workers)
+        webhook_server = WebhookServer(
+            application,
+            listen='127.0.0.1',
+            port=settings.WEBHOOK_PORT + 1 + settings.WORKER_ID,
+            path=settings.WEBHOOK_PATH,
+            secret_token=settings.WEBHOOK_SECRET_TOKEN
+        )
+        await webhook_server.start()
+    elif settings.BOT_MODE == 'webhook':
+        webhook_server = WebhookServer(
+            application,
+            listen=settings.WEBHOOK_LISTEN,
+            port=settings.WEBHOOK_PORT,
+            path=settings.WEBHOOK_PATH,
+            secret_token=settings.WEBHOOK_SECRET_TOKEN
+        )
+        await webhook_server.start()
+        await webhook_server.set_webhook(settings.WEBHOOK_URL, settings.WEBHOOK_MAX_CONNECTIONS)
+    else:
+        await application.updater.start_polling(allowed_updates=Update.ALL_TYPES)
 
     # Keep the bot running
     try:
@@ -283,10 +480,22 @@ async def main():
     except (KeyboardInterrupt, SystemExit):
         logger.info("Received stop signal")
     finally:
-        # Cleanup
-        await application.updater.stop()
+        # Cleanup: stop receiving updates, then finish the received ones
+        # (Application.stop drops updates still in the queue)
+        if webhook_server is not None:
+            await webhook_server.stop()
+        else:
+            await application.updater.stop()
+        try:
+            await asyncio.wait_for(application.update_queue.join(), settings.SHUTDOWN_DRAIN_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            logger.warning(f"Dropping {application.update_queue.qsize()} unprocessed updates")
+        # Application.stop/shutdown close the rate limiter and the HTTP client
+        # under running broadcasts; interrupt them first
+        await stop_background_work(application)
         await application.stop()
         await application.shutdown()
+        await application.post_shutdown(application)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,40 @@
+"""
+Merge the detailed error logs of all worker processes
+
+With WORKERS > 1 every worker writes its own JSONL error file
+(logs/errors_detailed.worker-<id>.jsonl). This writes one file with the
+errors of all workers in time order.
+
+Usage:
+    python merge_error_logs.py
+    python merge_error_logs.py --output logs/errors_merged.jsonl --last 1000
+"""
+import argparse
+import json
+import sys
+
+from config import settings
+from bot.utils.error_tracker import error_json_files, merge_error_logs
+
+
+def main(argv=None) -> int:
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Merge the JSONL error files of all workers by time')
+    parser.add_argument('--input', default=settings.ERROR_JSON_FILE, help='Base JSONL error file')
+    parser.add_argument('--output', default='logs/errors_merged.jsonl', help='Merged JSONL file')
+    parser.add_argument('--last', type=int, default=None, help='Only the most recent errors')
+    args = parser.parse_args(argv)
+
+    files = error_json_files(args.input)
+    errors = merge_error_logs(files, args.last)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        for error in errors:
+            json.dump(error, f, ensure_ascii=False)
+            f.write('\n')
+
+    print(f"{len(errors)} errors from {len(files)} files written to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
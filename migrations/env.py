@@ -0,0 +1,61 @@
+"""
+Alembic environment
+
+Used both by the alembic command line (python -m alembic upgrade head) and
+by init_db, which passes its own connection in config.attributes.
+"""
+import asyncio
+from logging.config import fileConfig
+from alembic import context
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from config import DATABASE_URL
+from bot.models.user import Base
+import bot.models  # noqa: F401  (registers all tables on Base.metadata)
+
+config = context.config
+target_metadata = Base.metadata
+
+if config.config_file_name is not None and not config.attributes.get('connection'):
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+
+def run_migrations_offline():
+    """Emit SQL instead of running it (alembic upgrade --sql)"""
+    context.configure(
+        url=DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        render_as_batch=True,
+        transaction_per_migration=True
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def do_run_migrations(connection):
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        # SQLite needs table copies for most ALTER TABLE operations
+        render_as_batch=True,
+        # Each revision commits on its own, long backfills do not block the whole upgrade
+        transaction_per_migration=True
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_migrations_online():
+    engine = create_async_engine(DATABASE_URL, poolclass=NullPool)
+    async with engine.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+    await engine.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+elif config.attributes.get('connection') is not None:
+    do_run_migrations(config.attributes['connection'])
+else:
+    asyncio.run(run_migrations_online())
@@ -0,0 +1,87 @@
+"""Initial schema (tables as created by create_all before migrations)
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('telegram_id', sa.Integer(), nullable=False),
+        sa.Column('username', sa.String(length=255), nullable=True),
+        sa.Column('first_name', sa.String(length=255), nullable=True),
+        sa.Column('last_name', sa.String(length=255), nullable=True),
+        sa.Column('language', sa.String(length=10), nullable=False),
+        sa.Column('state', sa.String(length=2), nullable=True),
+        sa.Column('is_admin', sa.Boolean(), nullable=True),
+        sa.Column('terms_accepted', sa.Boolean(), nullable=True),
+        sa.Column('terms_accepted_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_users_telegram_id', 'users', ['telegram_id'], unique=True)
+
+    op.create_table(
+        'tax_calculations',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('gross_income', sa.Float(), nullable=False),
+        sa.Column('tax_class', sa.Integer(), nullable=False),
+        sa.Column('children', sa.Integer(), nullable=True),
+        sa.Column('church_tax', sa.Boolean(), nullable=True),
+        sa.Column('state', sa.String(length=50), nullable=True),
+        sa.Column('income_tax', sa.Float(), nullable=False),
+        sa.Column('solidarity_surcharge', sa.Float(), nullable=True),
+        sa.Column('church_tax_amount', sa.Float(), nullable=True),
+        sa.Column('health_insurance', sa.Float(), nullable=True),
+        sa.Column('pension_insurance', sa.Float(), nullable=True),
+        sa.Column('unemployment_insurance', sa.Float(), nullable=True),
+        sa.Column('care_insurance', sa.Float(), nullable=True),
+        sa.Column('total_deductions', sa.Float(), nullable=False),
+        sa.Column('net_income', sa.Float(), nullable=False),
+        sa.Column('calculation_details', sa.JSON(), nullable=True),
+        sa.Column('tax_year', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+    op.create_table(
+        'tax_updates',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(length=500), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('source_url', sa.String(length=1000), nullable=False),
+        sa.Column('source_name', sa.String(length=200), nullable=False),
+        sa.Column('update_type', sa.String(length=100), nullable=False),
+        sa.Column('changes', sa.JSON(), nullable=False),
+        sa.Column('effective_date', sa.DateTime(), nullable=True),
+        sa.Column('detected_at', sa.DateTime(), nullable=True),
+        sa.Column('admin_notified', sa.Boolean(), nullable=True),
+        sa.Column('admin_notified_at', sa.DateTime(), nullable=True),
+        sa.Column('approved_by_admin', sa.Boolean(), nullable=True),
+        sa.Column('approved_at', sa.DateTime(), nullable=True),
+        sa.Column('applied', sa.Boolean(), nullable=True),
+        sa.Column('applied_at', sa.DateTime(), nullable=True),
+        sa.Column('admin_notes', sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('tax_updates')
+    op.drop_table('tax_calculations')
+    op.drop_index('ix_users_telegram_id', table_name='users')
+    op.drop_table('users')
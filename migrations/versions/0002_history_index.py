@@ -0,0 +1,36 @@
+"""Index for keyset pagination of the calculation history
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16
+
+On PostgreSQL the index is built with CREATE INDEX CONCURRENTLY, which does
+not block writes but cannot run inside a transaction. SQLite has no online
+index build; the index creation is a single short write lock there.
+Databases created with create_all may already have the index.
+"""
+from alembic import op
+
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+INDEX_NAME = 'ix_tax_calculations_user_created'
+COLUMNS = ['user_id', 'created_at', 'id']
+
+
+def upgrade():
+    if op.get_context().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.create_index(
+                INDEX_NAME, 'tax_calculations', COLUMNS,
+                if_not_exists=True, postgresql_concurrently=True
+            )
+    else:
+        op.create_index(INDEX_NAME, 'tax_calculations', COLUMNS, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index(INDEX_NAME, table_name='tax_calculations', if_exists=True)
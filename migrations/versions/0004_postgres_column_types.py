@@ -0,0 +1,37 @@
+"""Column types for PostgreSQL: 64-bit Telegram IDs, longer state codes
+
+Revision ID: 0004
+Revises: 0002
+Create Date: 2026-10-16
+
+Telegram user IDs do not fit into a 32-bit INTEGER and state codes such as
+BE_WEST are longer than two characters. SQLite stores both as they are
+(integers are 64-bit, VARCHAR lengths are not enforced), so the columns are
+only altered on other databases and SQLite tables are not copied. On
+PostgreSQL the users table is rewritten under a short exclusive lock; it is
+small compared to tax_calculations, which is not touched.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0004'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_context().dialect.name == 'sqlite':
+        return
+
+    op.alter_column('users', 'telegram_id', type_=sa.BigInteger(), existing_type=sa.Integer(), existing_nullable=False)
+    op.alter_column('users', 'state', type_=sa.String(length=10), existing_type=sa.String(length=2))
+
+
+def downgrade():
+    if op.get_context().dialect.name == 'sqlite':
+        return
+
+    op.alter_column('users', 'state', type_=sa.String(length=2), existing_type=sa.String(length=10))
+    op.alter_column('users', 'telegram_id', type_=sa.Integer(), existing_type=sa.BigInteger(), existing_nullable=False)
@@ -0,0 +1,42 @@
+"""Tables of the bot persistence (conversation states and user_data)
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'conversation_states',
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('key', sa.String(length=100), nullable=False),
+        sa.Column('state', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('name', 'key')
+    )
+    op.create_index('ix_conversation_states_updated_at', 'conversation_states', ['updated_at'])
+
+    op.create_table(
+        'user_data',
+        sa.Column('user_id', sa.BigInteger(), nullable=False),
+        sa.Column('data', sa.JSON(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_index('ix_user_data_updated_at', 'user_data', ['updated_at'])
+
+
+def downgrade():
+    op.drop_index('ix_user_data_updated_at', table_name='user_data')
+    op.drop_table('user_data')
+    op.drop_index('ix_conversation_states_updated_at', table_name='conversation_states')
+    op.drop_table('conversation_states')
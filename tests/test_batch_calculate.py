@@ -0,0 +1,85 @@
+"""
+Tests for the bulk CSV calculation
+"""
+import csv
+import pytest
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import batch_calculate
+from bot.services.tax_calculator import GermanTaxCalculator
+
+HEADER = 'employee,annual_gross,tax_class,kinderfreibetrag,church_tax,state\n'
+
+
+def _write(tmp_path, rows: str):
+    input_path = tmp_path / 'payroll.csv'
+    input_path.write_text(HEADER + rows, encoding='utf-8')
+    return input_path, tmp_path / 'results.csv'
+
+
+def _run(tmp_path, rows: str):
+    input_path, output_path = _write(tmp_path, rows)
+    code = batch_calculate.main([str(input_path), str(output_path), '--workers', '1', '--chunk-size', '2'])
+    return code, output_path
+
+
+def test_results_match_calculator(tmp_path):
+    """Test that every output row equals calculate_net_income"""
+    code, output_path = _run(tmp_path, 'a,45000,1,0,false,BE_WEST\nb,60000.5,3,2,ja,BY\n\nc,12000,6,0,no,HH\n')
+
+    assert code == 0
+    with open(output_path, newline='', encoding='utf-8') as f:
+        output = list(csv.DictReader(f))
+    assert [row['employee'] for row in output] == ['a', 'b', 'c']
+
+    calculator = GermanTaxCalculator()
+    for row in output:
+        expected = calculator.calculate_net_income(
+            annual_gross=float(row['annual_gross']),
+            tax_class=int(row['tax_class']),
+            kinderfreibetrag=float(row['kinderfreibetrag']),
+            church_tax=row['church_tax'] in ('ja',),
+            state=row['state']
+        ).to_dict()
+        for name in batch_calculate.RESULT_COLUMNS:
+            field = 'church_tax' if name == 'church_tax_amount' else name
+            assert row[name] == f"{expected[field]:.2f}"
+
+
+def test_short_row_is_reported(tmp_path):
+    """Test that a row with missing columns fails with its number and leaves no output"""
+    input_path, output_path = _write(tmp_path, 'a,45000,1,0,false,BE_WEST\nb,60000,3,0,false,BY\nc,12000\n')
+
+    with pytest.raises(ValueError, match='row 3: expected 6 columns, got 2'):
+        batch_calculate.run(str(input_path), str(output_path), workers=1, chunk_size=2)
+
+    assert not output_path.exists()
+    assert not Path(f"{output_path}.partial").exists()
+
+
+def test_bad_number_is_reported(tmp_path):
+    """Test that a value that is not a number fails with its row number"""
+    input_path, output_path = _write(tmp_path, 'a,45000,1,0,false,BE_WEST\nb,60000,3,0,false,BY\nc,12k,1,0,false,BY\n')
+
+    with pytest.raises(ValueError, match="row 3: annual_gross is not a number: '12k'"):
+        batch_calculate.run(str(input_path), str(output_path), workers=1, chunk_size=2)
+
+    assert not output_path.exists()
+
+
+def test_failed_run_keeps_previous_output(tmp_path):
+    """Test that an existing output file is only replaced by a complete run"""
+    (tmp_path / 'results.csv').write_text('previous\n', encoding='utf-8')
+
+    code, output_path = _run(tmp_path, 'a,45000\n')
+
+    assert code == 1
+    assert output_path.read_text(encoding='utf-8') == 'previous\n'
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,39 @@
+"""
+Tests for the benchmark runner
+"""
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.run_benchmarks import BENCHMARKS, compare_results, load_baseline, measure
+
+
+def test_regression_threshold():
+    """Test that only throughput losses beyond the threshold are reported"""
+    baseline = {
+        'fast': {'ops_per_sec': 1000.0},
+        'slow': {'ops_per_sec': 1000.0},
+    }
+    results = {
+        'fast': {'ops_per_sec': 850.0},
+        'slow': {'ops_per_sec': 700.0},
+        'new': {'ops_per_sec': 10.0},
+    }
+
+    assert compare_results(results, baseline, threshold=20) == ['slow']
+    assert compare_results(results, baseline, threshold=10) == ['fast', 'slow']
+
+
+def test_baseline_covers_benchmarks():
+    """Test that every registered benchmark is gated by the stored baseline"""
+    assert set(BENCHMARKS) <= set(load_baseline())
+
+
+def test_benchmarks_run():
+    """Test that every registered benchmark can be set up and timed"""
+    for name, setup in BENCHMARKS.items():
+        func, operations = setup()
+        result = measure(func, operations, repeat=1, min_time=0)
+        assert result['ops_per_sec'] > 0, name
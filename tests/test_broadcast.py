@@ -0,0 +1,112 @@
+"""
+Tests for the resumable broadcast
+"""
+import asyncio
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from telegram.error import Forbidden
+
+from bot.models.broadcast import Broadcast
+from bot.models.database import create_db_engine
+from bot.models.user import Base, User
+from bot.services.broadcast import BroadcastService
+
+LANGUAGES = ['de', 'en', 'ar', 'tr']
+
+
+class FakeBot:
+    """Records sent messages; users in `blocked` have blocked the bot"""
+
+    def __init__(self, blocked=(), fail_after=None):
+        self.rate_limiter = None
+        self.blocked = set(blocked)
+        self.fail_after = fail_after
+        self.messages = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        if self.fail_after is not None and len(self.messages) >= self.fail_after:
+            raise RuntimeError('connection lost')
+        if chat_id in self.blocked:
+            raise Forbidden('bot was blocked by the user')
+        self.messages.append((chat_id, text))
+
+
+async def _broadcast(url: str):
+    engine = create_db_engine(url, 'queue')
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with sessions() as session:
+        for index in range(23):
+            session.add(User(
+                telegram_id=1000 + index,
+                language=LANGUAGES[index % len(LANGUAGES)],
+                # Users who never finished onboarding are skipped
+                terms_accepted=index != 7
+            ))
+        await session.commit()
+
+    service = BroadcastService(sessions, batch_size=5, concurrency=3)
+    params = {'title': 'Grundfreibetrag 2026', 'effective_date': '01.01.2026', 'url': 'https://bmf.de'}
+    broadcast_id = await service.create('tax_update_broadcast', params, tax_update_id=1)
+
+    # First attempt dies in the third batch
+    first_bot = FakeBot(blocked={1003}, fail_after=12)
+    try:
+        await service.run(first_bot, broadcast_id)
+    except RuntimeError:
+        pass
+    async with sessions() as session:
+        checkpoint = await session.get(Broadcast, broadcast_id)
+
+    # Resumed from the checkpoint by another worker
+    async with sessions() as session:
+        await session.execute(
+            update(Broadcast).values(updated_at=datetime.utcnow() - timedelta(minutes=10))
+        )
+        await session.commit()
+    second_bot = FakeBot(blocked={1003})
+    other_worker = BroadcastService(sessions, batch_size=5, concurrency=3)
+    resumed = await other_worker.resume_stale(second_bot)
+    resumed_again = await service.resume_stale(second_bot)
+    await asyncio.gather(*other_worker._tasks.values())
+
+    async with sessions() as session:
+        final = await session.get(Broadcast, broadcast_id)
+    await engine.dispose()
+    return first_bot, checkpoint, second_bot, resumed, resumed_again, final, other_worker.last_run
+
+
+def test_broadcast_resumes_from_checkpoint(tmp_path):
+    """Test that an interrupted broadcast continues after its last complete batch"""
+    first_bot, checkpoint, second_bot, resumed, resumed_again, final, last_run = asyncio.run(
+        _broadcast(f"sqlite+aiosqlite:///{tmp_path}/test.db")
+    )
+
+    # Two complete batches (users 1-5, 6-10 without user 8) were checkpointed
+    assert checkpoint.status == 'running'
+    assert checkpoint.last_user_id == 11
+    assert checkpoint.sent == 9 and checkpoint.blocked == 1
+
+    assert resumed == [final.id] and resumed_again == []
+    assert final.status == 'completed'
+    assert final.total == 22
+    assert final.sent == 21 and final.blocked == 1 and final.failed == 0
+    # The resumed run starts after the checkpoint, messages go to the admin at the end
+    recipients = [chat_id for chat_id, _ in second_bot.messages]
+    assert min(recipients[:-1]) > 1000 + 10
+    assert len(recipients[:-1]) == 12
+
+    # Rendered per language with the parameters
+    texts = {chat_id: text for chat_id, text in first_bot.messages + second_bot.messages}
+    assert 'Grundfreibetrag 2026' in texts[1000] and 'Gültig ab' in texts[1000]
+    assert 'Effective from' in texts[1001]
+    assert last_run['languages'] == 4
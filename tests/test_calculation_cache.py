@@ -0,0 +1,84 @@
+"""
+Tests for the calculation result cache
+"""
+import pytest
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bot.services.calculation_cache import CalculationCache
+from bot.services.tax_calculator import GermanTaxCalculator
+
+
+def test_cached_results_match_uncached():
+    """Test that cached and uncached calculators return the same result"""
+    cached = GermanTaxCalculator(cache=CalculationCache(maxsize=16))
+    uncached = GermanTaxCalculator()
+
+    first = cached.calculate_net_income(annual_gross=45000, tax_class=1)
+    second = cached.calculate_net_income(annual_gross=45000.0, tax_class=1)
+
+    assert first == second == uncached.calculate_net_income(annual_gross=45000, tax_class=1)
+    assert cached.cache.hits == 1
+    assert cached.cache.misses == 1
+
+
+def test_shared_result_cannot_be_modified():
+    """Test that callers cannot corrupt the cached result"""
+    calculator = GermanTaxCalculator(cache=CalculationCache(maxsize=16))
+
+    result = calculator.calculate_net_income(annual_gross=45000, tax_class=1)
+    with pytest.raises(TypeError):
+        result['net_annual'] = 0
+    with pytest.raises(AttributeError):
+        result.net_annual = 0
+
+    details = result.to_dict()
+    details['net_annual'] = 0
+
+    assert calculator.calculate_net_income(annual_gross=45000, tax_class=1)['net_annual'] > 0
+
+
+def test_lru_eviction():
+    """Test that the least recently used entry is evicted"""
+    cache = CalculationCache(maxsize=2, ttl_seconds=0)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.get('a')
+    cache.put('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.evictions == 1
+
+
+def test_ttl_expiry(monkeypatch):
+    """Test that entries expire after their time-to-live"""
+    import bot.services.calculation_cache as module
+
+    now = [1000.0]
+    monkeypatch.setattr(module.time, 'monotonic', lambda: now[0])
+
+    cache = CalculationCache(maxsize=4, ttl_seconds=10)
+    cache.put('a', 1)
+    now[0] += 11
+
+    assert cache.get('a') is None
+    assert cache.expirations == 1
+
+
+def test_reload_tariff_invalidates_cache():
+    """Test that reloading the tariff drops cached results"""
+    calculator = GermanTaxCalculator(cache=CalculationCache(maxsize=16))
+    calculator.calculate_net_income(annual_gross=45000, tax_class=1)
+
+    calculator.reload_tariff()
+
+    assert len(calculator.cache) == 0
+    assert calculator.cache.get_stats()['invalidations'] == 1
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,113 @@
+"""
+Tests for compact calculation storage
+"""
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from bot.models.database import create_db_engine
+from bot.models.user import Base, User
+from bot.models.calculation import TaxCalculation
+from bot.services.calculation_storage import compact_stored_details, details_for_storage, is_compact, load_details
+from bot.services.tax_calculator import tax_calculator
+
+PROFILE = {
+    'tax_class': 3,
+    'children': 2,
+    'kinderfreibetrag': 1.5,
+    'church_tax': True,
+    'state': 'BY',
+    'employment_type': 'standard',
+    'age_group': 'over_23_with_children',
+    'health_insurance_company': 'aok',
+}
+
+
+def _row(annual_gross: float, mode: str) -> TaxCalculation:
+    result = tax_calculator.calculate_net_income(annual_gross, **PROFILE)
+    return TaxCalculation(
+        gross_income=result.gross_annual,
+        tax_class=PROFILE['tax_class'],
+        children=PROFILE['children'],
+        church_tax=PROFILE['church_tax'],
+        state=PROFILE['state'],
+        income_tax=result.income_tax,
+        solidarity_surcharge=result.solidarity_surcharge,
+        church_tax_amount=result.church_tax,
+        health_insurance=result.health_insurance,
+        pension_insurance=result.pension_insurance,
+        unemployment_insurance=result.unemployment_insurance,
+        care_insurance=result.care_insurance,
+        total_deductions=result.total_deductions,
+        net_income=result.net_annual,
+        calculation_details=details_for_storage(result, annual_gross, tax_calculator.tariff.version, mode),
+        tax_year=2024
+    )
+
+
+def test_compact_details_are_recomputed():
+    """Test that compact rows load the same details as full rows"""
+    for annual_gross in (45000, 3333.33 * 12, 120000.5):
+        full = _row(annual_gross, 'full')
+        compact = _row(annual_gross, 'compact')
+
+        assert is_compact(compact.calculation_details)
+        assert len(json.dumps(compact.calculation_details)) < len(json.dumps(full.calculation_details)) / 2
+        assert load_details(compact) == load_details(full) == full.calculation_details
+        assert compact.details == full.calculation_details
+
+
+def test_changed_tariff_uses_stored_amounts():
+    """Test that rows of an outdated tariff are not re-priced"""
+    calc = _row(45000, 'compact')
+    calc.calculation_details['tariff_version'] = '2024-outdated'
+    calc.income_tax += 100
+
+    details = load_details(calc)
+
+    assert details['income_tax'] == calc.income_tax
+    assert details['net_annual'] == calc.net_income
+
+
+async def _compact_existing(url: str):
+    engine = create_db_engine(url, 'queue')
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with sessions() as session:
+        user = User(telegram_id=1)
+        session.add(user)
+        await session.flush()
+        rows = [_row(30000 + i * 1000, 'full') for i in range(5)]
+        # Amounts the current tariff does not reproduce
+        rows[2].income_tax += 1
+        for row in rows:
+            row.user_id = user.id
+        session.add_all(rows)
+        await session.commit()
+
+    stats = await compact_stored_details(sessions, batch_size=2)
+    again = await compact_stored_details(sessions, batch_size=2)
+
+    async with sessions() as session:
+        stored = (await session.execute(select(TaxCalculation).order_by(TaxCalculation.id))).scalars().all()
+    await engine.dispose()
+    return stats, again, stored
+
+
+def test_rewrite_existing_rows(tmp_path):
+    """Test the batched rewrite of full details"""
+    stats, again, stored = asyncio.run(_compact_existing(f"sqlite+aiosqlite:///{tmp_path}/test.db"))
+
+    assert stats == {'scanned': 5, 'compacted': 4, 'kept': 1}
+    assert again['compacted'] == 0
+    assert [is_compact(calc.calculation_details) for calc in stored] == [True, True, False, True, True]
+    assert stored[0].details['net_annual'] == stored[0].net_income
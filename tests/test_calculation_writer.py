@@ -0,0 +1,125 @@
+"""
+Tests for the write-behind calculation writer
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from bot.models.database import create_db_engine
+from bot.models.user import Base, User
+from bot.models.calculation import TaxCalculation
+from bot.services.calculation_writer import CalculationWriter
+
+
+def _values(gross: float) -> dict:
+    return {
+        'gross_income': gross,
+        'tax_class': 1,
+        'income_tax': gross * 0.1,
+        'total_deductions': gross * 0.3,
+        'net_income': gross * 0.7,
+        'tax_year': 2024,
+    }
+
+
+async def _run_writer(url: str, started: bool):
+    engine = create_db_engine(url, 'queue')
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with sessions() as session:
+        session.add_all([User(telegram_id=1), User(telegram_id=2)])
+        await session.commit()
+
+    writer = CalculationWriter(sessions, batch_size=50, flush_interval_ms=1000)
+    if started:
+        await writer.start()
+
+    for i in range(10):
+        await writer.submit(1 + i % 2, _values(30000 + i))
+    await writer.submit(999, _values(1))  # unknown user
+    await writer.stop()
+
+    async with sessions() as session:
+        count = await session.scalar(select(func.count()).select_from(TaxCalculation))
+    await engine.dispose()
+    return writer.get_stats(), count
+
+
+def test_queued_records_are_flushed_in_one_batch(tmp_path):
+    """Test that stop() writes all queued records with one INSERT batch"""
+    stats, count = asyncio.run(_run_writer(f"sqlite+aiosqlite:///{tmp_path}/test.db", started=True))
+
+    assert count == 10
+    assert stats['batches'] == 1
+    assert stats['written'] == 10
+    assert stats['skipped'] == 1
+    assert stats['queue_depth'] == 0
+
+
+def test_direct_write_when_not_started(tmp_path):
+    """Test that records are written immediately without the background task"""
+    stats, count = asyncio.run(_run_writer(f"sqlite+aiosqlite:///{tmp_path}/test.db", started=False))
+
+    assert count == 10
+    assert stats['batches'] == 11
+    assert not stats['running']
+
+
+async def _run_failing_writer(url: str, failures: int):
+    engine = create_db_engine(url, 'queue')
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with sessions() as session:
+        session.add(User(telegram_id=1))
+        await session.commit()
+
+    attempts = []
+
+    def flaky_sessions():
+        attempts.append(1)
+        if len(attempts) <= failures:
+            raise OperationalError('INSERT INTO tax_calculations', {}, Exception('database is locked'))
+        return sessions()
+
+    writer = CalculationWriter(flaky_sessions, batch_size=50, flush_interval_ms=1000, max_retries=3, retry_delay_ms=1)
+    await writer.start()
+    for i in range(5):
+        await writer.submit(1, _values(30000 + i))
+    await writer.stop()
+
+    async with sessions() as session:
+        count = await session.scalar(select(func.count()).select_from(TaxCalculation))
+    await engine.dispose()
+    return writer.get_stats(), count, len(attempts)
+
+
+def test_transient_error_is_retried(tmp_path):
+    """Test that a batch is written after a 'database is locked' error"""
+    stats, count, attempts = asyncio.run(_run_failing_writer(f"sqlite+aiosqlite:///{tmp_path}/test.db", failures=2))
+
+    assert count == 5
+    assert attempts == 3
+    assert stats['retries'] == 2
+    assert stats['written'] == 5
+    assert stats['failed'] == 0
+
+
+def test_batch_fails_after_retries(tmp_path):
+    """Test that a batch is given up once the retries are exhausted"""
+    stats, count, attempts = asyncio.run(_run_failing_writer(f"sqlite+aiosqlite:///{tmp_path}/test.db", failures=10))
+
+    assert count == 0
+    assert attempts == 4
+    assert stats['retries'] == 3
+    assert stats['failed'] == 5
@@ -0,0 +1,44 @@
+"""
+Tests for the database engine setup
+"""
+import asyncio
+import pytest
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import text
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
+
+from bot.models.database import create_db_engine
+
+
+async def _pragmas(url: str, pool_mode: str):
+    engine = create_db_engine(url, pool_mode)
+    try:
+        async with engine.connect() as conn:
+            return engine.pool, {
+                name: (await conn.execute(text(f"PRAGMA {name}"))).scalar()
+                for name in ('journal_mode', 'synchronous', 'busy_timeout')
+            }
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.parametrize('pool_mode, pool_class', [('queue', AsyncAdaptedQueuePool), ('null', NullPool)])
+def test_pool_modes_apply_sqlite_pragmas(tmp_path, pool_mode, pool_class):
+    """Test that both pool modes tune every SQLite connection"""
+    pool, pragmas = asyncio.run(_pragmas(f"sqlite+aiosqlite:///{tmp_path}/test.db", pool_mode))
+
+    assert isinstance(pool, pool_class)
+    assert pragmas['journal_mode'] == 'wal'
+    assert pragmas['synchronous'] == 1  # NORMAL
+    assert pragmas['busy_timeout'] == 5000
+
+
+def test_unknown_pool_mode():
+    """Test that an invalid DATABASE_POOL_MODE is rejected"""
+    with pytest.raises(ValueError):
+        create_db_engine('sqlite+aiosqlite:///:memory:', 'static')
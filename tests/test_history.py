@@ -0,0 +1,80 @@
+"""
+Tests for the paginated calculation history
+"""
+import asyncio
+import re
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from bot.handlers.history import HISTORY_PATTERN, decode_cursor, encode_cursor, load_history_page
+from bot.models.database import create_db_engine
+from bot.models.user import Base, User
+from bot.models.calculation import TaxCalculation
+
+
+async def _walk_pages(url: str):
+    engine = create_db_engine(url, 'queue')
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    start = datetime(2024, 1, 1)
+    async with sessions() as session:
+        user = User(telegram_id=1)
+        session.add(user)
+        await session.flush()
+        # 25 calculations, two of them with the same timestamp
+        session.add_all([
+            TaxCalculation(
+                user_id=user.id, gross_income=1000 + i, tax_class=1, income_tax=0,
+                total_deductions=0, net_income=1000 + i, tax_year=2024,
+                created_at=start + timedelta(minutes=min(i, 24 - 1))
+            )
+            for i in range(25)
+        ])
+        await session.commit()
+
+    pages = []
+    async with sessions() as session:
+        page = await load_history_page(session, user.id, page_size=10)
+        pages.append(page)
+        for direction in ('older', 'older', 'newer'):
+            calculations = pages[-1][0]
+            anchor = calculations[-1] if direction == 'older' else calculations[0]
+            page_direction, cursor = decode_cursor(encode_cursor(direction, anchor))
+            pages.append(await load_history_page(session, user.id, page_direction, cursor, page_size=10))
+
+    await engine.dispose()
+    return pages
+
+
+def test_keyset_pages(tmp_path):
+    """Test walking the history pages in both directions"""
+    pages = asyncio.run(_walk_pages(f"sqlite+aiosqlite:///{tmp_path}/test.db"))
+    incomes = [[calc.gross_income for calc in page[0]] for page in pages]
+
+    assert incomes[0] == [1024 - i for i in range(10)]
+    assert incomes[1] == [1014 - i for i in range(10)]
+    assert incomes[2] == [1004 - i for i in range(5)]
+    assert incomes[3] == incomes[1]
+
+    # (has_older, has_newer)
+    assert [page[1:] for page in pages] == [(True, False), (True, True), (False, True), (True, True)]
+
+
+def test_cursor_callback_data():
+    """Test that cursors fit Telegram's 64 byte callback data limit"""
+    calc = TaxCalculation(id=2 ** 31 - 1, created_at=datetime(2024, 12, 31, 23, 59, 59, 123456))
+    data = encode_cursor('older', calc)
+
+    assert len(data.encode()) <= 64
+    assert re.match(HISTORY_PATTERN, data)
+    assert re.match(HISTORY_PATTERN, 'history')
+    assert decode_cursor(data) == ('older', (calc.created_at, calc.id))
+    assert decode_cursor('history') == (None, None)
@@ -0,0 +1,117 @@
+"""
+Tests for the history retention job
+"""
+import asyncio
+import gzip
+import json
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from bot.models.database import create_db_engine
+from bot.models.user import Base, User
+from bot.models.calculation import TaxCalculation
+from bot.services.history_retention import HistoryRetention
+
+
+async def _prune(tmp_path, counts, incremental_db: bool = False, **options):
+    engine = create_db_engine(f"sqlite+aiosqlite:///{tmp_path}/test.db", 'queue')
+    if incremental_db:
+        assert await HistoryRetention(engine=engine).enable_incremental_vacuum()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    start = datetime(2024, 1, 1)
+    async with sessions() as session:
+        for telegram_id, count in enumerate(counts, 1):
+            user = User(telegram_id=telegram_id)
+            session.add(user)
+            await session.flush()
+            session.add_all([
+                TaxCalculation(
+                    user_id=user.id, gross_income=i, tax_class=1, income_tax=0, total_deductions=0,
+                    net_income=i, tax_year=2024, created_at=start + timedelta(minutes=i),
+                    calculation_details={'padding': 'x' * 2000}
+                )
+                for i in range(count)
+            ])
+        await session.commit()
+
+    retention = HistoryRetention(sessions, engine, **options)
+    metrics = await retention.run()
+
+    async with sessions() as session:
+        result = await session.execute(select(TaxCalculation.user_id, TaxCalculation.gross_income))
+        remaining = {}
+        for user_id, gross in result.all():
+            remaining.setdefault(user_id, []).append(gross)
+
+    await engine.dispose()
+    return metrics, remaining
+
+
+def test_prunes_oldest_beyond_cap(tmp_path):
+    """Test that only the newest calculations of each user are kept"""
+    metrics, remaining = asyncio.run(_prune(tmp_path, [120, 5], incremental_db=True, max_per_user=50, chunk_size=30))
+
+    assert sorted(remaining[1]) == list(range(70, 120))
+    assert sorted(remaining[2]) == list(range(5))
+    assert metrics['users'] == 1
+    assert metrics['rows_pruned'] == 70
+    assert metrics['bytes_reclaimed'] > 0
+
+
+def test_archives_pruned_rows(tmp_path):
+    """Test that pruned rows are written to a gzip JSONL archive"""
+    metrics, remaining = asyncio.run(_prune(
+        tmp_path, [60], max_per_user=50, archive_dir=tmp_path / 'archive', vacuum_mode='off'
+    ))
+
+    with gzip.open(metrics['archive'], 'rt', encoding='utf-8') as f:
+        archived = [json.loads(line) for line in f]
+
+    assert sorted(row['gross_income'] for row in archived) == list(range(10))
+    assert len(remaining[1]) == 50
+    assert metrics['bytes_reclaimed'] == 0
+
+
+def test_incremental_vacuum_reclaims_space(tmp_path):
+    """Test that freed pages of an incremental auto_vacuum database are released"""
+    metrics, remaining = asyncio.run(_prune(tmp_path, [300], incremental_db=True, max_per_user=10))
+
+    assert metrics['rows_pruned'] == 290
+    # 290 rows with ~2 KB of details each
+    assert metrics['bytes_reclaimed'] > 290 * 2000
+
+
+async def _prune_and_convert(tmp_path):
+    metrics, _ = await _prune(tmp_path, [100], max_per_user=10)
+
+    engine = create_db_engine(f"sqlite+aiosqlite:///{tmp_path}/test.db", 'queue')
+    retention = HistoryRetention(engine=engine)
+    async with engine.connect() as conn:
+        mode_before = (await conn.execute(text("PRAGMA auto_vacuum"))).scalar()
+    converted = await retention.enable_incremental_vacuum()
+    converted_again = await retention.enable_incremental_vacuum()
+    async with engine.connect() as conn:
+        mode_after = (await conn.execute(text("PRAGMA auto_vacuum"))).scalar()
+    await engine.dispose()
+    return metrics, mode_before, converted, converted_again, mode_after
+
+
+def test_job_does_not_convert_database(tmp_path):
+    """Test that the job leaves auto_vacuum alone and the explicit conversion switches it once"""
+    metrics, mode_before, converted, converted_again, mode_after = asyncio.run(_prune_and_convert(tmp_path))
+
+    assert metrics['rows_pruned'] == 90
+    assert metrics['bytes_reclaimed'] == 0
+    assert mode_before == 0
+    assert converted and not converted_again
+    assert mode_after == 2
@@ -0,0 +1,120 @@
+"""
+Tests for the compiled translation catalog and its reload
+"""
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bot.utils.i18n import I18nManager, compile_message
+from config import SUPPORTED_LANGUAGES
+
+
+def test_compiled_message_matches_format():
+    """Test that compiled messages render like str.format"""
+    templates = [
+        'plain text',
+        'Hello {name}!',
+        '{amount:,.2f} € ({rate:>5}%) {name!r}',
+        'Braces {{kept}} and "quotes" \\ {name}',
+        'Nested {amount:>{width}}',
+        '{name} twice: {name}',
+    ]
+    values = {'name': 'Anna', 'amount': 1234.5, 'rate': 42, 'width': 12}
+
+    for template in templates:
+        assert compile_message(template).render(**values) == template.format(**values), template
+
+
+def test_every_locale_message_compiles():
+    """Test that every shipped message renders like str.format"""
+    manager = I18nManager()
+    for lang in SUPPORTED_LANGUAGES:
+        for key, text in manager.translations[lang].items():
+            message = manager.catalog[lang][key]
+            values = {field: f'<{field}>' for field in message.fields}
+            assert manager.get(key, lang, **values) == text.format(**values), (lang, key)
+
+
+def test_fallback_resolved_at_load():
+    """Test that keys missing in a language come from the fallback languages"""
+    manager = I18nManager()
+    manager.translations['en'] = {'greeting': 'Hello {name}'}
+    manager.translations['de'] = {'greeting': 'Hallo {name}', 'only_de': 'Nur deutsch'}
+    manager.translations['tr'] = {}
+    manager.compile_catalog()
+
+    assert manager.get('greeting', 'tr', name='Ali') == 'Hello Ali'
+    assert manager.get('only_de', 'en') == 'Nur deutsch'
+    assert manager.get('greeting', 'xx', name='Max') == 'Hallo Max'
+    assert manager.get('missing', 'tr') == 'missing'
+    assert manager.fallbacks['tr'] == 2
+
+
+def test_missing_format_argument(capsys):
+    """Test that a missing argument returns the unformatted message"""
+    manager = I18nManager()
+    manager.translations['de'] = {'greeting': 'Hallo {name}, {year}'}
+    manager.compile_catalog()
+
+    assert manager.get('greeting', 'de', name='Max') == 'Hallo {name}, {year}'
+    assert "Missing format key 'year'" in capsys.readouterr().out
+
+
+def write_locales(path: Path, messages: dict):
+    """Write one messages.json per language"""
+    for lang, texts in messages.items():
+        (path / lang).mkdir(parents=True, exist_ok=True)
+        (path / lang / 'messages.json').write_text(json.dumps(texts), encoding='utf-8')
+
+
+def touch(path: Path, seconds: int):
+    """Move a file's modification time forward (filesystems with coarse mtimes)"""
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + seconds * 10**9))
+
+
+def test_reload_changed_files(tmp_path):
+    """Test that only modified files are reloaded and listeners are called"""
+    write_locales(tmp_path, {lang: {'greeting': f'Hello {lang}'} for lang in SUPPORTED_LANGUAGES})
+    manager = I18nManager()
+    manager.locales_path = tmp_path
+    manager.load_all_translations()
+    reloads = []
+    manager.add_reload_listener(lambda: reloads.append(manager.get('greeting', 'tr')))
+
+    assert asyncio.run(manager.reload_async()) == {'changed': [], 'failed': []}
+
+    write_locales(tmp_path, {'tr': {'greeting': 'Merhaba {name}'}})
+    touch(tmp_path / 'tr' / 'messages.json', 1)
+    result = asyncio.run(manager.reload_async())
+
+    assert result['changed'] == ['tr']
+    assert result['total_ms'] > 0
+    assert reloads == ['Merhaba {name}']
+    assert manager.get('greeting', 'tr', name='Ali') == 'Merhaba Ali'
+    assert manager.get('greeting', 'de') == 'Hello de'
+    assert manager.get_stats()['reloads'] == 1
+
+
+def test_reload_keeps_invalid_file(tmp_path):
+    """Test that a file that does not parse keeps its previous translations"""
+    write_locales(tmp_path, {lang: {'greeting': f'Hello {lang}'} for lang in SUPPORTED_LANGUAGES})
+    manager = I18nManager()
+    manager.locales_path = tmp_path
+    manager.load_all_translations()
+    catalog = manager.catalog
+
+    (tmp_path / 'en' / 'messages.json').write_text('{"greeting": "Hello {name"}', encoding='utf-8')
+    touch(tmp_path / 'en' / 'messages.json', 1)
+    result = asyncio.run(manager.reload_async())
+
+    assert result['failed'] == ['en']
+    assert manager.catalog is catalog
+    assert manager.get('greeting', 'en') == 'Hello en'
+    # Not read again until the file changes
+    assert manager.changed_languages() == []
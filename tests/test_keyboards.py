@@ -0,0 +1,56 @@
+"""
+Tests for the keyboard registry
+"""
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from telegram import InlineKeyboardButton
+from bot.utils import i18n
+from bot.utils.keyboards import KeyboardRegistry, keyboards
+from config import SUPPORTED_LANGUAGES
+
+
+def test_keyboard_built_once_per_language():
+    """Test that a keyboard is built once and then shared"""
+    registry = KeyboardRegistry()
+    calls = []
+
+    @registry.register('greeting')
+    def greeting(lang):
+        calls.append(lang)
+        return [[InlineKeyboardButton(i18n.get('back', lang), callback_data='main_menu')]]
+
+    first = registry.get('greeting', 'de')
+    assert registry.get('greeting', 'de') is first
+    assert registry.get('greeting', 'en') is not first
+    assert calls == ['de', 'en']
+    assert registry.get_stats()['hits'] == 1
+
+
+def test_warm_builds_every_keyboard():
+    """Test that warm() builds all keyboards in all languages"""
+    keyboards.invalidate()
+    built = keyboards.warm()
+
+    stats = keyboards.get_stats()
+    assert built == stats['keyboards'] * len(SUPPORTED_LANGUAGES)
+    assert stats['cached'] == built
+    assert keyboards.warm() == 0
+
+
+def test_translation_reload_invalidates():
+    """Test that rebuilding the translation catalog drops cached keyboards"""
+    before = keyboards.get('period', 'en')
+    original = i18n.translations['en']
+    i18n.translations['en'] = dict(original, monthly='Per month')
+    try:
+        i18n.compile_catalog()
+        after = keyboards.get('period', 'en')
+        assert after is not before
+        assert after.inline_keyboard[0][0].text == 'Per month'
+    finally:
+        i18n.translations['en'] = original
+        i18n.compile_catalog()
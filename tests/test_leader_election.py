@@ -0,0 +1,69 @@
+"""
+Tests for the leader election of the scheduled jobs
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from bot.models.database import create_db_engine
+from bot.models.user import Base
+from bot.services.leader_election import LeaderLease
+
+
+async def _election(url: str):
+    engine = create_db_engine(url, 'queue')
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    first = LeaderLease('scheduler', holder='worker-a', ttl_seconds=0.5, session_factory=sessions)
+    second = LeaderLease('scheduler', holder='worker-b', ttl_seconds=0.5, session_factory=sessions)
+    runs = []
+
+    async def job(worker):
+        runs.append(worker)
+
+    results = {
+        'first_acquires': await first.renew(),
+        'second_waits': await second.renew(),
+        'first_renews': await first.renew(),
+    }
+    await first.leader_only(job)('a')
+    await second.leader_only(job)('b')
+
+    # The leader stops renewing: the lease expires and the other worker takes over
+    await asyncio.sleep(0.6)
+    results['second_takes_over'] = await second.renew()
+    results['first_lost'] = await first.renew()
+
+    # A released lease is free right away
+    await second.release()
+    results['first_after_release'] = await first.renew()
+
+    await engine.dispose()
+    return results, runs, first.get_stats(), second.get_stats()
+
+
+def test_one_leader_at_a_time(tmp_path):
+    """Test that only one worker holds the lease and that it moves on expiry and release"""
+    results, runs, first_stats, second_stats = asyncio.run(
+        _election(f"sqlite+aiosqlite:///{tmp_path}/test.db")
+    )
+
+    assert results == {
+        'first_acquires': True,
+        'second_waits': False,
+        'first_renews': True,
+        'second_takes_over': True,
+        'first_lost': False,
+        'first_after_release': True,
+    }
+    assert runs == ['a']
+    assert first_stats['acquisitions'] == 2
+    assert second_stats['acquisitions'] == 1
+    assert second_stats['skipped_jobs'] == 1
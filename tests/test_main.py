@@ -0,0 +1,202 @@
+"""
+Tests for the bot lifecycle in main()
+"""
+import asyncio
+import sys
+from contextlib import suppress
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from telegram.ext import Application, Updater
+
+import main
+from bot.models.database import create_db_engine
+from bot.models.user import Base, User
+from bot.models.calculation import TaxCalculation
+from bot.services.broadcast import broadcast_service
+from bot.services.calculation_writer import calculation_writer
+from bot.services.history_retention import history_retention
+from config import settings
+
+
+# Schedulers created by main() during a test
+schedulers = []
+
+
+# Shutdown steps in the order main() ran them
+events = []
+
+
+class RecordingScheduler(AsyncIOScheduler):
+    """Scheduler that keeps its jobs but never runs them on its own"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.started = False
+        schedulers.append(self)
+
+    def start(self, *args, **kwargs):
+        self.started = True
+
+    def shutdown(self, wait=True):
+        events.append('scheduler_shutdown')
+
+
+async def _noop(*args, **kwargs):
+    return None
+
+
+def _recording(name):
+    async def record(*args, **kwargs):
+        events.append(name)
+    return record
+
+
+def _offline(monkeypatch, tmp_path):
+    """Run main() without Telegram, log files or the configured database; returns its engine and sessions"""
+    engine = create_db_engine(f"sqlite+aiosqlite:///{tmp_path}/test.db")
+    sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def init_db():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with sessions() as session:
+            session.add(User(telegram_id=1))
+            await session.commit()
+
+    monkeypatch.setattr(settings, 'TELEGRAM_BOT_TOKEN', '123:TEST')
+    monkeypatch.setattr(settings, 'ADMIN_TELEGRAM_ID', 1)
+    monkeypatch.setattr(settings, 'TAX_SOURCES_CHECK_ENABLED', False)
+    monkeypatch.setattr(settings, 'CALCULATION_WRITE_BEHIND', True)
+    monkeypatch.setattr(main, 'setup_logging', lambda: None)
+    monkeypatch.setattr(main, 'show_error_statistics', lambda: None)
+    monkeypatch.setattr(main, 'init_db', init_db)
+    async def close_db():
+        events.append('close_db')
+        await engine.dispose()
+
+    monkeypatch.setattr(main, 'close_db', close_db)
+    monkeypatch.setattr(main, 'AsyncIOScheduler', RecordingScheduler)
+    for method in ('initialize', 'start'):
+        monkeypatch.setattr(Application, method, _noop)
+    for method in ('stop', 'shutdown'):
+        monkeypatch.setattr(Application, method, _recording(method))
+    monkeypatch.setattr(broadcast_service, 'stop', _recording('broadcast_stop'))
+    monkeypatch.setattr(Updater, 'start_polling', _noop)
+    monkeypatch.setattr(Updater, 'stop', _noop)
+    monkeypatch.setattr(calculation_writer, 'session_factory', sessions)
+    return engine, sessions
+
+
+async def _run_main(until):
+    """Start main() and wait until `until()` is true"""
+    schedulers.clear()
+    events.clear()
+    task = asyncio.create_task(main.main())
+    for _ in range(500):
+        if until() or task.done():
+            break
+        await asyncio.sleep(0.01)
+    return task
+
+
+async def _stop_main(task):
+    """Stop main() like Ctrl+C would"""
+    task.cancel()
+    with suppress(asyncio.CancelledError):
+        await task
+
+
+def test_writer_started_and_drained(monkeypatch, tmp_path):
+    """Test that main() starts the write-behind writer and flushes it on shutdown"""
+    engine, sessions = _offline(monkeypatch, tmp_path)
+
+    async def scenario():
+        task = await _run_main(lambda: calculation_writer.get_stats()['running'])
+        started = calculation_writer.get_stats()['running']
+
+        for gross in (30000, 40000, 50000):
+            await calculation_writer.submit(1, {
+                'gross_income': gross,
+                'tax_class': 1,
+                'income_tax': gross * 0.1,
+                'total_deductions': gross * 0.3,
+                'net_income': gross * 0.7,
+                'tax_year': 2024,
+            })
+
+        await _stop_main(task)
+
+        async with sessions() as session:
+            count = await session.scalar(select(func.count()).select_from(TaxCalculation))
+        await engine.dispose()
+        return started, count
+
+    started, count = asyncio.run(scenario())
+
+    assert started
+    assert count == 3
+    assert not calculation_writer.get_stats()['running']
+    assert calculation_writer.get_stats()['queue_depth'] == 0
+
+
+def test_history_retention_scheduled(monkeypatch, tmp_path):
+    """Test that main() schedules the retention job and the job enforces the cap"""
+    engine, sessions = _offline(monkeypatch, tmp_path)
+    monkeypatch.setattr(settings, 'HISTORY_RETENTION_ENABLED', True)
+    monkeypatch.setattr(settings, 'MAX_CALCULATION_HISTORY', 2)
+    monkeypatch.setattr(history_retention, 'session_factory', sessions)
+    monkeypatch.setattr(history_retention, 'engine', engine)
+    monkeypatch.setattr(history_retention, 'max_per_user', 2)
+    monkeypatch.setattr(history_retention, 'archive_dir', None)
+    monkeypatch.setattr(history_retention, 'vacuum_mode', 'off')
+
+    async def scenario():
+        task = await _run_main(lambda: any(scheduler.started for scheduler in schedulers))
+        jobs = {job.id: job for scheduler in schedulers for job in scheduler.get_jobs()}
+
+        async with sessions() as session:
+            user = await session.scalar(select(User))
+            session.add_all([
+                TaxCalculation(
+                    user_id=user.id, gross_income=30000 + i, tax_class=1, income_tax=3000,
+                    total_deductions=9000, net_income=21000 + i, tax_year=2024
+                )
+                for i in range(5)
+            ])
+            await session.commit()
+
+        if 'history_retention' in jobs:
+            await jobs['history_retention'].func()
+
+        async with sessions() as session:
+            count = await session.scalar(select(func.count()).select_from(TaxCalculation))
+        await _stop_main(task)
+        await engine.dispose()
+        return set(jobs), count
+
+    jobs, count = asyncio.run(scenario())
+
+    assert 'history_retention' in jobs
+    assert count == 2
+
+
+def test_background_work_stopped_before_application(monkeypatch, tmp_path):
+    """Test that jobs and broadcasts stop while the bot can still send and before the database closes"""
+    engine, _ = _offline(monkeypatch, tmp_path)
+    monkeypatch.setattr(settings, 'HISTORY_RETENTION_ENABLED', True)
+
+    async def scenario():
+        task = await _run_main(lambda: any(scheduler.started for scheduler in schedulers))
+        await _stop_main(task)
+        await engine.dispose()
+
+    asyncio.run(scenario())
+
+    assert events[:4] == ['scheduler_shutdown', 'broadcast_stop', 'stop', 'shutdown']
+    assert events[-1] == 'close_db'
@@ -0,0 +1,93 @@
+"""
+Tests for the Alembic migrations run by init_db
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import inspect, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from bot.models.database import create_db_engine, init_db
+from bot.models.user import Base, User
+from bot.models.calculation import TaxCalculation
+from bot.models.tax_update import TaxUpdate
+from bot.services.calculation_storage import is_compact
+from tests.test_calculation_storage import _row
+
+# Tables that existed before migrations were introduced
+LEGACY_TABLES = [User.__table__, TaxCalculation.__table__, TaxUpdate.__table__]
+
+
+async def _revision(engine) -> str:
+    async with engine.connect() as conn:
+        return (await conn.execute(text("SELECT version_num FROM alembic_version"))).scalar()
+
+
+async def _migrate_empty(url: str):
+    engine = create_db_engine(url, 'queue')
+    try:
+        await init_db(engine)
+        revision = await _revision(engine)
+        # Second start: fast path, nothing to do
+        await init_db(engine)
+
+        async with engine.connect() as conn:
+            tables = await conn.run_sync(lambda sync_conn: set(inspect(sync_conn).get_table_names()))
+            indexes = await conn.run_sync(
+                lambda sync_conn: {index['name'] for index in inspect(sync_conn).get_indexes('tax_calculations')}
+            )
+        return revision, await _revision(engine), tables, indexes
+    finally:
+        await engine.dispose()
+
+
+def test_empty_database_is_migrated_to_head(tmp_path):
+    """Test that a new database gets all tables and indexes from the migrations"""
+    revision, revision_after_restart, tables, indexes = asyncio.run(
+        _migrate_empty(f"sqlite+aiosqlite:///{tmp_path}/test.db")
+    )
+
+    assert revision == revision_after_restart == '0007'
+    assert {'users', 'tax_calculations', 'tax_updates', 'alembic_version'} <= tables
+    assert 'ix_tax_calculations_user_created' in indexes
+
+
+async def _migrate_legacy(url: str):
+    engine = create_db_engine(url, 'queue')
+    try:
+        # Database as created by create_all before migrations existed
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all, tables=LEGACY_TABLES)
+
+        session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        async with session_factory() as session:
+            user = User(telegram_id=1, language='de')
+            session.add(user)
+            await session.flush()
+            for annual_gross in (30000, 45000, 90000):
+                calc = _row(annual_gross, 'full')
+                calc.user_id = user.id
+                session.add(calc)
+            await session.commit()
+
+        await init_db(engine)
+
+        async with session_factory() as session:
+            calcs = (await session.execute(select(TaxCalculation))).scalars().all()
+        return await _revision(engine), calcs
+    finally:
+        await engine.dispose()
+
+
+def test_legacy_database_is_stamped_and_upgraded(tmp_path):
+    """Test that a create_all database keeps its data and gets the later migrations"""
+    revision, calcs = asyncio.run(_migrate_legacy(f"sqlite+aiosqlite:///{tmp_path}/test.db"))
+
+    assert revision == '0007'
+    assert len(calcs) == 3
+    # Migrations leave the stored details alone; compact_calculations.py rewrites them
+    assert not any(is_compact(calc.calculation_details) for calc in calcs)
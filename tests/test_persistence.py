@@ -0,0 +1,81 @@
+"""
+Tests for the database-backed bot persistence
+"""
+import asyncio
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from bot.models.database import create_db_engine
+from bot.models.user import Base
+from bot.models.persistence import UserData
+from bot.services.persistence import SQLPersistence
+
+
+async def _restart_flow(url: str):
+    engine = create_db_engine(url, 'queue')
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    persistence = SQLPersistence(sessions)
+    await persistence.get_user_data()
+    await persistence.get_conversations('tax_calculation')
+
+    # One run of Application.update_persistence: all changes handed over concurrently
+    await asyncio.gather(
+        *(persistence.update_user_data(user_id, {'language': 'de', 'gross_income': 1000.0 * user_id})
+          for user_id in range(1, 51)),
+        *(persistence.update_conversation('tax_calculation', (user_id, user_id), 3) for user_id in range(1, 51)),
+    )
+    await asyncio.sleep(0.1)
+    stats_after_run = persistence.get_stats()
+
+    # Next run: conversation of user 1 ended, user 2 dropped, user 3 changed
+    await asyncio.gather(
+        persistence.update_conversation('tax_calculation', (1, 1), None),
+        persistence.drop_user_data(2),
+        persistence.update_user_data(3, {'language': 'en'}),
+    )
+    await persistence.flush()
+
+    # User 4 was inactive for too long
+    async with sessions() as session:
+        await session.execute(
+            update(UserData).where(UserData.user_id == 4).values(updated_at=datetime.utcnow() - timedelta(days=2))
+        )
+        await session.commit()
+
+    restarted = SQLPersistence(sessions, max_age_hours=24)
+    user_data = await restarted.get_user_data()
+    conversations = await restarted.get_conversations('tax_calculation')
+
+    await engine.dispose()
+    return stats_after_run, persistence.get_stats(), user_data, conversations
+
+
+def test_changes_are_batched_and_restored(tmp_path):
+    """Test that one persistence run is one flush and a restart restores the state"""
+    stats_after_run, stats, user_data, conversations = asyncio.run(
+        _restart_flow(f"sqlite+aiosqlite:///{tmp_path}/test.db")
+    )
+
+    assert stats_after_run['flushes'] == 1
+    assert stats_after_run['rows_written'] == 100
+    assert stats['flushes'] == 2
+    assert stats['failed_flushes'] == 0
+
+    assert 2 not in user_data and 4 not in user_data
+    assert user_data[3] == {'language': 'en'}
+    assert user_data[5] == {'language': 'de', 'gross_income': 5000.0}
+    assert len(user_data) == 48
+
+    assert (1, 1) not in conversations
+    assert conversations[(5, 5)] == 3
+    assert len(conversations) == 49
@@ -0,0 +1,103 @@
+"""
+Tests for the outbound rate limiter
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+from telegram.error import RetryAfter
+
+from bot.rate_limiter import BROADCAST, INTERACTIVE, PriorityRateLimiter
+
+
+async def _send(limiter, sent, chat_id, name, priority=INTERACTIVE):
+    async def callback():
+        sent.append(name)
+        return True
+
+    return await limiter.process_request(
+        callback, (), {}, 'sendMessage', {'chat_id': chat_id}, {'priority': priority}
+    )
+
+
+def test_interactive_requests_overtake_broadcasts():
+    """Test that waiting interactive replies get the next global tokens"""
+    async def run():
+        limiter = PriorityRateLimiter(global_per_second=20, chat_burst=1)
+        await limiter.initialize()
+        sent = []
+        broadcasts = [
+            asyncio.create_task(_send(limiter, sent, chat_id, f'b{chat_id}', BROADCAST))
+            for chat_id in range(1, 41)
+        ]
+        # Burst used up, the broadcasts wait for the global bucket
+        await asyncio.sleep(0.1)
+        replies = [asyncio.create_task(_send(limiter, sent, chat_id, f'r{chat_id}')) for chat_id in range(101, 104)]
+        await asyncio.gather(*broadcasts, *replies)
+        stats = limiter.get_stats()
+        await limiter.shutdown()
+        return sent, stats
+
+    sent, stats = asyncio.run(run())
+
+    last_reply = max(sent.index(f'r{chat_id}') for chat_id in range(101, 104))
+    assert last_reply < 26
+    assert len(sent) == 43
+    assert stats['interactive']['requests'] == 3
+    assert stats['broadcast']['requests'] == 40
+    assert stats['broadcast']['max_wait_ms'] > stats['interactive']['max_wait_ms']
+
+
+def test_requests_to_one_chat_are_spaced_and_ordered():
+    """Test that one chat gets its burst at once and the rest at the chat rate"""
+    async def run():
+        limiter = PriorityRateLimiter(chat_per_second=20, chat_burst=2)
+        sent = []
+        started = time.monotonic()
+        await asyncio.gather(*(_send(limiter, sent, 42, index, BROADCAST if index % 2 else INTERACTIVE)
+                               for index in range(6)))
+        elapsed = time.monotonic() - started
+        await limiter.shutdown()
+        return sent, elapsed
+
+    sent, elapsed = asyncio.run(run())
+
+    assert sent == list(range(6))
+    # 2 at once, 4 more at 20 per second
+    assert elapsed >= 0.19
+
+
+def test_retry_after_pauses_and_retries():
+    """Test that a RetryAfter answer is retried after the pause and gives up after max_retries"""
+    async def run():
+        limiter = PriorityRateLimiter(max_retries=1)
+        calls = []
+
+        async def flaky():
+            calls.append(time.monotonic())
+            if len(calls) == 1:
+                raise RetryAfter(0.2)
+            return True
+
+        async def flooded():
+            raise RetryAfter(0)
+
+        result = await limiter.process_request(flaky, (), {}, 'sendMessage', {'chat_id': 1}, None)
+        with pytest.raises(RetryAfter):
+            await limiter.process_request(flooded, (), {}, 'sendMessage', {'chat_id': 2}, None)
+        no_chat = await limiter.process_request(flaky, (), {}, 'answerCallbackQuery', {}, None)
+        stats = limiter.get_stats()
+        await limiter.shutdown()
+        return result, no_chat, calls, stats
+
+    result, no_chat, calls, stats = asyncio.run(run())
+
+    assert result is True and no_chat is True
+    assert calls[1] - calls[0] >= 0.19
+    assert stats['retry_afters'] == 3
+    assert stats['unlimited'] == 1
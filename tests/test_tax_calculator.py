@@ -1,6 +1,8 @@
 """
 Tests for German Tax Calculator
 """
+import json
+import pickle
 import pytest
 import sys
 from pathlib import Path
@@ -17,6 +19,34 @@ def test_tax_calculator_initialization():
     assert calculator.year == 2024
 
 
+def test_tax_years_side_by_side():
+    """Test that each calculator uses the tariff of its own year"""
+    calculator_2024 = GermanTaxCalculator(year=2024)
+    calculator_2026 = GermanTaxCalculator(year=2026)
+
+    assert calculator_2024.tariff.year == 2024
+    assert calculator_2026.tariff.year == 2026
+
+    # Higher Grundfreibetrag in 2026 means less tax on the same income
+    tax_2024 = calculator_2024.calculate_income_tax(40000, tax_class=1)
+    tax_2026 = calculator_2026.calculate_income_tax(40000, tax_class=1)
+    assert tax_2026 < tax_2024
+
+
+def test_tariff_is_immutable():
+    """Test that compiled tariffs cannot be modified"""
+    calculator = GermanTaxCalculator()
+
+    with pytest.raises(AttributeError):
+        calculator.tariff.basic_allowance = 0
+
+
+def test_unsupported_year():
+    """Test that unknown tax years are rejected"""
+    with pytest.raises(ValueError):
+        GermanTaxCalculator(year=1999)
+
+
 def test_basic_allowance():
     """Test that income below basic allowance pays no tax"""
     calculator = GermanTaxCalculator()
@@ -187,5 +217,100 @@ def test_progressive_tax():
     assert high_rate > low_rate
 
 
+def test_batch_matches_scalar():
+    """Test that the batch API reproduces the scalar results exactly"""
+    calculator = GermanTaxCalculator()
+
+    rows = []
+    for gross in [0, 9999.99, 11604, 17005.5, 30000, 45000, 66760.01, 100000, 277826, 500000.125]:
+        for tax_class in [1, 2, 3, 5, 6]:
+            rows.append({
+                'annual_gross': gross,
+                'tax_class': tax_class,
+                'kinderfreibetrag': 1.5 if tax_class == 2 else 0.0,
+                'church_tax': tax_class % 2 == 1,
+                'state': 'BY' if gross > 50000 else 'BE_EAST',
+                'employment_type': 'civil_servant' if tax_class == 6 else 'standard',
+                'age_group': 'over_23_no_children',
+                'health_insurance_company': 'private' if tax_class == 3 else 'barmer',
+            })
+
+    columns = {key: [row[key] for row in rows] for key in rows[0]}
+    batch = calculator.calculate_net_income_batch(**columns)
+
+    for i, row in enumerate(rows):
+        expected = calculator.calculate_net_income(**row)
+        for key, values in batch.items():
+            assert values[i] == expected[key], f"{key} differs for {row}"
+
+
+def test_batch_broadcasts_scalars():
+    """Test that scalar arguments apply to every row of the batch"""
+    calculator = GermanTaxCalculator()
+
+    batch = calculator.calculate_net_income_batch(
+        annual_gross=[30000, 60000, 90000],
+        tax_class=1,
+        state='XX'  # Unknown states fall back to Berlin (West)
+    )
+
+    assert len(batch['net_annual']) == 3
+    assert batch['net_annual'][2] == calculator.calculate_net_income(90000, 1)['net_annual']
+
+
+def test_result_behaves_like_dict():
+    """Test that the result type is compatible with the former result dict"""
+    calculator = GermanTaxCalculator()
+
+    result = calculator.calculate_net_income(annual_gross=45000, tax_class=1, church_tax=True)
+    details = result.to_dict()
+
+    assert len(details) == 19
+    assert dict(result) == details
+    assert result['net_annual'] == result.net_annual == details['net_annual']
+    assert result.get('missing') is None
+    assert json.loads(json.dumps(details)) == details
+
+
+def test_result_has_dict_semantics():
+    """Test membership, iteration, equality and JSON with the meaning of the former dict"""
+    calculator = GermanTaxCalculator()
+
+    result = calculator.calculate_net_income(annual_gross=45000, tax_class=1)
+    details = result.to_dict()
+
+    assert 'net_annual' in result and 'missing' not in result
+    assert list(result) == list(details)
+    assert list(result.items()) == list(details.items())
+    assert result == details and details == result
+    assert result != {**details, 'net_annual': 0}
+    assert result == calculator.calculate_net_income(annual_gross=45000, tax_class=1)
+    assert pickle.loads(pickle.dumps(result)) == result
+    with pytest.raises(KeyError):
+        result[0]
+    with pytest.raises(AttributeError):
+        result.net_annual = 0
+    # Not a dict subclass: serialize the dict, never a list of values
+    with pytest.raises(TypeError):
+        json.dumps(result)
+    assert json.loads(json.dumps(details)) == details
+
+
+def test_sweep_matches_scalar():
+    """Test that the salary sweep yields the calculate_net_income values"""
+    calculator = GermanTaxCalculator()
+    profile = {'tax_class': 3, 'church_tax': True, 'state': 'BY', 'age_group': 'over_23_no_children'}
+
+    points = list(calculator.sweep_net_income(10000, 300000, 12345.67, **profile))
+
+    assert len(points) == 24
+    for i, point in enumerate(points):
+        expected = calculator.calculate_net_income(10000 + i * 12345.67, **profile)
+        assert point.gross_annual == expected['gross_annual']
+        assert point.income_tax == expected['income_tax']
+        assert point.church_tax == expected['church_tax']
+        assert point.net_annual == expected['net_annual']
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
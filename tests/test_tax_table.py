@@ -0,0 +1,65 @@
+"""
+Tests for the precomputed income tax table
+"""
+import pytest
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bot.services.tax_calculator import GermanTaxCalculator
+from bot.services.tax_table import build_tax_table, load_tax_table, validate_tax_table
+
+
+@pytest.fixture
+def table_file(tmp_path):
+    """Small table covering the progressive zones"""
+    calculator = GermanTaxCalculator()
+    table = build_tax_table(calculator, max_zve=70000)
+    path = tmp_path / 'income_tax_table_2024.bin'
+    table.save(path)
+    return path
+
+
+def test_table_matches_formula(table_file):
+    """Test that every table entry equals the formula"""
+    calculator = GermanTaxCalculator()
+    table = load_tax_table(table_file, calculator.tariff)
+
+    assert table is not None
+    assert validate_tax_table(table, calculator) == 0
+
+
+def test_calculator_uses_table(table_file):
+    """Test that a calculator with a table returns the formula results"""
+    formula = GermanTaxCalculator()
+    tabulated = GermanTaxCalculator()
+    tabulated.attach_tax_table(load_tax_table(table_file, tabulated.tariff))
+
+    # Inside the table, beyond it, and with Kinderfreibetrag
+    for income in [5000, 20000.75, 45000, 81604.99, 150000]:
+        for tax_class in range(1, 7):
+            assert tabulated.calculate_income_tax(income, tax_class) == formula.calculate_income_tax(income, tax_class)
+            assert tabulated.calculate_income_tax(income, tax_class, 2.5) == formula.calculate_income_tax(income, tax_class, 2.5)
+
+
+def test_table_of_other_tariff_is_rejected(table_file):
+    """Test that a table built for another tariff is not used"""
+    calculator_2026 = GermanTaxCalculator(year=2026)
+
+    assert load_tax_table(table_file, calculator_2026.tariff) is None
+
+
+def test_damaged_table_is_rejected(table_file):
+    """Test that empty, truncated and oversized files fall back to the formula"""
+    calculator = GermanTaxCalculator()
+    data = table_file.read_bytes()
+
+    for damaged in (b'', data[:40], data[:-8], data[:-3], data + b'\0' * 8):
+        table_file.write_bytes(damaged)
+        assert load_tax_table(table_file, calculator.tariff) is None
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,111 @@
+"""
+Tests for the per-user update processor
+"""
+import asyncio
+import random
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from telegram import Update
+
+from bot.update_processor import PerUserUpdateProcessor, update_key
+
+
+def _update(update_id: int, user_id: int) -> Update:
+    return Update.de_json({
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'date': 0,
+            'chat': {'id': user_id, 'type': 'private'},
+            'from': {'id': user_id, 'is_bot': False, 'first_name': 'Test'},
+            'text': 'hi',
+        },
+    }, None)
+
+
+async def _process(updates, concurrency):
+    processor = PerUserUpdateProcessor(concurrency)
+    await processor.initialize()
+
+    order = {}
+    running = 0
+    max_running = 0
+
+    async def handle(update):
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(random.uniform(0, 0.005))
+        order.setdefault(update.effective_user.id, []).append(update.update_id)
+        running -= 1
+
+    # Like Application._update_fetcher: one task per update, in arrival order
+    await asyncio.gather(*(processor.process_update(update, handle(update)) for update in updates))
+    stats = processor.get_stats()
+    await processor.shutdown()
+    return order, max_running, stats
+
+
+def test_update_key():
+    """Test that updates are ordered by (chat, user)"""
+    assert update_key(_update(1, 42)) == (42, 42)
+    assert update_key(Update(update_id=2)) is None
+    assert update_key('not an update') is None
+
+
+def test_order_per_user_and_concurrency_limit():
+    """Test that users run in parallel, each in arrival order, within the limit"""
+    random.seed(1)
+    users = [100 + i for i in range(10)]
+    updates = [_update(update_id, random.choice(users)) for update_id in range(1, 201)]
+
+    order, max_running, stats = asyncio.run(_process(updates, 4))
+
+    for user_id, update_ids in order.items():
+        assert update_ids == sorted(update_ids)
+    assert sum(len(ids) for ids in order.values()) == 200
+    assert 1 < max_running <= 4
+    assert stats['processed'] == 200
+    assert stats['running'] == stats['waiting'] == stats['active_keys'] == 0
+
+
+def test_same_user_runs_sequentially():
+    """Test that the updates of one user never overlap"""
+    updates = [_update(update_id, 42) for update_id in range(1, 21)]
+
+    order, max_running, _ = asyncio.run(_process(updates, 8))
+
+    assert order == {42: list(range(1, 21))}
+    assert max_running == 1
+
+
+def test_cancelled_update_releases_its_user():
+    """Test that a cancelled waiting update does not block later updates of the user"""
+    async def run():
+        processor = PerUserUpdateProcessor(2)
+        await processor.initialize()
+        gate = asyncio.Event()
+        handled = []
+
+        async def handle(update_id):
+            await gate.wait()
+            handled.append(update_id)
+
+        first = asyncio.create_task(processor.process_update(_update(1, 42), handle(1)))
+        second = asyncio.create_task(processor.process_update(_update(2, 42), handle(2)))
+        third = asyncio.create_task(processor.process_update(_update(3, 42), handle(3)))
+        await asyncio.sleep(0.01)
+        second.cancel()
+        gate.set()
+        await asyncio.gather(first, third)
+        return handled, second.cancelled(), processor.get_stats()
+
+    handled, cancelled, stats = asyncio.run(run())
+    assert cancelled
+    assert handled == [1, 3]
+    assert stats['waiting'] == 0
+    assert stats['active_keys'] == 0
@@ -0,0 +1,82 @@
+"""
+Tests for the user profile cache
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from bot.models.database import create_db_engine
+from bot.models.user import Base, User
+from bot.services.user_cache import UserCache
+
+
+async def _with_cache(tmp_path, scenario, maxsize: int = 100):
+    engine = create_db_engine(f"sqlite+aiosqlite:///{tmp_path}/test.db", 'queue')
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with sessions() as session:
+        session.add_all([User(telegram_id=i, language='de') for i in (1, 2, 3)])
+        await session.commit()
+
+    try:
+        return await scenario(UserCache(sessions, maxsize=maxsize), sessions)
+    finally:
+        await engine.dispose()
+
+
+def test_profile_loaded_once(tmp_path):
+    """Test that repeated lookups are served from the cache"""
+    async def scenario(cache, sessions):
+        first = await cache.get(1)
+        second = await cache.get(1)
+        missing = await cache.get(999)
+        return first, second, missing, cache.get_stats()
+
+    first, second, missing, stats = asyncio.run(_with_cache(tmp_path, scenario))
+
+    assert first is second
+    assert first.language == 'de'
+    assert missing is None
+    assert stats['hits'] == 1
+    assert stats['misses'] == 2
+
+
+def test_write_through(tmp_path):
+    """Test that updates reach both the database and the cache"""
+    async def scenario(cache, sessions):
+        await cache.get(1)
+        profile = await cache.set_fields(1, language='en', state='BY')
+        unknown = await cache.set_fields(999, language='en')
+        async with sessions() as session:
+            db_user = (await session.execute(select(User).where(User.telegram_id == 1))).scalar_one()
+        return profile, unknown, await cache.get(1), db_user
+
+    profile, unknown, cached, db_user = asyncio.run(_with_cache(tmp_path, scenario))
+
+    assert profile.language == cached.language == db_user.language == 'en'
+    assert cached.state == db_user.state == 'BY'
+    assert unknown is None
+
+
+def test_lru_eviction(tmp_path):
+    """Test that the least recently used profile is evicted"""
+    async def scenario(cache, sessions):
+        await cache.get(1)
+        await cache.get(2)
+        await cache.get(1)
+        await cache.get(3)
+        return cache
+
+    cache = asyncio.run(_with_cache(tmp_path, scenario, maxsize=2))
+
+    assert len(cache) == 2
+    assert cache.evictions == 1
+    assert 2 not in cache._profiles
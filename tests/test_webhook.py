@@ -0,0 +1,64 @@
+"""
+Tests for the webhook server
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from aiohttp.test_utils import TestClient, TestServer
+from telegram.ext import Application
+
+from bot.models.database import create_db_engine
+from bot.webhook import SECRET_HEADER, WebhookServer
+
+UPDATE = {
+    'update_id': 1,
+    'message': {
+        'message_id': 1,
+        'date': 0,
+        'chat': {'id': 42, 'type': 'private'},
+        'from': {'id': 42, 'is_bot': False, 'first_name': 'Test'},
+        'text': '/start',
+    },
+}
+
+
+async def _requests(tmp_path):
+    application = Application.builder().token('123456:TEST').updater(None).build()
+    engine = create_db_engine(f"sqlite+aiosqlite:///{tmp_path}/test.db", 'null')
+    server = WebhookServer(application, path='/telegram', secret_token='secret', engine=engine)
+
+    client = TestClient(TestServer(server.app))
+    await client.start_server()
+    try:
+        statuses = {
+            'no_secret': (await client.post('/telegram', json=UPDATE)).status,
+            'wrong_secret': (await client.post('/telegram', json=UPDATE, headers={SECRET_HEADER: 'x'})).status,
+            'invalid': (await client.post('/telegram', data='{', headers={SECRET_HEADER: 'secret'})).status,
+            'update': (await client.post('/telegram', json=UPDATE, headers={SECRET_HEADER: 'secret'})).status,
+            'healthz': (await client.get('/healthz')).status,
+            # Application was not started
+            'readyz': (await client.get('/readyz')).status,
+        }
+        queued = application.update_queue.get_nowait()
+    finally:
+        await client.close()
+        await engine.dispose()
+    return statuses, queued, server.get_stats()
+
+
+def test_webhook_checks_secret_and_queues_updates(tmp_path):
+    """Test that only updates with the secret token reach the update queue"""
+    statuses, queued, stats = asyncio.run(_requests(tmp_path))
+
+    assert statuses == {
+        'no_secret': 403, 'wrong_secret': 403, 'invalid': 400, 'update': 200, 'healthz': 200, 'readyz': 503,
+    }
+    assert queued.update_id == 1
+    assert queued.message.text == '/start'
+    assert stats['updates_received'] == 1
+    assert stats['updates_rejected'] == 2
+    assert stats['invalid_requests'] == 1
@@ -0,0 +1,133 @@
+"""
+Tests for the multi-worker mode
+"""
+import asyncio
+import json
+import socket
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from aiohttp import ClientSession, web
+
+from bot.utils.error_tracker import error_json_files, merge_error_logs
+from bot.webhook import SECRET_HEADER
+from bot.workers import WorkerSupervisor, routing_id, worker_index
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _port_in_use(port: int) -> bool:
+    with socket.socket() as sock:
+        return sock.connect_ex(('127.0.0.1', port)) == 0
+
+
+def _message(update_id: int, user_id: int) -> dict:
+    return {
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'date': 0,
+            'chat': {'id': user_id, 'type': 'private'},
+            'from': {'id': user_id, 'is_bot': False, 'first_name': 'Test'},
+            'text': 'hi',
+        },
+    }
+
+
+def test_routing_by_sender():
+    """Test that updates are routed by sender, else by chat"""
+    callback = {'update_id': 2, 'callback_query': {'id': '1', 'from': {'id': 7}, 'message': {'chat': {'id': 8}}}}
+    channel_post = {'update_id': 3, 'channel_post': {'message_id': 1, 'chat': {'id': -1001}}}
+
+    assert routing_id(_message(1, 42)) == 42
+    assert routing_id(callback) == 7
+    assert routing_id(channel_post) == -1001
+    assert routing_id({'update_id': 4}) == 0
+    assert worker_index(_message(1, 43), 4) == 3
+    assert 0 <= worker_index(channel_post, 4) < 4
+
+
+async def _forward(workers: int):
+    port = _free_port()
+    while any(_port_in_use(port + 1 + index) for index in range(workers)):
+        port = _free_port()
+    supervisor = WorkerSupervisor(workers, listen='127.0.0.1', port=port, secret_token='secret', spawn=False)
+
+    # Stand-ins for the worker processes
+    received = {index: [] for index in range(workers)}
+    runners = []
+    for index in range(workers):
+        async def handle(request, index=index):
+            assert request.headers[SECRET_HEADER] == 'secret'
+            update = await request.json()
+            received[index].append((update['message']['from']['id'], update['update_id']))
+            return web.Response()
+
+        app = web.Application()
+        app.router.add_post('/telegram', handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, '127.0.0.1', supervisor.worker_port(index)).start()
+        runners.append(runner)
+
+    await supervisor.start()
+    url = f"http://127.0.0.1:{port}/telegram"
+    async with ClientSession() as session:
+        rejected = (await session.post(url, json=_message(0, 1))).status
+        for update_id in range(1, 61):
+            async with session.post(
+                url, json=_message(update_id, 100 + update_id % 5), headers={SECRET_HEADER: 'secret'}
+            ) as response:
+                assert response.status == 200
+    # stop() hands over everything received before it returns
+    await supervisor.stop()
+    stats = supervisor.get_stats()
+
+    for runner in runners:
+        await runner.cleanup()
+    return rejected, received, stats
+
+
+def test_updates_are_forwarded_to_the_worker_of_their_user():
+    """Test that every user goes to one worker and keeps the order of its updates"""
+    rejected, received, stats = asyncio.run(_forward(3))
+
+    assert rejected == 403
+    assert sum(len(updates) for updates in received.values()) == 60
+    for index, updates in received.items():
+        assert all(user_id % 3 == index for user_id, _ in updates)
+        for user_id in {user_id for user_id, _ in updates}:
+            update_ids = [update_id for sender, update_id in updates if sender == user_id]
+            assert update_ids == sorted(update_ids)
+    assert stats['updates_received'] == 60
+    assert stats['updates_rejected'] == 1
+    assert [worker['forwarded'] for worker in stats['workers']] == [len(received[i]) for i in range(3)]
+
+
+def test_worker_error_logs_are_merged_by_time(tmp_path):
+    """Test that the per-worker JSONL error files merge into one time-ordered list"""
+    base = tmp_path / 'errors_detailed.jsonl'
+    timestamps = {
+        base: ['2026-01-01T10:00:00'],
+        tmp_path / 'errors_detailed.worker-0.jsonl': ['2026-01-01T09:00:00', '2026-01-01T11:00:00'],
+        tmp_path / 'errors_detailed.worker-1.jsonl': ['2026-01-01T10:30:00', '2026-01-01T12:00:00'],
+    }
+    for path, values in timestamps.items():
+        with open(path, 'w', encoding='utf-8') as f:
+            for value in values:
+                f.write(json.dumps({'timestamp': value, 'error_type': 'ValueError'}) + '\n')
+
+    files = error_json_files(str(base))
+    merged = merge_error_logs(files)
+    recent = merge_error_logs(files, limit=2)
+
+    assert files[0] == base and len(files) == 3
+    assert [error['timestamp'][11:16] for error in merged] == ['09:00', '10:00', '10:30', '11:00', '12:00']
+    assert [error['timestamp'][11:16] for error in recent] == ['11:00', '12:00']